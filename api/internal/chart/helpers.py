@@ -1,9 +1,13 @@
-from datetime import datetime
+from datetime import date, datetime, time, timedelta
+from decimal import ROUND_HALF_UP, Decimal
+from typing import List
 
 from cerberus import Validator
 from dateutil import parser
+from dateutil.relativedelta import relativedelta
+from django.conf import settings
 from django.db import connection
-from django.db.models import Case, F, FloatField, Value, When
+from django.db.models import Case, F, FloatField, Min, Value, When
 from django.db.models.fields.json import KeyTextTransform
 from django.db.models.functions import Cast, Trunc
 from django.utils import timezone
@@ -11,7 +15,16 @@ from django.utils.functional import cached_property
 from rest_framework.exceptions import ValidationError
 
 from codecov_auth.models import Owner
-from core.models import Commit, Repository
+from core.models import BranchDailyTotals, Commit, Repository
+
+# increment between the start dates of consecutive chart datapoints
+GROUPING_UNIT_DELTAS = {
+    "day": relativedelta(days=1),
+    "week": relativedelta(weeks=1),
+    "month": relativedelta(months=1),
+    "quarter": relativedelta(months=3),
+    "year": relativedelta(years=1),
+}
 
 
 class ChartParamValidator(Validator):
@@ -133,6 +146,22 @@ def apply_grouping(queryset, data):
     # should be the one with the min/max value we want to aggregate by
 
 
+def truncate_date(value: date, grouping_unit: str) -> date:
+    """
+    Start date of the `grouping_unit` containing `value`, matching Postgres'
+    `DATE_TRUNC` (weeks start on Mondays).
+    """
+    if grouping_unit == "week":
+        return value - timedelta(days=value.weekday())
+    if grouping_unit == "month":
+        return value.replace(day=1)
+    if grouping_unit == "quarter":
+        return value.replace(month=(value.month - 1) // 3 * 3 + 1, day=1)
+    if grouping_unit == "year":
+        return value.replace(month=1, day=1)
+    return value
+
+
 class ChartQueryRunner:
     """
     Houses the SQL query that retrieves data for analytics chart, and
@@ -197,9 +226,9 @@ class ChartQueryRunner:
         return ""
 
     @cached_property
-    def repoids(self):
+    def repository_ids(self) -> List[int]:
         """
-        Returns a string of repoids of the repositories being queried.
+        Returns the repoids of the repositories being queried.
         """
         organization = Owner.objects.get(
             service=self.request_params["service"],
@@ -215,13 +244,16 @@ class ChartQueryRunner:
         if self.request_params.get("repositories", []):
             repos = repos.filter(name__in=self.request_params.get("repositories", []))
 
-        if repos:
+        return list(repos.values_list("repoid", flat=True))
+
+    @cached_property
+    def repoids(self):
+        """
+        Returns a string of repoids of the repositories being queried.
+        """
+        if self.repository_ids:
             # Get repoids into a format easily plugged into raw SQL
-            return (
-                "("
-                + ",".join(map(str, list(repos.values_list("repoid", flat=True))))
-                + ")"
-            )
+            return "(" + ",".join(map(str, self.repository_ids)) + ")"
 
     @cached_property
     def first_complete_commit_date(self):
@@ -229,6 +261,14 @@ class ChartQueryRunner:
         Date of first commit made to any repo in 'self.repoids'. Used as initial
         date for date_spine query.
         """
+        if settings.CHART_DAILY_TOTALS_ENABLED:
+            first_date = self._daily_totals().aggregate(first_date=Min("date"))[
+                "first_date"
+            ]
+            if first_date:
+                return truncate_date(first_date, self.grouping_unit)
+            return None
+
         with connection.cursor() as cursor:
             cursor.execute(
                 f"""
@@ -290,6 +330,9 @@ class ChartQueryRunner:
         if not self.first_complete_commit_date:
             return []
 
+        if settings.CHART_DAILY_TOTALS_ENABLED:
+            return self._run_daily_totals_query()
+
         with connection.cursor() as cursor:
             cursor.execute(
                 f"""
@@ -406,3 +449,90 @@ class ChartQueryRunner:
             )
 
             return self._dictfetchall(cursor)
+
+    def _daily_totals(self):
+        """
+        Daily totals of the default branch of the repositories being queried.
+        """
+        return BranchDailyTotals.objects.filter(
+            repository_id__in=self.repository_ids,
+            branch=F("repository__branch"),
+        )
+
+    def _run_daily_totals_query(self) -> List[dict]:
+        """
+        Same results as the raw SQL query, built from the `branch_daily_totals`
+        rollup: a repository's totals for a datapoint are the ones of its latest
+        day with a complete commit up to the end of the datapoint's time window.
+        """
+        spine_start = max(
+            self.first_complete_commit_date,
+            truncate_date(self.start_date, self.grouping_unit),
+        )
+        if spine_start > self.end_date:
+            return []
+
+        totals_fields = ("hits", "misses", "partials", "lines")
+        daily_totals = self._daily_totals().filter(date__lte=self.end_date)
+
+        # totals carried over from before the first datapoint
+        initial_totals = (
+            daily_totals.filter(date__lt=spine_start)
+            .order_by("repository_id", "-date")
+            .distinct("repository_id")
+            .values_list("repository_id", *totals_fields)
+        )
+        # totals of the latest day of each repository in each time window
+        window_totals = {}
+        for repoid, day, *totals in (
+            daily_totals.filter(date__gte=spine_start)
+            .order_by("date")
+            .values_list("repository_id", "date", *totals_fields)
+        ):
+            window = truncate_date(day, self.grouping_unit)
+            window_totals.setdefault(window, {})[repoid] = totals
+
+        # gap-filling: running sums across repositories are only updated when
+        # a repository's totals change, rather than summed again for each window
+        repository_totals = {}
+        sums = [0] * len(totals_fields)
+
+        def update(repoid, totals):
+            previous = repository_totals.get(repoid)
+            for index, value in enumerate(totals):
+                sums[index] += value or 0
+                if previous is not None:
+                    sums[index] -= previous[index] or 0
+            repository_totals[repoid] = totals
+
+        for repoid, *totals in initial_totals:
+            update(repoid, totals)
+
+        results = []
+        window = spine_start
+        while window <= self.end_date:
+            for repoid, totals in window_totals.get(window, {}).items():
+                update(repoid, totals)
+            results.append(self._datapoint(window, *sums))
+            window += GROUPING_UNIT_DELTAS[self.grouping_unit]
+
+        if self.ordering == "DESC":
+            results.reverse()
+        return results
+
+    def _datapoint(
+        self, window: date, hits: int, misses: int, partials: int, lines: int
+    ) -> dict:
+        coverage = None
+        if lines:
+            coverage = (Decimal(hits + partials) / Decimal(lines) * 100).quantize(
+                Decimal("0.01"), rounding=ROUND_HALF_UP
+            )
+        return {
+            "date": datetime.combine(window, time.min, tzinfo=timezone.utc),
+            "total_hits": Decimal(hits),
+            "total_misses": Decimal(misses),
+            "total_partials": Decimal(partials),
+            "total_lines": Decimal(lines),
+            "coverage": coverage,
+        }
@@ -1,4 +1,4 @@
-from django.db.models import FloatField
+from django.db.models import F, FloatField
 from django.db.models.fields.json import KeyTextTransform
 from django.db.models.functions import Cast
 from rest_framework import filters
@@ -12,6 +12,14 @@ class RepositoryOrderingFilter(filters.OrderingFilter):
     """
 
     def _order_by_totals_field(self, ordering_field, queryset):
+        field_name = ordering_field.lstrip("-")
+        typed_field_name = f"latest_{field_name}"
+        if typed_field_name in queryset.query.annotations:
+            # typed totals annotated by `with_latest_branch_head_totals`
+            return queryset.annotate(**{field_name: F(typed_field_name)}).order_by(
+                ordering_field
+            )
+
         if ordering_field in ["coverage", "-coverage"]:
             annotation_args = dict(
                 coverage=Cast(
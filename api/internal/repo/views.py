@@ -1,6 +1,7 @@
 import logging
 import uuid
 
+from django.conf import settings
 from django.utils import timezone
 from django_filters import rest_framework as django_filters
 from rest_framework import filters, mixins, status, viewsets
@@ -69,14 +70,17 @@ class RepositoryViewSet(
         queryset = super().get_queryset()
 
         if self.action == "list":
-            before_date = self.request.query_params.get(
-                "before_date", timezone.now().isoformat()
-            )
+            before_date = self.request.query_params.get("before_date")
             branch = self.request.query_params.get("branch", None)
 
-            queryset = queryset.with_latest_commit_totals_before(
-                before_date=before_date, branch=branch, include_previous_totals=True
-            ).with_latest_coverage_change()
+            if before_date is None and settings.BRANCH_HEAD_TOTALS_ENABLED:
+                queryset = queryset.with_latest_branch_head_totals(branch=branch)
+            else:
+                queryset = queryset.with_latest_commit_totals_before(
+                    before_date=before_date or timezone.now().isoformat(),
+                    branch=branch,
+                    include_previous_totals=True,
+                ).with_latest_coverage_change()
 
             if self.request.query_params.get("exclude_uncovered", False):
                 queryset = queryset.exclude_uncovered()
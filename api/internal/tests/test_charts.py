@@ -7,7 +7,7 @@ from unittest.mock import patch
 import pytest
 from dateutil.relativedelta import relativedelta
 from ddf import G
-from django.test import TestCase
+from django.test import TestCase, override_settings
 from django.utils import timezone
 from factory.faker import faker
 from pytz import UTC
@@ -19,10 +19,11 @@ from api.internal.chart.helpers import (
     ChartQueryRunner,
     annotate_commits_with_totals,
     apply_grouping,
+    truncate_date,
     validate_params,
 )
 from codecov.tests.base_test import InternalAPITest
-from core.models import Commit
+from core.models import BranchDailyTotals, Commit
 from core.tests.factories import OwnerFactory, RepositoryFactory
 from utils.test_utils import Client
 
@@ -671,6 +672,130 @@ class TestChartQueryRunnerQuery(TestCase):
             ).run_query()
 
 
+@override_settings(CHART_DAILY_TOTALS_ENABLED=True)
+class TestChartQueryRunnerDailyTotalsQuery(TestCase):
+    """
+    Tests for the ChartQueryRunner when built from the daily totals rollup.
+    """
+
+    def setUp(self):
+        self.org = OwnerFactory()
+        self.repo1 = RepositoryFactory(author=self.org, active=True)
+        self.repo2 = RepositoryFactory(author=self.org, active=True)
+        self.user = OwnerFactory(permission=[self.repo1.repoid, self.repo2.repoid])
+        self.today = datetime.combine(timezone.now().date(), time(12), tzinfo=UTC)
+
+    def _commit(
+        self, repository, days_ago, totals, hours=0, branch=None, state="complete"
+    ):
+        return G(
+            model=Commit,
+            repository=repository,
+            totals=totals,
+            branch=branch or repository.branch,
+            state=state,
+            timestamp=self.today - timedelta(days=days_ago, hours=-hours),
+        )
+
+    def _run_query(self, **params):
+        return ChartQueryRunner(
+            user=self.user,
+            request_params={
+                "owner_username": self.org.username,
+                "service": self.org.service,
+                "grouping_unit": "day",
+                **params,
+            },
+        ).run_query()
+
+    def test_daily_totals_are_maintained_by_commits(self):
+        self._commit(self.repo1, 1, {"h": 1, "n": 2})
+        latest = self._commit(self.repo1, 1, {"h": 2, "n": 2}, hours=1)
+        self._commit(self.repo1, 1, {"h": 0, "n": 2}, state="pending")
+
+        daily_totals = BranchDailyTotals.objects.get(
+            repository=self.repo1, branch=self.repo1.branch
+        )
+        assert daily_totals.date == (self.today - timedelta(days=1)).date()
+        assert daily_totals.commitid == latest.commitid
+        assert daily_totals.hits == 2
+
+        latest.delete()
+        daily_totals.refresh_from_db()
+        assert daily_totals.hits == 1
+
+    def test_query_aggregates_multiple_repository_totals(self):
+        self._commit(self.repo1, 0, {"h": 100, "n": 120, "p": 10, "m": 10})
+        self._commit(self.repo2, 0, {"h": 14, "n": 25, "p": 6, "m": 5})
+
+        results = self._run_query(end_date=str(self.today))
+
+        assert results == [
+            {
+                "date": datetime.combine(self.today.date(), time.min, tzinfo=UTC),
+                "total_hits": 114,
+                "total_misses": 15,
+                "total_partials": 16,
+                "total_lines": 145,
+                "coverage": Decimal("89.66"),
+            }
+        ]
+
+    def test_query_fills_gaps_with_latest_totals(self):
+        self._commit(self.repo1, 7, {"h": 100, "n": 120, "p": 10, "m": 10})
+        self._commit(self.repo2, 1, {"h": 14, "n": 25, "p": 6, "m": 5})
+        # not on the default branch
+        self._commit(self.repo2, 0, {"h": 0, "n": 25}, branch="feature")
+
+        results = self._run_query(
+            start_date=str(self.today - timedelta(days=2)),
+            end_date=str(self.today),
+        )
+
+        assert [result["date"].date() for result in results] == [
+            (self.today - timedelta(days=days_ago)).date() for days_ago in (2, 1, 0)
+        ]
+        assert [result["total_hits"] for result in results] == [100, 114, 114]
+        assert [result["total_lines"] for result in results] == [120, 145, 145]
+        assert results[0]["coverage"] == Decimal("91.67")
+
+        results = self._run_query(
+            start_date=str(self.today - timedelta(days=2)),
+            end_date=str(self.today),
+            coverage_timestamp_ordering="decreasing",
+        )
+        assert results[0]["date"] > results[-1]["date"]
+
+    def test_query_supports_different_grouping_params(self):
+        end_date = date(2019, 1, 1)
+        self._commit(self.repo1, 0, {"h": 1, "n": 2})
+        Commit.objects.filter(repository=self.repo1).update(
+            timestamp=datetime(2018, 1, 1)
+        )
+
+        for grouping_unit, expected_num_datapoints in [
+            ("day", 365),
+            ("week", 52),
+            ("month", 12),
+            ("quarter", 4),
+            ("year", 1),
+        ]:
+            results = self._run_query(
+                start_date=str(end_date - timedelta(days=365)),
+                end_date=str(end_date),
+                grouping_unit=grouping_unit,
+            )
+            # the date range is inclusive
+            assert len(results) == expected_num_datapoints + 1
+            assert results[0]["date"].date() == truncate_date(
+                date(2018, 1, 1), grouping_unit
+            )
+            assert all(result["total_hits"] == 1 for result in results)
+
+    def test_query_doesnt_crash_if_no_commits(self):
+        assert self._run_query() == []
+
+
 class TestChartQueryRunnerHelperMethods(TestCase):
     """
     Tests for the non-querying-parts of the ChartQueryRunner, such
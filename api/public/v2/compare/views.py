@@ -61,11 +61,22 @@ class CompareViewSet(
 
     @extend_schema(
         summary="Comparison",
-        parameters=comparison_parameters,
+        parameters=comparison_parameters
+        + [
+            OpenApiParameter(
+                "include_lines",
+                OpenApiTypes.BOOL,
+                OpenApiParameter.QUERY,
+                description="whether to include the line comparisons of each file (default=true)",
+            ),
+        ],
     )
     def retrieve(self, request, *args, **kwargs):
         """
         Returns a comparison for either a pair of commits or a pull
+
+        The line comparisons of the files can be left out with `include_lines=false`
+        and fetched per file with the file comparison endpoint.
         """
         return super().retrieve(request, *args, **kwargs)
 
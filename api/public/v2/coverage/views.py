@@ -60,6 +60,13 @@ class CoverageViewSet(
             branch=self.request.query_params.get("branch"),
         )
 
+    def filter_queryset(self, queryset):
+        # the filters only validate the query params (the filtering itself happens
+        # in `get_queryset`) and the measurements are a list rather than a queryset
+        # while the repo's dataset is only partially backfilled
+        super().filter_queryset(self.queryset)
+        return queryset
+
     def get_measurement_interval(self) -> Interval:
         interval_name = self.request.query_params.get("interval")
         if interval_name not in intervals:
@@ -1,5 +1,7 @@
 from typing import List, Optional
 
+from django.conf import settings
+from django.http import StreamingHttpResponse
 from drf_spectacular.types import OpenApiTypes
 from drf_spectacular.utils import OpenApiParameter, extend_schema
 from rest_framework import mixins, viewsets
@@ -10,12 +12,21 @@ from rest_framework.response import Response
 from shared.reports.resources import Report
 from shared.utils.match import match
 
+import services.report as report_service
 from api.public.v2.report.serializers import (
     CoverageReportSerializer,
     FileReportSerializer,
 )
 from api.public.v2.schema import repo_parameters
+from api.shared.commit.serializers import (
+    ReportTotalsSerializer,
+    project_fields,
+    report_file_data,
+    report_totals_data,
+    stream_report,
+)
 from api.shared.mixins import RepoPropertyMixin
+from api.shared.pagination import ReportFilesCursorPagination
 from api.shared.permissions import RepositoryArtifactPermissions, SuperTokenPermissions
 from api.shared.report.serializers import TreeSerializer
 from codecov_auth.authentication import (
@@ -24,7 +35,11 @@ from codecov_auth.authentication import (
 )
 from core.models import Commit
 from services.components import commit_components, component_filtered_report
-from services.path import ReportPaths, dashboard_commit_file_url
+from services.path import ReportPaths, dashboard_commit_file_url, report_path_index
+
+# characters of a path pattern that don't match themselves in `Report.filter`,
+# which matches the patterns as regexes
+PATH_REGEX_METACHARACTERS = frozenset("[](){}?*+^$|\\")
 
 
 class ReportMixin:
@@ -76,6 +91,30 @@ class ReportMixin:
             OpenApiParameter.QUERY,
             description="filter report to only include info pertaining to given component id",
         ),
+        OpenApiParameter(
+            "cursor",
+            OpenApiTypes.STR,
+            OpenApiParameter.QUERY,
+            description="pagination cursor of the report files (the `next` url holds the cursor of the next page)",
+        ),
+        OpenApiParameter(
+            "page_size",
+            OpenApiTypes.INT,
+            OpenApiParameter.QUERY,
+            description="number of report files per page",
+        ),
+        OpenApiParameter(
+            "ordering",
+            OpenApiTypes.STR,
+            OpenApiParameter.QUERY,
+            description="order of the paginated report files: `name` (default) or a totals field like `coverage`, prefixed with `-` for descending order",
+        ),
+        OpenApiParameter(
+            "fields",
+            OpenApiTypes.STR,
+            OpenApiParameter.QUERY,
+            description="comma-separated fields to include for each report file, e.g. `name,totals.coverage`",
+        ),
     ],
     tags=["Coverage"],
 )
@@ -116,6 +155,18 @@ class BaseReportViewSet(
                 # empty report since the flag is not part of the component
                 return Report()
 
+        # the files starting with `path` (found with a binary search) always match
+        # its pattern, unless it has regex metacharacters, so without a flag they
+        # are enough to tell the path exists.  This only saves the NotFound check
+        # below from matching every file: the filtered report still matches all
+        # of them (as regexes, in shared) when its files are listed
+        has_path_files = (
+            bool(path)
+            and not flag
+            and PATH_REGEX_METACHARACTERS.isdisjoint(path)
+            and bool(report_path_index(report).starting_with(path))
+        )
+
         if path and flag:
             report = report.filter(flags=[flag], paths=[f"{path}*"])
         elif path:
@@ -123,9 +174,9 @@ class BaseReportViewSet(
         elif flag:
             report = report.filter(flags=[flag])
         elif component_id:
-            report = report.filter(flags=component_flags, paths=component.paths)
+            report = component_filtered_report(report, component)
 
-        if path and len(report.files) == 0:
+        if path and not has_path_files and len(report.files) == 0:
             raise NotFound(f"No files or directories found matching path: {path}")
 
         return report
@@ -151,11 +202,87 @@ class BaseReportViewSet(
 
         return report
 
+    pagination_params = ("cursor", "page_size", "ordering")
+
     def retrieve(self, request, *args, **kwargs):
         report = self.get_object()
+        if "fields" in request.query_params or any(
+            param in request.query_params for param in self.pagination_params
+        ):
+            return self.files_response(report)
+        if settings.REPORT_STREAMING_ENABLED:
+            return self.streaming_response(report)
         serializer = self.get_serializer(report)
         return Response(serializer.data)
 
+    def get_fields(self, include_line_coverage: bool) -> Optional[List[str]]:
+        fields = self.request.query_params.get("fields")
+        if not fields:
+            return None
+
+        allowed_fields = [
+            "name",
+            "totals",
+            *(f"totals.{field}" for field in ReportTotalsSerializer().fields),
+        ]
+        if include_line_coverage:
+            allowed_fields.append("line_coverage")
+
+        fields = fields.split(",")
+        invalid_fields = [field for field in fields if field not in allowed_fields]
+        if invalid_fields:
+            raise ValidationError(f"Invalid fields: {', '.join(invalid_fields)}")
+        return fields
+
+    def files_response(self, report: Report) -> Response:
+        """
+        Returns a page of the report files (when paginated with `cursor`,
+        `page_size` or `ordering`) with only the requested `fields` of each file,
+        only serializing those.
+        """
+        include_line_coverage = self.get_serializer_context()["include_line_coverage"]
+        fields = self.get_fields(include_line_coverage)
+        if fields is not None:
+            include_line_coverage = "line_coverage" in fields
+
+        paginator = None
+        filenames = report.files
+        if any(param in self.request.query_params for param in self.pagination_params):
+            paginator = ReportFilesCursorPagination()
+            filenames = paginator.paginate_report(report, self.request)
+
+        files = []
+        for filename in filenames:
+            data = report_file_data(report.get(filename), include_line_coverage)
+            files.append(project_fields(data, fields) if fields else data)
+
+        data = {
+            "totals": report_totals_data(report.totals),
+            "files": files,
+            "commit_file_url": report.commit_file_url,
+        }
+        if paginator:
+            data["next"] = paginator.get_next_link()
+        return Response(data)
+
+    def streaming_response(self, report: Report) -> StreamingHttpResponse:
+        """
+        Streams the serialized report one file at a time (as newline-delimited
+        JSON when requested with `ndjson=true`).
+        """
+        ndjson = self.request.query_params.get("ndjson") == "true"
+        return StreamingHttpResponse(
+            stream_report(
+                report,
+                include_line_coverage=self.get_serializer_context()[
+                    "include_line_coverage"
+                ],
+                extra={"commit_file_url": report.commit_file_url},
+                ndjson=ndjson,
+            ),
+            content_type="application/x-ndjson" if ndjson else "application/json",
+        )
+
 
 class TotalsViewSet(BaseReportViewSet):
     def get_serializer_context(self, *args, **kwargs):
@@ -177,6 +304,9 @@ class TotalsViewSet(BaseReportViewSet):
         * `path` - only show totals for pathnames that start with this value
         * `flag` - only show totals that applies to the specified flag name
         * `component_id` - only show totals that applies to the specified component
+
+        The files can be paginated (along with a `next` url) by specifying a `cursor`,
+        `page_size` or `ordering` and their `fields` selected with e.g. `fields=name,totals.coverage`.
         """
         return super().retrieve(request, *args, **kwargs)
 
@@ -198,7 +328,17 @@ class ReportViewSet(BaseReportViewSet):
         context.update({"include_line_coverage": True})
         return context
 
-    @extend_schema(summary="Commit coverage report")
+    @extend_schema(
+        summary="Commit coverage report",
+        parameters=[
+            OpenApiParameter(
+                "ndjson",
+                OpenApiTypes.BOOL,
+                OpenApiParameter.QUERY,
+                description="return the report as newline-delimited JSON: the totals followed by one line per file (requires report streaming to be enabled)",
+            ),
+        ],
+    )
     def retrieve(self, request, *args, **kwargs):
         """
         Similar to the coverage totals endpoint but also returns line-by-line
@@ -212,6 +352,9 @@ class ReportViewSet(BaseReportViewSet):
         * `path` - only show report info for pathnames that start with this value
         * `flag` - only show report info that applies to the specified flag name
         * `component_id` - only show report info that applies to the specified component
+
+        The files can be paginated (along with a `next` url) by specifying a `cursor`,
+        `page_size` or `ordering` and their `fields` selected with e.g. `fields=name,line_coverage`.
         """
         return super().retrieve(request, *args, **kwargs)
 
@@ -309,34 +452,49 @@ class FileReportViewSet(
             raise ValidationError("walk_back must be <= 20")
 
         self.commit = self.get_commit()
-        report = self.commit.full_report
-
         oldest_sha = self.request.query_params.get("oldest_sha")
 
+        if walk_back and settings.FILE_REPORT_ANCESTOR_SEARCH_ENABLED:
+            self.commit, report_file = report_service.find_report_file_in_ancestors(
+                self.commit,
+                self.path,
+                walk_back,
+                is_valid=self._is_valid_commit,
+                oldest_sha=oldest_sha,
+            )
+            if report_file is None:
+                raise NotFound(f"coverage info not found for path '{self.path}'")
+            return report_file
+
+        # only the chunk section for the requested file is loaded
+        report_file = report_service.build_report_file_from_commit(
+            self.commit, self.path
+        )
+
         for _ in range(walk_back):
-            if self._is_valid_commit(self.commit) and self._is_valid_report(
-                report, self.path
-            ):
+            if self._is_valid_commit(self.commit) and report_file is not None:
                 break
             # walk commit ancestors until we find coverage info for the given path
             if not self.commit.parent_commit_id:
-                report = None
+                report_file = None
                 break
             self.commit = self.repo.commits.filter(
                 commitid=self.commit.parent_commit_id
             ).first()
             if not self.commit:
-                report = None
+                report_file = None
                 break
-            report = self.commit.full_report
+            report_file = report_service.build_report_file_from_commit(
+                self.commit, self.path
+            )
 
             if oldest_sha and oldest_sha == self.commit.commitid:
                 break
 
-        if not self._is_valid_report(report, self.path):
+        if report_file is None:
             raise NotFound(f"coverage info not found for path '{self.path}'")
 
-        return report.get(self.path)
+        return report_file
 
     def get_serializer_context(self, *args, **kwargs):
         context = super().get_serializer_context(*args, **kwargs)
@@ -363,10 +521,3 @@ class FileReportViewSet(
 
     def _is_valid_commit(self, commit: Commit) -> bool:
         return commit.state == Commit.CommitStates.COMPLETE
-
-    def _is_valid_report(self, report: Report, path: str) -> bool:
-        if report is None:
-            return False
-
-        report_file = report.get(path)
-        return report_file is not None
@@ -1,5 +1,7 @@
+import json
 from unittest.mock import PropertyMock, patch
 
+from django.test import override_settings
 from rest_framework import status
 from rest_framework.reverse import reverse
 from rest_framework.test import APITestCase
@@ -374,6 +376,54 @@ class TestCompareViewSetRetrieve(APITestCase):
         assert response.status_code == status.HTTP_200_OK
         assert response.data["files"] == self.expected_files
 
+    def test_include_lines_query_param(
+        self, adapter_mock, base_report_mock, head_report_mock
+    ):
+        adapter_mock.return_value = self.mocked_compare_adapter
+        base_report_mock.return_value = self.base_report
+        head_report_mock.return_value = self.head_report
+
+        response = self._get_comparison(
+            query_params={
+                "base": self.base.commitid,
+                "head": self.head.commitid,
+                "include_lines": "false",
+            }
+        )
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data["files"] == [
+            {key: value for key, value in file.items() if key != "lines"}
+            for file in self.expected_files
+        ]
+
+    def test_streaming(self, adapter_mock, base_report_mock, head_report_mock):
+        adapter_mock.return_value = self.mocked_compare_adapter
+        base_report_mock.return_value = self.base_report
+        head_report_mock.return_value = self.head_report
+        expected = self._get_comparison().json()
+
+        with override_settings(COMPARISON_STREAMING_ENABLED=True):
+            response = self._get_comparison()
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.streaming
+        assert json.loads(b"".join(response.streaming_content)) == expected
+
+    def test_streaming_no_raw_reports_returns_404(
+        self, adapter_mock, base_report_mock, head_report_mock
+    ):
+        base_report_mock.return_value = None
+        head_report_mock.side_effect = comparison.MissingComparisonReport(
+            "Missing head report"
+        )
+        adapter_mock.return_value = self.mocked_compare_adapter
+
+        with override_settings(COMPARISON_STREAMING_ENABLED=True):
+            response = self._get_comparison()
+
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
     def test_pullid_with_nonexistent_base_returns_404(
         self, adapter_mock, base_report_mock, head_report_mock
     ):
@@ -16,7 +16,7 @@ from services.components import Component
 from utils.test_utils import APIClient
 
 
-def sample_report():
+def sample_report_file():
     report = Report()
     first_file = ReportFile("foo/file1.py")
     first_file.append(
@@ -37,7 +37,7 @@ def sample_report():
     report.append(first_file)
     report.append(second_file)
     report.add_session(Session(flags=["flag1", "flag2"]))
-    return report
+    return report.get("foo/file1.py")
 
 
 @patch("api.shared.repo.repository_accessors.RepoAccessors.get_repo_permissions")
@@ -90,10 +90,10 @@ class FileReportViewSetTestCase(TestCase):
         url = f"{url}?{qs}"
         return self.client.get(url)
 
-    @patch("services.report.build_report_from_commit")
-    def test_file_report(self, build_report_from_commit, get_repo_permissions):
+    @patch("services.report.build_report_file_from_commit")
+    def test_file_report(self, build_report_file_from_commit, get_repo_permissions):
         get_repo_permissions.return_value = (True, True)
-        build_report_from_commit.side_effect = [sample_report()]
+        build_report_file_from_commit.side_effect = [sample_report_file()]
 
         res = self._request_file_report(path="foo/file1.py")
         assert res.status_code == 200
@@ -129,40 +129,44 @@ class FileReportViewSetTestCase(TestCase):
             "commit_file_url": f"{settings.CODECOV_DASHBOARD_URL}/{self.service}/{self.username}/{self.repo_name}/commit/{self.commit3.commitid}/blob/foo/file1.py",
         }
 
-        build_report_from_commit.assert_called_once_with(self.commit3)
+        build_report_file_from_commit.assert_called_once_with(
+            self.commit3, "foo/file1.py"
+        )
 
-    @patch("services.report.build_report_from_commit")
+    @patch("services.report.build_report_file_from_commit")
     def test_file_report_no_walk_back(
-        self, build_report_from_commit, get_repo_permissions
+        self, build_report_file_from_commit, get_repo_permissions
     ):
         get_repo_permissions.return_value = (True, True)
-        build_report_from_commit.side_effect = [None, sample_report()]
+        build_report_file_from_commit.side_effect = [None, sample_report_file()]
 
         res = self._request_file_report(path="foo/file1.py")
         assert res.status_code == 404
 
-        build_report_from_commit.assert_called_once_with(self.commit3)
+        build_report_file_from_commit.assert_called_once_with(
+            self.commit3, "foo/file1.py"
+        )
 
-    @patch("services.report.build_report_from_commit")
+    @patch("services.report.build_report_file_from_commit")
     def test_file_report_not_enough_walk_back(
-        self, build_report_from_commit, get_repo_permissions
+        self, build_report_file_from_commit, get_repo_permissions
     ):
         get_repo_permissions.return_value = (True, True)
-        build_report_from_commit.side_effect = [None, None, sample_report()]
+        build_report_file_from_commit.side_effect = [None, None, sample_report_file()]
 
         res = self._request_file_report(path="foo/file1.py", walk_back=1)
         assert res.status_code == 404
 
-        build_report_from_commit.assert_has_calls(
-            [call(self.commit3), call(self.commit2)]
+        build_report_file_from_commit.assert_has_calls(
+            [call(self.commit3, "foo/file1.py"), call(self.commit2, "foo/file1.py")]
         )
 
-    @patch("services.report.build_report_from_commit")
+    @patch("services.report.build_report_file_from_commit")
     def test_file_report_with_walk_back(
-        self, build_report_from_commit, get_repo_permissions
+        self, build_report_file_from_commit, get_repo_permissions
     ):
         get_repo_permissions.return_value = (True, True)
-        build_report_from_commit.side_effect = [None, None, sample_report()]
+        build_report_file_from_commit.side_effect = [None, None, sample_report_file()]
 
         res = self._request_file_report(path="foo/file1.py", walk_back=2)
         assert res.status_code == 200
@@ -198,16 +202,20 @@ class FileReportViewSetTestCase(TestCase):
             "commit_file_url": f"{settings.CODECOV_DASHBOARD_URL}/{self.service}/{self.username}/{self.repo_name}/commit/{self.commit1.commitid}/blob/foo/file1.py",
         }
 
-        build_report_from_commit.assert_has_calls(
-            [call(self.commit3), call(self.commit2), call(self.commit1)]
+        build_report_file_from_commit.assert_has_calls(
+            [
+                call(self.commit3, "foo/file1.py"),
+                call(self.commit2, "foo/file1.py"),
+                call(self.commit1, "foo/file1.py"),
+            ]
         )
 
-    @patch("services.report.build_report_from_commit")
+    @patch("services.report.build_report_file_from_commit")
     def test_file_report_with_walk_back_oldest_sha(
-        self, build_report_from_commit, get_repo_permissions
+        self, build_report_file_from_commit, get_repo_permissions
     ):
         get_repo_permissions.return_value = (True, True)
-        build_report_from_commit.side_effect = [None, None, sample_report()]
+        build_report_file_from_commit.side_effect = [None, None, sample_report_file()]
 
         res = self._request_file_report(
             path="foo/file1.py", walk_back=2, oldest_sha=self.commit2.commitid
@@ -215,40 +223,76 @@ class FileReportViewSetTestCase(TestCase):
         assert res.status_code == 404
 
         # does not walk back to commit1
-        build_report_from_commit.assert_has_calls(
-            [call(self.commit3), call(self.commit2)]
+        build_report_file_from_commit.assert_has_calls(
+            [call(self.commit3, "foo/file1.py"), call(self.commit2, "foo/file1.py")]
         )
 
-    @patch("services.report.build_report_from_commit")
+    @patch("services.report.build_report_file_from_commit")
     def test_file_report_large_walk_back(
-        self, build_report_from_commit, get_repo_permissions
+        self, build_report_file_from_commit, get_repo_permissions
     ):
         get_repo_permissions.return_value = (True, True)
-        build_report_from_commit.side_effect = [sample_report()]
+        build_report_file_from_commit.side_effect = [sample_report_file()]
 
         res = self._request_file_report(path="foo/file1.py", walk_back=21)
         assert res.status_code == 400
 
-    @patch("services.report.build_report_from_commit")
+    @patch("services.report.build_report_file_from_commit")
     def test_file_report_walk_back_no_parent(
-        self, build_report_from_commit, get_repo_permissions
+        self, build_report_file_from_commit, get_repo_permissions
     ):
         get_repo_permissions.return_value = (True, True)
-        build_report_from_commit.side_effect = [None, None, None]
+        build_report_file_from_commit.side_effect = [None, None, None]
 
         res = self._request_file_report(path="foo/file1.py", walk_back=20)
         assert res.status_code == 404
 
-        build_report_from_commit.assert_has_calls(
-            [call(self.commit3), call(self.commit2), call(self.commit1)]
+        build_report_file_from_commit.assert_has_calls(
+            [
+                call(self.commit3, "foo/file1.py"),
+                call(self.commit2, "foo/file1.py"),
+                call(self.commit1, "foo/file1.py"),
+            ]
+        )
+
+    @patch("services.report.find_report_file_in_ancestors")
+    @override_settings(FILE_REPORT_ANCESTOR_SEARCH_ENABLED=True)
+    def test_file_report_walk_back_ancestor_search(
+        self, find_report_file_in_ancestors, get_repo_permissions
+    ):
+        get_repo_permissions.return_value = (True, True)
+        find_report_file_in_ancestors.return_value = (
+            self.commit1,
+            sample_report_file(),
+        )
+
+        res = self._request_file_report(
+            path="foo/file1.py", walk_back=2, oldest_sha=self.commit1.commitid
+        )
+        assert res.status_code == 200
+        assert res.json()["commit_sha"] == self.commit1.commitid
+
+        find_report_file_in_ancestors.assert_called_once()
+        assert find_report_file_in_ancestors.call_args.args == (
+            self.commit3,
+            "foo/file1.py",
+            2,
+        )
+        assert (
+            find_report_file_in_ancestors.call_args.kwargs["oldest_sha"]
+            == self.commit1.commitid
         )
 
-    @patch("services.report.build_report_from_commit")
+        find_report_file_in_ancestors.return_value = (self.commit1, None)
+        res = self._request_file_report(path="foo/file1.py", walk_back=2)
+        assert res.status_code == 404
+
+    @patch("services.report.build_report_file_from_commit")
     def test_file_report_walk_back_commit_not_found(
-        self, build_report_from_commit, get_repo_permissions
+        self, build_report_file_from_commit, get_repo_permissions
     ):
         get_repo_permissions.return_value = (True, True)
-        build_report_from_commit.side_effect = [None, None, None]
+        build_report_file_from_commit.side_effect = [None, None, None]
 
         self.commit3.parent_commit_id = "wrong"
         self.commit3.save()
@@ -256,21 +300,23 @@ class FileReportViewSetTestCase(TestCase):
         res = self._request_file_report(path="foo/file1.py", walk_back=20)
         assert res.status_code == 404
 
-        build_report_from_commit.assert_has_calls([call(self.commit3)])
+        build_report_file_from_commit.assert_has_calls(
+            [call(self.commit3, "foo/file1.py")]
+        )
 
-    @patch("services.report.build_report_from_commit")
+    @patch("services.report.build_report_file_from_commit")
     def test_file_report_walk_back_commit_not_complete(
-        self, build_report_from_commit, get_repo_permissions
+        self, build_report_file_from_commit, get_repo_permissions
     ):
         get_repo_permissions.return_value = (True, True)
 
         self.commit1.state = "pending"
         self.commit1.save()
 
-        build_report_from_commit.side_effect = [
-            sample_report(),  # skips since the state is pending
+        build_report_file_from_commit.side_effect = [
+            sample_report_file(),  # skips since the state is pending
             None,  # skips since there's no report
-            sample_report(),  # found
+            sample_report_file(),  # found
         ]
 
         res = self._request_file_report(path="foo/file1.py", walk_back=20)
@@ -307,49 +353,59 @@ class FileReportViewSetTestCase(TestCase):
             "commit_file_url": f"{settings.CODECOV_DASHBOARD_URL}/{self.service}/{self.username}/{self.repo_name}/commit/{self.commit3.commitid}/blob/foo/file1.py",
         }
 
-        build_report_from_commit.assert_has_calls([call(self.commit3)])
+        build_report_file_from_commit.assert_has_calls(
+            [call(self.commit3, "foo/file1.py")]
+        )
 
-    @patch("services.report.build_report_from_commit")
+    @patch("services.report.build_report_file_from_commit")
     def test_file_report_walk_back_found(
-        self, build_report_from_commit, get_repo_permissions
+        self, build_report_file_from_commit, get_repo_permissions
     ):
         get_repo_permissions.return_value = (True, True)
-        build_report_from_commit.side_effect = [None, sample_report(), sample_report()]
+        build_report_file_from_commit.side_effect = [
+            None,
+            sample_report_file(),
+            sample_report_file(),
+        ]
 
         res = self._request_file_report(path="foo/file1.py", walk_back=20)
         assert res.status_code == 200
 
-        build_report_from_commit.assert_has_calls(
-            [call(self.commit3), call(self.commit2)]
+        build_report_file_from_commit.assert_has_calls(
+            [call(self.commit3, "foo/file1.py"), call(self.commit2, "foo/file1.py")]
         )
 
-    @patch("services.report.build_report_from_commit")
+    @patch("services.report.build_report_file_from_commit")
     def test_file_report_missing_file(
-        self, build_report_from_commit, get_repo_permissions
+        self, build_report_file_from_commit, get_repo_permissions
     ):
         get_repo_permissions.return_value = (True, True)
-        build_report_from_commit.side_effect = [
-            sample_report(),
-            sample_report(),
-            sample_report(),
+        build_report_file_from_commit.side_effect = [
+            None,
+            None,
+            None,
         ]
 
         res = self._request_file_report(path="bar/file1.py", walk_back=20)
         assert res.status_code == 404
 
-        build_report_from_commit.assert_has_calls(
-            [call(self.commit3), call(self.commit2), call(self.commit1)]
+        build_report_file_from_commit.assert_has_calls(
+            [
+                call(self.commit3, "bar/file1.py"),
+                call(self.commit2, "bar/file1.py"),
+                call(self.commit1, "bar/file1.py"),
+            ]
         )
 
-    @patch("services.report.build_report_from_commit")
+    @patch("services.report.build_report_file_from_commit")
     def test_file_report_missing_parent_commit(
-        self, build_report_from_commit, get_repo_permissions
+        self, build_report_file_from_commit, get_repo_permissions
     ):
         get_repo_permissions.return_value = (True, True)
-        build_report_from_commit.side_effect = [
-            sample_report(),
-            sample_report(),
-            sample_report(),
+        build_report_file_from_commit.side_effect = [
+            None,
+            None,
+            None,
         ]
 
         self.commit3.parent_commit_id = None
@@ -358,4 +414,6 @@ class FileReportViewSetTestCase(TestCase):
         res = self._request_file_report(path="bar/file1.py", walk_back=20)
         assert res.status_code == 404
 
-        build_report_from_commit.assert_has_calls([call(self.commit3)])
+        build_report_file_from_commit.assert_has_calls(
+            [call(self.commit3, "bar/file1.py")]
+        )
@@ -1,3 +1,4 @@
+import json
 import os
 from unittest.mock import call, patch
 from urllib.parse import urlencode
@@ -485,6 +486,128 @@ class ReportViewSetTestCase(TestCase):
 
         build_report_from_commit.assert_called_once_with(self.commit1)
 
+    @patch("services.report.build_report_from_commit")
+    def test_report_path_with_regex_metacharacters(
+        self, build_report_from_commit, get_repo_permissions
+    ):
+        get_repo_permissions.return_value = (True, True)
+        report = Report()
+        report_file = ReportFile("a[1]/file.py")
+        report_file.append(1, ReportLine.create(coverage=1, sessions=[[0, 1]]))
+        report.append(report_file)
+        build_report_from_commit.return_value = report
+
+        # the path is matched as a regex, which the file doesn't match
+        res = self._request_report(path="a[1]/")
+        assert res.status_code == 404
+
+    @patch("services.report.build_report_from_commit")
+    def test_report_streaming(self, build_report_from_commit, get_repo_permissions):
+        get_repo_permissions.return_value = (True, True)
+        build_report_from_commit.return_value = sample_report()
+        expected = self._request_report(path="foo").json()
+
+        with override_settings(REPORT_STREAMING_ENABLED=True):
+            res = self._request_report(path="foo")
+        assert res.status_code == 200
+        assert res.streaming
+        assert res["Content-Type"] == "application/json"
+        assert json.loads(b"".join(res.streaming_content)) == expected
+
+    @patch("services.report.build_report_from_commit")
+    def test_report_streaming_ndjson(
+        self, build_report_from_commit, get_repo_permissions
+    ):
+        get_repo_permissions.return_value = (True, True)
+        build_report_from_commit.return_value = sample_report()
+        expected = self._request_report().json()
+
+        with override_settings(REPORT_STREAMING_ENABLED=True):
+            res = self._request_report(ndjson="true")
+        assert res.status_code == 200
+        assert res["Content-Type"] == "application/x-ndjson"
+        lines = [
+            json.loads(line)
+            for line in b"".join(res.streaming_content).decode().splitlines()
+        ]
+        assert lines == [
+            {
+                "totals": expected["totals"],
+                "commit_file_url": expected["commit_file_url"],
+            },
+            *expected["files"],
+        ]
+
+    @patch("services.report.build_report_from_commit")
+    def test_report_paginated(self, build_report_from_commit, get_repo_permissions):
+        get_repo_permissions.return_value = (True, True)
+        build_report_from_commit.return_value = sample_report()
+        expected = self._request_report().json()
+
+        res = self._request_report(page_size=1)
+        assert res.status_code == 200
+        data = res.json()
+        assert data["totals"] == expected["totals"]
+        assert data["commit_file_url"] == expected["commit_file_url"]
+        assert data["files"] == [expected["files"][1]]  # bar/file2.py
+        assert data["next"] is not None
+
+        res = self.client.get(data["next"])
+        assert res.status_code == 200
+        data = res.json()
+        assert data["files"] == [expected["files"][0]]  # foo/file1.py
+        assert data["next"] is None
+
+    @patch("services.report.build_report_from_commit")
+    def test_report_paginated_ordering(
+        self, build_report_from_commit, get_repo_permissions
+    ):
+        get_repo_permissions.return_value = (True, True)
+        build_report_from_commit.return_value = sample_report()
+
+        res = self._request_report(ordering="-coverage", page_size=1)
+        assert res.status_code == 200
+        data = res.json()
+        assert [file["name"] for file in data["files"]] == ["foo/file1.py"]
+
+        res = self.client.get(data["next"])
+        data = res.json()
+        assert [file["name"] for file in data["files"]] == ["bar/file2.py"]
+        assert data["next"] is None
+
+        res = self._request_report(ordering="coverage")
+        assert [file["name"] for file in res.json()["files"]] == [
+            "bar/file2.py",
+            "foo/file1.py",
+        ]
+
+        res = self._request_report(ordering="something")
+        assert res.status_code == 400
+
+        res = self._request_report(cursor="not a cursor")
+        assert res.status_code == 404
+
+    @patch("services.report.build_report_from_commit")
+    def test_report_fields(self, build_report_from_commit, get_repo_permissions):
+        get_repo_permissions.return_value = (True, True)
+        build_report_from_commit.return_value = sample_report()
+
+        res = self._request_report(fields="name,totals.coverage")
+        assert res.status_code == 200
+        assert res.json()["files"] == [
+            {"name": "foo/file1.py", "totals": {"coverage": 62.5}},
+            {"name": "bar/file2.py", "totals": {"coverage": 50.0}},
+        ]
+
+        res = self._request_report(fields="name,line_coverage", page_size=1)
+        assert res.status_code == 200
+        assert res.json()["files"] == [
+            {"name": "bar/file2.py", "line_coverage": [[12, 0], [51, 2]]}
+        ]
+
+        res = self._request_report(fields="name,something")
+        assert res.status_code == 400
+
     @patch("services.report.build_report_from_commit")
     def test_report_flag(self, build_report_from_commit, get_repo_permissions):
         get_repo_permissions.return_value = (True, True)
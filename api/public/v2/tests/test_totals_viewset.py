@@ -440,6 +440,23 @@ class TotalsViewSetTestCase(TestCase):
 
         build_report_from_commit.assert_called_once_with(self.commit1)
 
+    @patch("services.report.build_report_from_commit")
+    def test_report_paginated_fields(
+        self, build_report_from_commit, get_repo_permissions
+    ):
+        get_repo_permissions.return_value = (True, True)
+        build_report_from_commit.return_value = sample_report()
+
+        res = self._request_report(fields="name,totals.lines", page_size=1)
+        assert res.status_code == 200
+        data = res.json()
+        assert data["files"] == [{"name": "bar/file2.py", "totals": {"lines": 2}}]
+        assert data["next"] is not None
+
+        # no line coverage in the totals
+        res = self._request_report(fields="name,line_coverage")
+        assert res.status_code == 400
+
     @patch("services.report.build_report_from_commit")
     def test_report_flag(self, build_report_from_commit, get_repo_permissions):
         get_repo_permissions.return_value = (True, True)
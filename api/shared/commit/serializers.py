@@ -1,4 +1,7 @@
+from typing import Iterator, List, Optional
+
 from rest_framework import serializers
+from rest_framework.renderers import JSONRenderer
 from shared.reports.resources import Report, ReportFile
 from shared.utils.merge import line_type
 
@@ -93,3 +96,114 @@ class ReportSerializer(serializers.Serializer):
             ReportFileSerializer(report.get(file), context=self.context).data
             for file in report.files
         ]
+
+
+def report_totals_data(totals) -> dict:
+    """
+    Same as `ReportTotalsSerializer(totals).data` without the overhead of the
+    serializer fields (which adds up when encoding the totals of every file of
+    large reports).
+    """
+
+    def integer(value):
+        return None if value is None else int(value)
+
+    def decimal(value):
+        return None if value is None else float(value)
+
+    return {
+        "files": integer(totals.files),
+        "lines": integer(totals.lines),
+        "hits": integer(totals.hits),
+        "misses": integer(totals.misses),
+        "partials": integer(totals.partials),
+        "coverage": round(float(totals.coverage), 2)
+        if totals.coverage is not None
+        else 0,
+        "branches": integer(totals.branches),
+        "methods": integer(totals.methods),
+        "messages": integer(totals.messages),
+        "sessions": integer(totals.sessions),
+        "complexity": decimal(totals.complexity),
+        "complexity_total": decimal(totals.complexity_total),
+        "complexity_ratio": round(
+            (totals.complexity / totals.complexity_total) * 100, 2
+        )
+        if totals.complexity and totals.complexity_total
+        else 0,
+        "diff": totals.diff,
+    }
+
+
+def report_file_data(report_file: ReportFile, include_line_coverage: bool) -> dict:
+    """
+    Same as `ReportFileSerializer(report_file).data` (see `report_totals_data`).
+    """
+    data = {
+        "name": report_file.name,
+        "totals": report_totals_data(report_file.totals),
+    }
+    if include_line_coverage:
+        data["line_coverage"] = [
+            (ln, line_type(report_line.coverage))
+            for ln, report_line in report_file.lines
+        ]
+    return data
+
+
+def project_fields(data: dict, fields: List[str]) -> dict:
+    """
+    Keeps the given `fields` of `data`, a `<field>.<subfield>` field keeping
+    a single subfield of a nested dict.
+    """
+    projected = {}
+    for field in fields:
+        key, _, subfield = field.partition(".")
+        if key not in data:
+            continue
+        if not subfield:
+            projected[key] = data[key]
+        elif isinstance(data[key], dict) and subfield in data[key]:
+            projected.setdefault(key, {})[subfield] = data[key][subfield]
+    return projected
+
+
+def stream_report(
+    report: Report,
+    include_line_coverage: bool,
+    extra: Optional[dict] = None,
+    ndjson: bool = False,
+) -> Iterator[bytes]:
+    """
+    Encodes the same document as `ReportSerializer` (followed by the `extra`
+    fields) one file at a time so that only a single file of the report is held
+    in memory.
+
+    With `ndjson`, it encodes one JSON document per line instead: the report
+    totals (and `extra` fields) followed by one line per file.
+    """
+    renderer = JSONRenderer()
+    totals = {"totals": report_totals_data(report.totals)}
+
+    if ndjson:
+        yield renderer.render({**totals, **(extra or {})}) + b"\n"
+        for filename in report.files:
+            yield renderer.render(
+                report_file_data(report.get(filename), include_line_coverage)
+            ) + b"\n"
+        return
+
+    # the encoded totals without their closing brace
+    yield renderer.render(totals)[:-1] + b',"files":['
+    for index, filename in enumerate(report.files):
+        if index:
+            yield b","
+        yield renderer.render(
+            report_file_data(report.get(filename), include_line_coverage)
+        )
+    yield b"]"
+    if extra:
+        # the encoded extra fields without their opening brace
+        yield b"," + renderer.render(extra)[1:]
+    else:
+        yield b"}"
@@ -1,3 +1,5 @@
+from django.conf import settings
+from django.http import StreamingHttpResponse
 from rest_framework import mixins, viewsets
 from rest_framework.decorators import action
 from rest_framework.exceptions import NotFound, PermissionDenied
@@ -13,7 +15,11 @@ from services.comparison import (
 )
 from services.decorators import torngit_safe
 
-from .serializers import FileComparisonSerializer, FlagComparisonSerializer
+from .serializers import (
+    FileComparisonSerializer,
+    FlagComparisonSerializer,
+    stream_comparison,
+)
 
 
 class CompareViewSetMixin(CompareSlugMixin, viewsets.GenericViewSet):
@@ -42,6 +48,14 @@ class CompareViewSetMixin(CompareSlugMixin, viewsets.GenericViewSet):
 
         return comparison
 
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        if self.request.query_params.get("include_lines") == "false":
+            # only the file list and totals, the lines of each file can be
+            # fetched with the `file` action
+            context["include_lines"] = False
+        return context
+
     @torngit_safe
     def retrieve(self, request, *args, **kwargs):
         comparison = self.get_object()
@@ -65,9 +79,20 @@ class CompareViewSetMixin(CompareSlugMixin, viewsets.GenericViewSet):
                     },
                     status=400,
                 )
-        serializer = self.get_serializer(comparison)
 
         try:
+            if settings.COMPARISON_STREAMING_ENABLED:
+                # the file comparisons are rendered as they are computed
+                serializer = self.get_serializer(
+                    comparison,
+                    context={**self.get_serializer_context(), "stream_files": True},
+                )
+                return StreamingHttpResponse(
+                    stream_comparison(serializer, comparison),
+                    content_type="application/json",
+                )
+
+            serializer = self.get_serializer(comparison)
             return Response(serializer.data)
         except MissingComparisonReport:
             raise NotFound("Raw report not found for base or head reference.")
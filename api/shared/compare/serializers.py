@@ -1,6 +1,7 @@
-from typing import List
+from typing import Iterable, Iterator, List
 
 from rest_framework import serializers
+from rest_framework.renderers import JSONRenderer
 
 from api.internal.commit.serializers import CommitSerializer
 from api.shared.commit.serializers import ReportTotalsSerializer
@@ -31,6 +32,13 @@ class FileComparisonSerializer(serializers.Serializer):
     change_summary = serializers.JSONField()
     lines = LineComparisonSerializer(many=True)
 
+    def get_fields(self):
+        fields = super().get_fields()
+        if not self.context.get("include_lines", True):
+            # the lines can be fetched per file instead
+            del fields["lines"]
+        return fields
+
 
 class ComparisonSerializer(serializers.Serializer):
     base_commit = serializers.CharField(source="base_commit.commitid")
@@ -53,12 +61,26 @@ class ComparisonSerializer(serializers.Serializer):
     def get_diff(self, comparison) -> dict:
         return {"git_commits": comparison.git_commits}
 
+    def get_fields(self):
+        fields = super().get_fields()
+        if self.context.get("stream_files"):
+            # streamed by `stream_comparison` instead
+            del fields["files"]
+        return fields
+
     def get_files(self, comparison: Comparison) -> List[dict]:
-        return [
-            FileComparisonSerializer(file).data
-            for file in comparison.files
-            if self._should_include_file(file)
-        ]
+        return list(self.iter_files(comparison))
+
+    def iter_files(self, comparison: Comparison) -> Iterator[dict]:
+        """
+        The serialized file comparisons, as they are computed.
+        """
+        for file in self.file_comparisons(comparison):
+            if self._should_include_file(file):
+                yield FileComparisonSerializer(file, context=self.context).data
+
+    def file_comparisons(self, comparison: Comparison) -> Iterable[FileComparison]:
+        return comparison.files
 
     def _should_include_file(self, file: FileComparison):
         if "has_diff" in self.context:
@@ -76,3 +98,29 @@ class FlagComparisonSerializer(serializers.Serializer):
     def get_base_report_totals(self, obj):
         if obj.base_report:
             return ReportTotalsSerializer(obj.base_report.totals).data
+
+
+def stream_comparison(
+    serializer: ComparisonSerializer, comparison: Comparison
+) -> Iterator[bytes]:
+    """
+    Encodes the same document as the given comparison serializer, which must have
+    been created with the `stream_files` context, rendering its file comparisons
+    one at a time as they are computed.
+
+    The rest of the comparison is serialized right away so that its errors (e.g.
+    a missing report) are raised before the response starts.
+    """
+    renderer = JSONRenderer()
+    # the encoded comparison without its closing brace
+    head = renderer.render(serializer.data)[:-1]
+
+    def stream():
+        yield head + b',"files":['
+        for index, file in enumerate(serializer.iter_files(comparison)):
+            if index:
+                yield b","
+            yield renderer.render(file)
+        yield b"]}"
+
+    return stream()
@@ -1,4 +1,19 @@
+import json
+from base64 import b64decode, b64encode
+from binascii import Error as BinasciiError
+from bisect import bisect_left, bisect_right
+from typing import List, Optional
+
+from rest_framework.exceptions import NotFound, ValidationError
 from rest_framework.pagination import CursorPagination, PageNumberPagination
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+from shared.reports.filtered import FilteredReport
+from shared.reports.resources import Report
+from shared.reports.types import ReportTotals
+
+from api.shared.commit.serializers import report_totals_data
+from services.path import report_path_index
 
 
 class CodecovCursorPagination(CursorPagination):
@@ -34,3 +49,119 @@ class PaginationMixin:
             else:
                 self._paginator = self.pagination_class()
         return self._paginator
+
+
+class ReportFilesCursorPagination:
+    """
+    Cursor-based pagination over the files of a report (which aren't a queryset),
+    ordered by path (`ordering=name`) or by one of their totals (e.g.
+    `ordering=-coverage`) with ties broken by path.
+
+    The cursor holds the sort key of the last file of the page so that the next
+    page is found with a bisection of the sorted keys and only the files of the
+    page are serialized.
+    """
+
+    cursor_query_param = "cursor"
+    page_size_query_param = "page_size"
+    ordering_query_param = "ordering"
+    ordering_fields = (
+        "name",
+        "lines",
+        "hits",
+        "misses",
+        "partials",
+        "coverage",
+        "branches",
+        "methods",
+        "complexity",
+    )
+    max_page_size = 1000
+
+    def paginate_report(self, report: Report, request) -> List[str]:
+        """
+        Returns the names of the files of the requested page.
+        """
+        self.request = request
+        self.page_size = self.get_page_size(request)
+
+        ordering = request.query_params.get(self.ordering_query_param, "name")
+        field = ordering.lstrip("-")
+        if field not in self.ordering_fields:
+            raise ValidationError(
+                f"Invalid ordering, expected one of: {', '.join(self.ordering_fields)}"
+            )
+        descending = ordering.startswith("-")
+
+        if field == "name" and not isinstance(report, FilteredReport):
+            # the report's files are already sorted by its path index
+            keys = [(filename,) for filename in report_path_index(report).paths]
+        else:
+            keys = sorted(
+                self.sort_key(report, filename, field) for filename in report.files
+            )
+        cursor = self.decode_cursor(request)
+        try:
+            if descending:
+                end = bisect_left(keys, cursor) if cursor else len(keys)
+                start = max(end - self.page_size, 0)
+                page = keys[start:end][::-1]
+                has_next = start > 0
+            else:
+                start = bisect_right(keys, cursor) if cursor else 0
+                end = start + self.page_size
+                page = keys[start:end]
+                has_next = end < len(keys)
+        except TypeError:
+            # the cursor doesn't match the ordering
+            raise NotFound("Invalid cursor")
+
+        self.next_key = page[-1] if has_next else None
+        return [key[-1] for key in page]
+
+    def get_page_size(self, request) -> int:
+        try:
+            page_size = int(
+                request.query_params.get(
+                    self.page_size_query_param, api_settings.PAGE_SIZE
+                )
+            )
+        except ValueError:
+            raise ValidationError("Invalid page size")
+        if page_size <= 0:
+            raise ValidationError("Invalid page size")
+        return min(page_size, self.max_page_size)
+
+    def sort_key(self, report: Report, filename: str, field: str) -> tuple:
+        if field == "name":
+            return (filename,)
+        value = report_totals_data(self.file_totals(report, filename))[field]
+        # files without a value come first
+        return (value is not None, value or 0, filename)
+
+    def file_totals(self, report: Report, filename: str) -> ReportTotals:
+        # sort on the file summaries rather than building every report file
+        if isinstance(report, FilteredReport):
+            if report.flags:
+                # the totals of the files are recomputed from their filtered lines
+                return report.get(filename).totals
+            report = report.report
+        totals = report._files[filename].file_totals
+        return totals if isinstance(totals, ReportTotals) else ReportTotals(*totals)
+
+    def decode_cursor(self, request) -> Optional[tuple]:
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            return tuple(json.loads(b64decode(encoded.encode(), validate=True)))
+        except (BinasciiError, TypeError, ValueError):
+            raise NotFound("Invalid cursor")
+
+    def get_next_link(self) -> Optional[str]:
+        if self.next_key is None:
+            return None
+        encoded = b64encode(json.dumps(self.next_key).encode()).decode()
+        return replace_query_param(
+            self.request.build_absolute_uri(), self.cursor_query_param, encoded
+        )
@@ -459,6 +459,93 @@ SENTRY_OAUTH_CLIENT_SECRET = get_config("setup", "sentry", "oauth_client_secret"
 # TODO: we can eventually get rid of this once it's confirmed working well for many repos
 REPORT_BUILDER_REPO_IDS = get_config("setup", "report_builder", "repo_ids", default=[])
 
+# cache of report chunks fetched from archive storage (in-process LRU + redis)
+REPORT_CACHE_ENABLED = get_config("setup", "report_cache", "enabled", default=False)
+REPORT_CACHE_MAX_LOCAL_BYTES = get_config(
+    "setup", "report_cache", "max_local_bytes", default=256 * 1024 * 1024
+)
+REPORT_CACHE_REDIS_TTL = get_config(
+    "setup", "report_cache", "redis_ttl", default=24 * 60 * 60
+)
+
+# opt-in executor ("thread" or "process") used to compute the line comparisons
+# and change summaries of a comparison's files in parallel
+COMPARISON_FILES_EXECUTOR = get_config(
+    "setup", "comparison", "files_executor", default=None
+)
+COMPARISON_FILES_WORKERS = get_config("setup", "comparison", "files_workers", default=4)
+
+# cache of provider comparisons between two commits (in-process LRU + redis)
+GIT_COMPARISON_CACHE_ENABLED = get_config(
+    "setup", "git_comparison_cache", "enabled", default=False
+)
+GIT_COMPARISON_CACHE_MAX_LOCAL_BYTES = get_config(
+    "setup", "git_comparison_cache", "max_local_bytes", default=64 * 1024 * 1024
+)
+GIT_COMPARISON_CACHE_REDIS_TTL = get_config(
+    "setup", "git_comparison_cache", "redis_ttl", default=7 * 24 * 60 * 60
+)
+
+# cache of the comparison data computed by the worker and fetched from archive
+# storage (in-process LRU + redis)
+COMPARISON_REPORT_CACHE_ENABLED = get_config(
+    "setup", "comparison_report_cache", "enabled", default=False
+)
+COMPARISON_REPORT_CACHE_MAX_LOCAL_BYTES = get_config(
+    "setup", "comparison_report_cache", "max_local_bytes", default=64 * 1024 * 1024
+)
+COMPARISON_REPORT_CACHE_REDIS_TTL = get_config(
+    "setup", "comparison_report_cache", "redis_ttl", default=24 * 60 * 60
+)
+
+# read the latest totals of repository branches from the `branch_head_totals`
+# table (maintained by a trigger on `commits`) when listing repositories
+BRANCH_HEAD_TOTALS_ENABLED = get_config(
+    "setup", "branch_head_totals", "enabled", default=False
+)
+
+# build the organization coverage charts from the `branch_daily_totals` table
+# (maintained by a trigger on `commits`) instead of ranking all the commits
+CHART_DAILY_TOTALS_ENABLED = get_config(
+    "setup", "chart_daily_totals", "enabled", default=False
+)
+
+# count the uploads of commits and owners (used by the upload throttles) with
+# sorted sets in redis, rebuilt from the database every `reconcile_interval`
+UPLOAD_COUNTERS_ENABLED = get_config(
+    "setup", "upload_counters", "enabled", default=False
+)
+UPLOAD_COUNTERS_RECONCILE_INTERVAL = get_config(
+    "setup", "upload_counters", "reconcile_interval", default=60 * 60
+)
+
+# stream the bodies of v2 uploads to archive storage rather than buffering them
+# in redis, optionally gzipping them on the way
+UPLOAD_V2_STREAMING_ENABLED = get_config(
+    "setup", "upload_v2_streaming", "enabled", default=False
+)
+UPLOAD_V2_STREAMING_GZIP = get_config(
+    "setup", "upload_v2_streaming", "gzip", default=False
+)
+
+# stream the full coverage reports of the public API one file at a time rather
+# than serializing them in memory before rendering
+REPORT_STREAMING_ENABLED = get_config(
+    "setup", "report_streaming", "enabled", default=False
+)
+
+# find the file reports of the `walk_back` file report API with a single query
+# for the ancestors of the commit (rather than walking them back one at a time)
+FILE_REPORT_ANCESTOR_SEARCH_ENABLED = get_config(
+    "setup", "file_report_ancestor_search", "enabled", default=False
+)
+
+# stream the file comparisons of the compare API as they are computed rather than
+# serializing them all in memory before rendering
+COMPARISON_STREAMING_ENABLED = get_config(
+    "setup", "comparison_streaming", "enabled", default=False
+)
+
 SENTRY_ENV = os.environ.get("CODECOV_ENV", False)
 SENTRY_DSN = os.environ.get("SERVICES__SENTRY__SERVER_DSN", None)
 if SENTRY_DSN is not None:
@@ -6,6 +6,7 @@ from django.db.models import (
     Count,
     DateTimeField,
     F,
+    FilteredRelation,
     FloatField,
     IntegerField,
     Manager,
@@ -20,6 +21,15 @@ from django.db.models.fields.json import KeyTextTransform
 from django.db.models.functions import Cast, Coalesce
 from django.utils import timezone
 
+# keys of the totals in the `totals` JSON of commits
+TOTALS_KEYS = {
+    "hits": "h",
+    "lines": "n",
+    "partials": "p",
+    "misses": "m",
+    "complexity": "C",
+}
+
 
 class RepositoryQuerySet(QuerySet):
     def viewable_repos(self, owner):
@@ -143,6 +153,46 @@ class RepositoryQuerySet(QuerySet):
             latest_coverage_change=F("latest_coverage") - F("second_latest_coverage")
         )
 
+    def with_latest_branch_head_totals(self, branch=None):
+        """
+        Annotates queryset with the totals of the latest complete commit of the
+        given branch (defaults to each repository's default branch) and the coverage
+        change since the complete commit before it, read from `BranchHeadTotals`.
+
+        This is a cheaper alternative to `with_latest_commit_totals_before` (for the
+        current date) followed by `with_latest_coverage_change`, with the same
+        `latest_commit_totals` and `latest_coverage_change` annotations plus typed
+        `latest_*` annotations that can be sorted on and aggregated directly.
+
+        The totals are read through a single join on the branch's row (there is
+        at most one per repository and branch).
+        """
+        queryset = self.annotate(
+            head_totals=FilteredRelation(
+                "branch_head_totals",
+                condition=Q(branch_head_totals__branch=branch or F("branch")),
+            )
+        )
+
+        def head_totals_field(name):
+            return F(f"head_totals__{name}")
+
+        return queryset.annotate(
+            latest_commit_totals=head_totals_field("totals"),
+            prev_commit_totals=head_totals_field("previous_totals"),
+            latest_coverage=head_totals_field("coverage"),
+            latest_lines=head_totals_field("lines"),
+            latest_hits=head_totals_field("hits"),
+            latest_misses=head_totals_field("misses"),
+            latest_partials=head_totals_field("partials"),
+            latest_complexity=head_totals_field("complexity"),
+            second_latest_coverage=head_totals_field("previous_coverage"),
+            second_latest_lines=head_totals_field("previous_lines"),
+            second_latest_hits=head_totals_field("previous_hits"),
+        ).annotate(
+            latest_coverage_change=F("latest_coverage") - F("second_latest_coverage")
+        )
+
     def get_aggregated_coverage(self):
         """
         Adds group_bys in the queryset to aggregate the repository coverage totals together to access
@@ -152,85 +202,40 @@ class RepositoryQuerySet(QuerySet):
         Does not return a queryset and instead returns the aggregated values, fetched from the database.
         """
 
-        return self.aggregate(
-            repo_count=Count("repoid"),
-            sum_hits=Sum(
-                Cast(
-                    KeyTextTransform("h", "latest_commit_totals"),
-                    output_field=FloatField(),
-                )
-            ),
-            sum_lines=Sum(
-                Cast(
-                    KeyTextTransform("n", "latest_commit_totals"),
-                    output_field=FloatField(),
-                )
-            ),
-            sum_partials=Sum(
-                Cast(
-                    KeyTextTransform("p", "latest_commit_totals"),
-                    output_field=FloatField(),
-                )
-            ),
-            sum_misses=Sum(
-                Cast(
-                    KeyTextTransform("m", "latest_commit_totals"),
+        if "latest_hits" in self.query.annotations:
+            # typed totals annotated by `with_latest_branch_head_totals`
+            def latest(key):
+                return Cast(F(f"latest_{key}"), output_field=FloatField())
+
+            def previous(key):
+                return Cast(F(f"second_latest_{key}"), output_field=FloatField())
+
+        else:
+
+            def latest(key):
+                return Cast(
+                    KeyTextTransform(TOTALS_KEYS[key], "latest_commit_totals"),
                     output_field=FloatField(),
                 )
-            ),
-            average_complexity=Avg(
-                Cast(
-                    KeyTextTransform("C", "latest_commit_totals"),
+
+            def previous(key):
+                return Cast(
+                    KeyTextTransform(TOTALS_KEYS[key], "prev_commit_totals"),
                     output_field=FloatField(),
                 )
-            ),
-            weighted_coverage=(
-                Sum(
-                    Cast(
-                        KeyTextTransform("h", "latest_commit_totals"),
-                        output_field=FloatField(),
-                    )
-                )
-                / Sum(
-                    Cast(
-                        KeyTextTransform("n", "latest_commit_totals"),
-                        output_field=FloatField(),
-                    )
-                )
-                * 100
-            ),
+
+        return self.aggregate(
+            repo_count=Count("repoid"),
+            sum_hits=Sum(latest("hits")),
+            sum_lines=Sum(latest("lines")),
+            sum_partials=Sum(latest("partials")),
+            sum_misses=Sum(latest("misses")),
+            average_complexity=Avg(latest("complexity")),
+            weighted_coverage=(Sum(latest("hits")) / Sum(latest("lines")) * 100),
             # Function to get the weighted coverage change is to calculate the weighted coverage for the previous commit
             # minus the weighted coverage from the current commit
-            weighted_coverage_change=(
-                Sum(
-                    Cast(
-                        KeyTextTransform("h", "latest_commit_totals"),
-                        output_field=FloatField(),
-                    )
-                )
-                / Sum(
-                    Cast(
-                        KeyTextTransform("n", "latest_commit_totals"),
-                        output_field=FloatField(),
-                    )
-                )
-                * 100
-            )
-            - (
-                Sum(
-                    Cast(
-                        KeyTextTransform("h", "prev_commit_totals"),
-                        output_field=FloatField(),
-                    )
-                )
-                / Sum(
-                    Cast(
-                        KeyTextTransform("n", "prev_commit_totals"),
-                        output_field=FloatField(),
-                    )
-                )
-                * 100
-            ),
+            weighted_coverage_change=(Sum(latest("hits")) / Sum(latest("lines")) * 100)
+            - (Sum(previous("hits")) / Sum(previous("lines")) * 100),
         )
 
     def with_latest_commit_at(self):
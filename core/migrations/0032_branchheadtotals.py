@@ -0,0 +1,204 @@
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+import core.models
+from utils.migrations import RiskyRunSQL
+
+
+class Migration(migrations.Migration):
+    """
+    Adds the `branch_head_totals` table along with the trigger keeping it up to date
+    with the `commits` table:
+
+    `refresh_branch_head_totals(repoid, branch)` (re)computes the row of a branch from
+    its 2 latest complete commits (using the `commits_repoid_branch_state_ts` index)
+    and is called whenever a commit is inserted, deleted or updated in a way that can
+    change which commits those are or their totals.
+
+    The existing branches are backfilled in the last (risky) step.
+    """
+
+    dependencies = [
+        ("core", "0031_auto_20230731_1627"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="BranchHeadTotals",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("branch", models.TextField()),
+                ("commitid", models.TextField()),
+                ("timestamp", core.models.DateTimeWithoutTZField()),
+                ("totals", models.JSONField(null=True)),
+                ("coverage", models.FloatField(null=True)),
+                ("files", models.IntegerField(null=True)),
+                ("lines", models.IntegerField(null=True)),
+                ("hits", models.IntegerField(null=True)),
+                ("misses", models.IntegerField(null=True)),
+                ("partials", models.IntegerField(null=True)),
+                ("complexity", models.FloatField(null=True)),
+                ("previous_totals", models.JSONField(null=True)),
+                ("previous_coverage", models.FloatField(null=True)),
+                ("previous_lines", models.IntegerField(null=True)),
+                ("previous_hits", models.IntegerField(null=True)),
+                (
+                    "updatestamp",
+                    core.models.DateTimeWithoutTZField(
+                        default=django.utils.timezone.now
+                    ),
+                ),
+                (
+                    "repository",
+                    models.ForeignKey(
+                        db_column="repoid",
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="branch_head_totals",
+                        to="core.repository",
+                    ),
+                ),
+            ],
+            options={
+                "db_table": "branch_head_totals",
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="branchheadtotals",
+            constraint=models.UniqueConstraint(
+                fields=("repository", "branch"),
+                name="branch_head_totals_repoid_branch",
+            ),
+        ),
+        migrations.RunSQL(
+            """
+            create or replace function refresh_branch_head_totals(_repoid int, _branch text)
+            returns void as $$
+            declare
+                latest record;
+                previous record;
+            begin
+                select commitid, timestamp, totals into latest
+                from commits
+                where repoid = _repoid
+                and branch = _branch
+                and state = 'complete'
+                order by timestamp desc
+                limit 1;
+
+                if latest.commitid is null then
+                    delete from branch_head_totals
+                    where repoid = _repoid and branch = _branch;
+                    return;
+                end if;
+
+                select totals into previous
+                from commits
+                where repoid = _repoid
+                and branch = _branch
+                and state = 'complete'
+                order by timestamp desc
+                offset 1
+                limit 1;
+
+                insert into branch_head_totals (
+                    repoid, branch, commitid, timestamp, totals,
+                    coverage, files, lines, hits, misses, partials, complexity,
+                    previous_totals, previous_coverage, previous_lines, previous_hits,
+                    updatestamp
+                )
+                values (
+                    _repoid, _branch, latest.commitid, latest.timestamp, latest.totals,
+                    (latest.totals->>'c')::float,
+                    (latest.totals->>'f')::int,
+                    (latest.totals->>'n')::int,
+                    (latest.totals->>'h')::int,
+                    (latest.totals->>'m')::int,
+                    (latest.totals->>'p')::int,
+                    (latest.totals->>'C')::float,
+                    previous.totals,
+                    (previous.totals->>'c')::float,
+                    (previous.totals->>'n')::int,
+                    (previous.totals->>'h')::int,
+                    now()
+                )
+                on conflict (repoid, branch) do update
+                set commitid = excluded.commitid,
+                    timestamp = excluded.timestamp,
+                    totals = excluded.totals,
+                    coverage = excluded.coverage,
+                    files = excluded.files,
+                    lines = excluded.lines,
+                    hits = excluded.hits,
+                    misses = excluded.misses,
+                    partials = excluded.partials,
+                    complexity = excluded.complexity,
+                    previous_totals = excluded.previous_totals,
+                    previous_coverage = excluded.previous_coverage,
+                    previous_lines = excluded.previous_lines,
+                    previous_hits = excluded.previous_hits,
+                    updatestamp = excluded.updatestamp;
+            end;
+            $$ language plpgsql;
+
+            create or replace function commits_refresh_branch_head_totals() returns trigger as $$
+            begin
+                if tg_op in ('UPDATE', 'DELETE') and old.branch is not null then
+                    perform refresh_branch_head_totals(old.repoid, old.branch);
+                end if;
+
+                if tg_op in ('INSERT', 'UPDATE') and new.branch is not null
+                and (tg_op = 'INSERT' or new.branch is distinct from old.branch) then
+                    perform refresh_branch_head_totals(new.repoid, new.branch);
+                end if;
+
+                return null;
+            end;
+            $$ language plpgsql;
+
+            create trigger commits_refresh_branch_head_totals_insert after insert on commits
+            for each row
+            when (new.state = 'complete'::commit_state)
+            execute procedure commits_refresh_branch_head_totals();
+
+            create trigger commits_refresh_branch_head_totals_update after update on commits
+            for each row
+            when (
+                (new.state = 'complete'::commit_state or old.state = 'complete'::commit_state)
+                and (
+                    new.state is distinct from old.state
+                    or new.branch is distinct from old.branch
+                    or new.timestamp is distinct from old.timestamp
+                    or new.totals is distinct from old.totals
+                )
+            )
+            execute procedure commits_refresh_branch_head_totals();
+
+            create trigger commits_refresh_branch_head_totals_delete after delete on commits
+            for each row
+            when (old.state = 'complete'::commit_state)
+            execute procedure commits_refresh_branch_head_totals();
+            """,
+            reverse_sql="""
+            drop trigger commits_refresh_branch_head_totals_insert on commits;
+            drop trigger commits_refresh_branch_head_totals_update on commits;
+            drop trigger commits_refresh_branch_head_totals_delete on commits;
+            drop function commits_refresh_branch_head_totals();
+            drop function refresh_branch_head_totals(int, text);
+            """,
+        ),
+        RiskyRunSQL(
+            """
+            select refresh_branch_head_totals(repoid, branch) from branches;
+            """,
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+    ]
@@ -0,0 +1,193 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+import core.models
+from utils.migrations import RiskyRunSQL
+
+
+class Migration(migrations.Migration):
+    """
+    Adds the `branch_daily_totals` table along with the trigger keeping it up to
+    date with the `commits` table:
+
+    `refresh_branch_daily_totals(repoid, branch, date)` (re)computes the row of a
+    branch for a given day from its latest complete commit of that day (using the
+    `commits_repoid_branch_state_ts` index) and is called for the day(s) of a
+    commit whenever it is inserted, deleted or updated in a way that can change
+    which commit that is or its totals.
+
+    The existing commits are backfilled in the last (risky) step.
+    """
+
+    dependencies = [
+        ("core", "0032_branchheadtotals"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="BranchDailyTotals",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("branch", models.TextField()),
+                ("date", models.DateField()),
+                ("commitid", models.TextField()),
+                ("timestamp", core.models.DateTimeWithoutTZField()),
+                ("coverage", models.FloatField(null=True)),
+                ("lines", models.IntegerField(null=True)),
+                ("hits", models.IntegerField(null=True)),
+                ("misses", models.IntegerField(null=True)),
+                ("partials", models.IntegerField(null=True)),
+                (
+                    "repository",
+                    models.ForeignKey(
+                        db_column="repoid",
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="branch_daily_totals",
+                        to="core.repository",
+                    ),
+                ),
+            ],
+            options={
+                "db_table": "branch_daily_totals",
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="branchdailytotals",
+            constraint=models.UniqueConstraint(
+                fields=("repository", "branch", "date"),
+                name="branch_daily_totals_repoid_branch_date",
+            ),
+        ),
+        migrations.RunSQL(
+            """
+            create or replace function refresh_branch_daily_totals(_repoid int, _branch text, _date date)
+            returns void as $$
+            declare
+                latest record;
+            begin
+                select commitid, timestamp, totals into latest
+                from commits
+                where repoid = _repoid
+                and branch = _branch
+                and state = 'complete'
+                and timestamp >= _date
+                and timestamp < _date + 1
+                order by timestamp desc
+                limit 1;
+
+                if latest.commitid is null then
+                    delete from branch_daily_totals
+                    where repoid = _repoid and branch = _branch and date = _date;
+                    return;
+                end if;
+
+                insert into branch_daily_totals (
+                    repoid, branch, date, commitid, timestamp,
+                    coverage, lines, hits, misses, partials
+                )
+                values (
+                    _repoid, _branch, _date, latest.commitid, latest.timestamp,
+                    (latest.totals->>'c')::float,
+                    (latest.totals->>'n')::int,
+                    (latest.totals->>'h')::int,
+                    (latest.totals->>'m')::int,
+                    (latest.totals->>'p')::int
+                )
+                on conflict (repoid, branch, date) do update
+                set commitid = excluded.commitid,
+                    timestamp = excluded.timestamp,
+                    coverage = excluded.coverage,
+                    lines = excluded.lines,
+                    hits = excluded.hits,
+                    misses = excluded.misses,
+                    partials = excluded.partials;
+            end;
+            $$ language plpgsql;
+
+            create or replace function commits_refresh_branch_daily_totals() returns trigger as $$
+            begin
+                if tg_op in ('UPDATE', 'DELETE')
+                and old.branch is not null and old.timestamp is not null then
+                    perform refresh_branch_daily_totals(
+                        old.repoid, old.branch, old.timestamp::date
+                    );
+                end if;
+
+                if tg_op in ('INSERT', 'UPDATE')
+                and new.branch is not null and new.timestamp is not null
+                and (
+                    tg_op = 'INSERT'
+                    or new.branch is distinct from old.branch
+                    or new.timestamp::date is distinct from old.timestamp::date
+                ) then
+                    perform refresh_branch_daily_totals(
+                        new.repoid, new.branch, new.timestamp::date
+                    );
+                end if;
+
+                return null;
+            end;
+            $$ language plpgsql;
+
+            create trigger commits_refresh_branch_daily_totals_insert after insert on commits
+            for each row
+            when (new.state = 'complete'::commit_state)
+            execute procedure commits_refresh_branch_daily_totals();
+
+            create trigger commits_refresh_branch_daily_totals_update after update on commits
+            for each row
+            when (
+                (new.state = 'complete'::commit_state or old.state = 'complete'::commit_state)
+                and (
+                    new.state is distinct from old.state
+                    or new.branch is distinct from old.branch
+                    or new.timestamp is distinct from old.timestamp
+                    or new.totals is distinct from old.totals
+                )
+            )
+            execute procedure commits_refresh_branch_daily_totals();
+
+            create trigger commits_refresh_branch_daily_totals_delete after delete on commits
+            for each row
+            when (old.state = 'complete'::commit_state)
+            execute procedure commits_refresh_branch_daily_totals();
+            """,
+            reverse_sql="""
+            drop trigger commits_refresh_branch_daily_totals_insert on commits;
+            drop trigger commits_refresh_branch_daily_totals_update on commits;
+            drop trigger commits_refresh_branch_daily_totals_delete on commits;
+            drop function commits_refresh_branch_daily_totals();
+            drop function refresh_branch_daily_totals(int, text, date);
+            """,
+        ),
+        RiskyRunSQL(
+            """
+            insert into branch_daily_totals (
+                repoid, branch, date, commitid, timestamp,
+                coverage, lines, hits, misses, partials
+            )
+            select distinct on (repoid, branch, timestamp::date)
+                repoid, branch, timestamp::date, commitid, timestamp,
+                (totals->>'c')::float,
+                (totals->>'n')::int,
+                (totals->>'h')::int,
+                (totals->>'m')::int,
+                (totals->>'p')::int
+            from commits
+            where state = 'complete'
+            and branch is not null
+            and timestamp is not null
+            order by repoid, branch, timestamp::date, timestamp desc
+            on conflict (repoid, branch, date) do nothing;
+            """,
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+    ]
@@ -191,6 +191,85 @@ class Branch(models.Model):
         ]
 
 
+class BranchHeadTotals(models.Model):
+    """
+    Totals of the latest complete commit of a branch (and of the complete commit
+    before it) as typed columns, so that repositories can be listed, sorted and
+    aggregated by coverage without going through their commits.
+
+    Rows are maintained by the `commits_refresh_branch_head_totals` trigger on
+    the `commits` table (see core migration 0032) and are never written by the API.
+    """
+
+    repository = models.ForeignKey(
+        "core.Repository",
+        db_column="repoid",
+        on_delete=models.CASCADE,
+        related_name="branch_head_totals",
+    )
+    branch = models.TextField()
+    commitid = models.TextField()
+    timestamp = DateTimeWithoutTZField()
+    totals = models.JSONField(null=True)
+    coverage = models.FloatField(null=True)
+    files = models.IntegerField(null=True)
+    lines = models.IntegerField(null=True)
+    hits = models.IntegerField(null=True)
+    misses = models.IntegerField(null=True)
+    partials = models.IntegerField(null=True)
+    complexity = models.FloatField(null=True)
+    previous_totals = models.JSONField(null=True)
+    previous_coverage = models.FloatField(null=True)
+    previous_lines = models.IntegerField(null=True)
+    previous_hits = models.IntegerField(null=True)
+    updatestamp = DateTimeWithoutTZField(default=timezone.now)
+
+    class Meta:
+        db_table = "branch_head_totals"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["repository", "branch"],
+                name="branch_head_totals_repoid_branch",
+            )
+        ]
+
+
+class BranchDailyTotals(models.Model):
+    """
+    Totals of the latest complete commit of each day on a branch, as typed
+    columns, so that coverage charts can be built without going through (and
+    ranking) all the commits of the repositories.
+
+    Rows are maintained by the `commits_refresh_branch_daily_totals` trigger on
+    the `commits` table (see core migration 0034) and are never written by the API.
+    """
+
+    repository = models.ForeignKey(
+        "core.Repository",
+        db_column="repoid",
+        on_delete=models.CASCADE,
+        related_name="branch_daily_totals",
+    )
+    branch = models.TextField()
+    date = models.DateField()
+    commitid = models.TextField()
+    timestamp = DateTimeWithoutTZField()
+    coverage = models.FloatField(null=True)
+    lines = models.IntegerField(null=True)
+    hits = models.IntegerField(null=True)
+    misses = models.IntegerField(null=True)
+    partials = models.IntegerField(null=True)
+
+    class Meta:
+        db_table = "branch_daily_totals"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["repository", "branch", "date"],
+                name="branch_daily_totals_repoid_branch_date",
+            )
+        ]
+
+
 class Commit(models.Model):
     class CommitStates(models.TextChoices):
         COMPLETE = "complete"
@@ -4,7 +4,7 @@ from django.test import TestCase
 from django.utils import timezone
 
 from codecov_auth.tests.factories import OwnerFactory
-from core.models import Repository
+from core.models import BranchHeadTotals, Repository
 
 from .factories import CommitFactory, RepositoryFactory
 
@@ -68,6 +68,92 @@ class RepositoryQuerySetTests(TestCase):
             == -1
         )
 
+    def test_branch_head_totals_are_maintained_by_commits(self):
+        first = CommitFactory(
+            totals={"c": "50.00", "n": 10, "h": 5}, repository=self.repo1
+        )
+        second = CommitFactory(
+            totals={"c": "60.00", "n": 10, "h": 6}, repository=self.repo1
+        )
+        CommitFactory(totals={"c": "70.00"}, repository=self.repo1, state="pending")
+
+        head_totals = BranchHeadTotals.objects.get(
+            repository=self.repo1, branch="master"
+        )
+        assert head_totals.commitid == second.commitid
+        assert (head_totals.coverage, head_totals.lines, head_totals.hits) == (
+            60.0,
+            10,
+            6,
+        )
+        assert head_totals.previous_coverage == 50.0
+
+        second.delete()
+        head_totals = BranchHeadTotals.objects.get(
+            repository=self.repo1, branch="master"
+        )
+        assert head_totals.commitid == first.commitid
+        assert head_totals.previous_totals is None
+
+        first.state = "error"
+        first.save()
+        assert not BranchHeadTotals.objects.filter(repository=self.repo1).exists()
+
+    def test_with_latest_branch_head_totals(self):
+        CommitFactory(totals={"c": 98, "n": 50, "h": 49}, repository=self.repo1)
+        CommitFactory(totals={"c": 99, "n": 100, "h": 99}, repository=self.repo1)
+        CommitFactory(totals={"c": 10}, repository=self.repo2, branch="other")
+
+        queryset = (
+            Repository.objects.filter(repoid__in=[self.repo1.repoid, self.repo2.repoid])
+            .with_latest_branch_head_totals()
+            .order_by("repoid")
+        )
+        # the totals are read from a single join
+        assert str(queryset.query).count('"branch_head_totals"') == 1
+
+        repo1, repo2 = queryset
+        assert repo1.latest_commit_totals == {"c": 99, "n": 100, "h": 99}
+        assert repo1.latest_coverage == 99
+        assert repo1.latest_lines == 100
+        assert repo1.latest_coverage_change == 1
+        assert repo2.latest_commit_totals is None
+
+        repo2 = Repository.objects.filter(
+            repoid=self.repo2.repoid
+        ).with_latest_branch_head_totals(branch="other")[0]
+        assert repo2.latest_coverage == 10
+
+    def test_get_aggregated_coverage_from_branch_head_totals(self):
+        CommitFactory(
+            totals={"n": 10, "h": 5, "m": 5, "p": 0, "c": 50.0, "C": 0.0},
+            repository=self.repo1,
+        )
+        CommitFactory(
+            totals={"n": 10, "h": 10, "m": 0, "p": 0, "c": 100.0, "C": 0.0},
+            repository=self.repo1,
+        )
+        CommitFactory(
+            totals={"n": 90, "h": 40, "m": 50, "p": 0, "c": 60.0, "C": 0.0},
+            repository=self.repo2,
+        )
+        CommitFactory(
+            totals={"n": 100, "h": 50, "m": 50, "p": 0, "c": 50.0, "C": 0.0},
+            repository=self.repo2,
+        )
+
+        stats = (
+            Repository.objects.all()
+            .with_latest_branch_head_totals()
+            .get_aggregated_coverage()
+        )
+
+        assert stats["repo_count"] == 2
+        assert stats["sum_lines"] == 110
+        assert stats["sum_partials"] == 0
+        assert stats["weighted_coverage"] == 54.54545454545454
+        assert stats["weighted_coverage_change"] == 9.54545454545454
+
     def test_get_or_create_from_github_repo_data(self):
         owner = OwnerFactory()
 
@@ -0,0 +1,39 @@
+import timeseries.helpers as timeseries_helpers
+from codecov.db import sync_to_async
+
+from .loader import BaseLoader
+
+
+class RepositoryMeasurementsLoader(BaseLoader):
+    """
+    Loads the coverage measurements of the repositories given to `load` (the
+    `Repository` records themselves) so that listing many repositories along with
+    their measurements does not query each repository's dataset and measurements
+    separately.
+    """
+
+    @classmethod
+    def key(cls, repository):
+        return repository.pk
+
+    def __init__(self, info, interval, start_date, end_date, branch, *args, **kwargs):
+        self.interval = interval
+        self.start_date = start_date
+        self.end_date = end_date
+        self.branch = branch
+        return super().__init__(info, *args, **kwargs)
+
+    @sync_to_async
+    def batch_load_fn(self, repositories):
+        measurements = (
+            timeseries_helpers.repositories_coverage_measurements_with_fallback(
+                repositories,
+                self.interval,
+                start_date=self.start_date,
+                end_date=self.end_date,
+                branch=self.branch,
+            )
+        )
+
+        # the returned list of measurements must be in the exact order of `repositories`
+        return [measurements[self.key(repository)] for repository in repositories]
@@ -0,0 +1,40 @@
+import asyncio
+
+import services.report as report_service
+from codecov.db import sync_to_async
+
+from .loader import BaseLoader
+
+
+class CommitReportLoader(BaseLoader):
+    """
+    Loads the full reports of commits (keyed by the `Commit` records themselves).
+
+    The report metadata (sessions, flags, totals and details) of all the commits
+    loaded in the same tick is prefetched with a handful of queries, and then the
+    reports are built (which includes fetching their chunks from archive storage)
+    concurrently.
+    """
+
+    @classmethod
+    def key(cls, commit):
+        return commit.pk
+
+    def __init__(self, info, report_class=None, *args, **kwargs):
+        self.report_class = report_class
+        return super().__init__(info, *args, **kwargs)
+
+    async def batch_load_fn(self, commits):
+        await sync_to_async(report_service.prefetch_commit_reports)(commits)
+
+        # not thread sensitive so that the storage reads can run in parallel
+        build_report = sync_to_async(self._build_report, thread_sensitive=False)
+        return await asyncio.gather(*[build_report(commit) for commit in commits])
+
+    def _build_report(self, commit):
+        if self.report_class is None:
+            # also caches the report on the commit
+            return commit.full_report
+        return report_service.build_report_from_commit(
+            commit, report_class=self.report_class
+        )
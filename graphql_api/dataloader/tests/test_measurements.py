@@ -0,0 +1,55 @@
+import asyncio
+from datetime import datetime
+from unittest.mock import patch
+
+from django.test import TransactionTestCase
+
+from core.tests.factories import RepositoryFactory
+from graphql_api.dataloader.measurements import RepositoryMeasurementsLoader
+from timeseries.models import Interval
+
+
+class GraphQLResolveInfo:
+    def __init__(self):
+        self.context = {}
+
+
+class RepositoryMeasurementsLoaderTestCase(TransactionTestCase):
+    def setUp(self):
+        self.repos = [
+            RepositoryFactory(name="test-repo-1"),
+            RepositoryFactory(name="test-repo-2"),
+            RepositoryFactory(name="test-repo-3"),
+        ]
+        self.info = GraphQLResolveInfo()
+
+    @patch("timeseries.helpers.repositories_coverage_measurements_with_fallback")
+    async def test_load_many_repositories(
+        self, repositories_coverage_measurements_with_fallback
+    ):
+        repositories_coverage_measurements_with_fallback.return_value = {
+            repo.pk: [{"timestamp_bin": datetime(2022, 1, 1), "avg": repo.pk}]
+            for repo in self.repos
+        }
+
+        loader = RepositoryMeasurementsLoader.loader(
+            self.info, Interval.INTERVAL_1_DAY, datetime(2022, 1, 1), None, "main"
+        )
+        measurements = await asyncio.gather(
+            loader.load(self.repos[2]),
+            loader.load(self.repos[0]),
+            loader.load(self.repos[1]),
+        )
+        assert measurements == [
+            [{"timestamp_bin": datetime(2022, 1, 1), "avg": self.repos[2].pk}],
+            [{"timestamp_bin": datetime(2022, 1, 1), "avg": self.repos[0].pk}],
+            [{"timestamp_bin": datetime(2022, 1, 1), "avg": self.repos[1].pk}],
+        ]
+
+        repositories_coverage_measurements_with_fallback.assert_called_once_with(
+            [self.repos[2], self.repos[0], self.repos[1]],
+            Interval.INTERVAL_1_DAY,
+            start_date=datetime(2022, 1, 1),
+            end_date=None,
+            branch="main",
+        )
@@ -0,0 +1,73 @@
+import asyncio
+from unittest.mock import patch
+
+from django.test import TransactionTestCase
+
+from core.tests.factories import (
+    CommitFactory,
+    CommitWithReportFactory,
+    RepositoryFactory,
+)
+from graphql_api.dataloader.report import CommitReportLoader
+from services.report import (
+    PREFETCHED_COMMIT_REPORTS_ATTR,
+    ReadOnlyReport,
+    SerializableReport,
+    prefetch_commit_reports,
+)
+
+
+class GraphQLResolveInfo:
+    def __init__(self):
+        self.context = {}
+
+
+@patch("services.report.fetch_chunks", lambda commit, commit_report: "")
+class CommitReportLoaderTestCase(TransactionTestCase):
+    def setUp(self):
+        self.repository = RepositoryFactory()
+        self.commits = [
+            CommitWithReportFactory(repository=self.repository) for _ in range(3)
+        ]
+        self.info = GraphQLResolveInfo()
+
+    async def test_load_many_reports(self):
+        loader = CommitReportLoader.loader(self.info)
+        with patch(
+            "services.report.prefetch_commit_reports",
+            wraps=prefetch_commit_reports,
+        ) as prefetch_mock:
+            reports = await asyncio.gather(
+                *[loader.load(commit) for commit in self.commits]
+            )
+
+        # the report metadata is prefetched once for all the commits
+        prefetch_mock.assert_called_once_with(self.commits)
+        for commit in self.commits:
+            assert hasattr(commit, PREFETCHED_COMMIT_REPORTS_ATTR)
+
+        for commit, report in zip(self.commits, reports):
+            assert isinstance(report, SerializableReport)
+            assert report.files == [
+                "tests/__init__.py",
+                "tests/test_sample.py",
+                "awesome/__init__.py",
+            ]
+            assert sorted(report.flags.keys()) == ["integrations", "unittests"]
+            # the report is cached on the commit
+            assert commit.full_report is report
+
+    async def test_load_report_class(self):
+        loader = CommitReportLoader.loader(self.info, ReadOnlyReport)
+        report = await loader.load(self.commits[0])
+        assert isinstance(report, ReadOnlyReport)
+        assert loader is not CommitReportLoader.loader(self.info)
+
+    async def test_load_commit_without_report(self):
+        commit = CommitFactory(repository=self.repository, _report=None)
+        loader = CommitReportLoader.loader(self.info)
+        reports = await asyncio.gather(
+            loader.load(commit), loader.load(self.commits[0])
+        )
+        assert reports[0] is None
+        assert reports[1] is not None
@@ -11,7 +11,7 @@ from timeseries.models import Interval
 from .helper import GraphQLTestHelper
 
 
-@patch("timeseries.helpers.repository_coverage_measurements_with_fallback")
+@patch("timeseries.helpers.repositories_coverage_measurements_with_fallback")
 class TestMeasurement(TransactionTestCase, GraphQLTestHelper):
     def _request(self, variables=None):
         query = f"""
@@ -49,12 +49,14 @@ class TestMeasurement(TransactionTestCase, GraphQLTestHelper):
 
     @override_settings(TIMESERIES_ENABLED=True)
     def test_measurements_timeseries_enabled(
-        self, repository_coverage_measurements_with_fallback
+        self, repositories_coverage_measurements_with_fallback
     ):
-        repository_coverage_measurements_with_fallback.return_value = [
-            {"timestamp_bin": datetime(2022, 1, 1), "min": 1, "max": 2, "avg": 1.5},
-            {"timestamp_bin": datetime(2022, 1, 2), "min": 3, "max": 4, "avg": 3.5},
-        ]
+        repositories_coverage_measurements_with_fallback.return_value = {
+            self.repo.pk: [
+                {"timestamp_bin": datetime(2022, 1, 1), "min": 1, "max": 2, "avg": 1.5},
+                {"timestamp_bin": datetime(2022, 1, 2), "min": 3, "max": 4, "avg": 3.5},
+            ]
+        }
 
         assert self._request() == [
             {"timestamp": "2022-01-01T00:00:00", "min": 1.0, "max": 2.0, "avg": 1.5},
@@ -67,8 +69,8 @@ class TestMeasurement(TransactionTestCase, GraphQLTestHelper):
             },
         ]
 
-        repository_coverage_measurements_with_fallback.assert_called_once_with(
-            self.repo,
+        repositories_coverage_measurements_with_fallback.assert_called_once_with(
+            [self.repo],
             Interval.INTERVAL_1_DAY,
             start_date=datetime(2022, 1, 1, 0, 0, 0, tzinfo=timezone.utc),
             end_date=datetime(2022, 1, 3, 0, 0, 0, tzinfo=timezone.utc),
@@ -77,12 +79,14 @@ class TestMeasurement(TransactionTestCase, GraphQLTestHelper):
 
     @override_settings(TIMESERIES_ENABLED=False)
     def test_measurements_timeseries_not_enabled(
-        self, repository_coverage_measurements_with_fallback
+        self, repositories_coverage_measurements_with_fallback
     ):
-        repository_coverage_measurements_with_fallback.return_value = [
-            {"timestamp_bin": datetime(2022, 1, 1), "min": 1, "max": 2, "avg": 1.5},
-            {"timestamp_bin": datetime(2022, 1, 2), "min": 3, "max": 4, "avg": 3.5},
-        ]
+        repositories_coverage_measurements_with_fallback.return_value = {
+            self.repo.pk: [
+                {"timestamp_bin": datetime(2022, 1, 1), "min": 1, "max": 2, "avg": 1.5},
+                {"timestamp_bin": datetime(2022, 1, 2), "min": 3, "max": 4, "avg": 3.5},
+            ]
+        }
 
         assert self._request() == [
             {"timestamp": "2022-01-01T00:00:00", "min": 1.0, "max": 2.0, "avg": 1.5},
@@ -95,8 +99,8 @@ class TestMeasurement(TransactionTestCase, GraphQLTestHelper):
             },
         ]
 
-        repository_coverage_measurements_with_fallback.assert_called_once_with(
-            self.repo,
+        repositories_coverage_measurements_with_fallback.assert_called_once_with(
+            [self.repo],
             Interval.INTERVAL_1_DAY,
             start_date=datetime(2022, 1, 1, 0, 0, 0, tzinfo=timezone.utc),
             end_date=datetime(2022, 1, 3, 0, 0, 0, tzinfo=timezone.utc),
@@ -104,14 +108,90 @@ class TestMeasurement(TransactionTestCase, GraphQLTestHelper):
         )
 
     @override_settings(TIMESERIES_ENABLED=True)
-    def test_measurements_branch(self, repository_coverage_measurements_with_fallback):
-        repository_coverage_measurements_with_fallback.return_value = []
+    def test_measurements_branch(
+        self, repositories_coverage_measurements_with_fallback
+    ):
+        repositories_coverage_measurements_with_fallback.return_value = {
+            self.repo.pk: []
+        }
         self._request(variables={"branch": "foo"})
 
-        repository_coverage_measurements_with_fallback.assert_called_once_with(
-            self.repo,
+        repositories_coverage_measurements_with_fallback.assert_called_once_with(
+            [self.repo],
             Interval.INTERVAL_1_DAY,
             start_date=datetime(2022, 1, 1, 0, 0, 0, tzinfo=timezone.utc),
             end_date=datetime(2022, 1, 3, 0, 0, 0, tzinfo=timezone.utc),
             branch="foo",
         )
+
+    @override_settings(TIMESERIES_ENABLED=True)
+    def test_measurements_many_repositories(
+        self, repositories_coverage_measurements_with_fallback
+    ):
+        other_repo = RepositoryFactory(
+            name="other-repo",
+            author=self.org,
+            private=True,
+        )
+        self.owner.permission = [self.repo.pk, other_repo.pk]
+        self.owner.save()
+
+        repositories_coverage_measurements_with_fallback.return_value = {
+            self.repo.pk: [
+                {"timestamp_bin": datetime(2022, 1, 1), "min": 1, "max": 2, "avg": 1.5},
+            ],
+            other_repo.pk: [
+                {"timestamp_bin": datetime(2022, 1, 2), "min": 3, "max": 4, "avg": 3.5},
+            ],
+        }
+
+        query = f"""
+            query Measurements {{
+                owner(username: "{self.org.username}") {{
+                    repositories(ordering: NAME, orderingDirection: ASC) {{
+                        edges {{
+                            node {{
+                                name
+                                measurements(
+                                    interval: INTERVAL_1_DAY
+                                    after: "2022-01-01"
+                                    before: "2022-01-02"
+                                ) {{
+                                    timestamp
+                                    avg
+                                }}
+                            }}
+                        }}
+                    }}
+                }}
+            }}
+        """
+        data = self.gql_request(query, owner=self.owner)
+        assert data["owner"]["repositories"]["edges"] == [
+            {
+                "node": {
+                    "name": "other-repo",
+                    "measurements": [
+                        {"timestamp": "2022-01-01T00:00:00+00:00", "avg": None},
+                        {"timestamp": "2022-01-02T00:00:00", "avg": 3.5},
+                    ],
+                }
+            },
+            {
+                "node": {
+                    "name": "test-repo",
+                    "measurements": [
+                        {"timestamp": "2022-01-01T00:00:00", "avg": 1.5},
+                        {"timestamp": "2022-01-02T00:00:00+00:00", "avg": None},
+                    ],
+                }
+            },
+        ]
+
+        # the measurements of both repositories are loaded at once
+        repositories_coverage_measurements_with_fallback.assert_called_once()
+        repositories = repositories_coverage_measurements_with_fallback.call_args[0][0]
+        assert {repository.pk for repository in repositories} == {
+            self.repo.pk,
+            other_repo.pk,
+        }
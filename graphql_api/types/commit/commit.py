@@ -5,7 +5,6 @@ from ariadne import ObjectType, convert_kwargs_to_snake_case
 
 import services.components as components
 import services.path as path_service
-import services.report as report_service
 from codecov.db import sync_to_async
 from core.models import Commit
 from graphql_api.actions.commits import commit_uploads
@@ -14,6 +13,7 @@ from graphql_api.actions.path_contents import sort_path_contents
 from graphql_api.dataloader.commit import CommitLoader
 from graphql_api.dataloader.comparison import ComparisonLoader
 from graphql_api.dataloader.owner import OwnerLoader
+from graphql_api.dataloader.report import CommitReportLoader
 from graphql_api.helpers.connection import (
     queryset_to_connection,
     queryset_to_connection_sync,
@@ -36,9 +36,14 @@ commit_bindable.set_alias("branchName", "branch")
 
 
 @commit_bindable.field("coverageFile")
+async def resolve_file(commit, info, path, flags=None):
+    report = await CommitReportLoader.loader(info).load(commit)
+    return await _resolve_file(commit, report, path, flags)
+
+
 @sync_to_async
-def resolve_file(commit, info, path, flags=None):
-    commit_report = commit.full_report.filter(flags=flags)
+def _resolve_file(commit, report, path, flags):
+    commit_report = report.filter(flags=flags)
     file_report = commit_report.get(path)
 
     return {
@@ -114,7 +119,6 @@ async def resolve_compare_with_parent(commit: Commit, info, **kwargs):
         return comparison_error
 
     if commit_comparison and commit_comparison.is_processed:
-
         current_owner = info.context["request"].current_owner
         parent_commit = await CommitLoader.loader(info, commit.repository_id).load(
             commit.parent_commit_id
@@ -129,9 +133,9 @@ async def resolve_compare_with_parent(commit: Commit, info, **kwargs):
 
 
 @commit_bindable.field("flagNames")
-@sync_to_async
-def resolve_flags(commit, info, **kwargs):
-    return commit.full_report.flags.keys()
+async def resolve_flags(commit, info, **kwargs):
+    report = await CommitReportLoader.loader(info).load(commit)
+    return report.flags.keys()
 
 
 @commit_bindable.field("criticalFiles")
@@ -149,8 +153,7 @@ def resolve_critical_files(commit: Commit, info, **kwargs) -> List[CriticalFile]
 
 @commit_bindable.field("pathContents")
 @convert_kwargs_to_snake_case
-@sync_to_async
-def resolve_path_contents(commit: Commit, info, path: str = None, filters=None):
+async def resolve_path_contents(commit: Commit, info, path: str = None, filters=None):
     """
     The file directory tree is a list of all the files and directories
     extracted from the commit report of the latest, head commit.
@@ -160,9 +163,14 @@ def resolve_path_contents(commit: Commit, info, path: str = None, filters=None):
     current_owner = info.context["request"].current_owner
 
     # TODO: Might need to add reports here filtered by flags in the future
-    commit_report = report_service.build_report_from_commit(
-        commit, report_class=ReadOnlyReport
+    commit_report = await CommitReportLoader.loader(info, ReadOnlyReport).load(commit)
+    return await _resolve_path_contents(
+        commit, commit_report, current_owner, path, filters
     )
+
+
+@sync_to_async
+def _resolve_path_contents(commit, commit_report, current_owner, path, filters):
     if not commit_report:
         return MissingHeadReport()
 
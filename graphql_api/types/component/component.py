@@ -5,7 +5,8 @@ from shared.reports.types import ReportTotals
 
 from codecov.db import sync_to_async
 from core.models import Commit
-from services.components import Component, component_filtered_report
+from graphql_api.dataloader.report import CommitReportLoader
+from services.components import Component, component_filtered_totals
 
 component_bindable = ObjectType("Component")
 
@@ -21,9 +22,12 @@ def resolve_name(component: Component, info) -> str:
 
 
 @component_bindable.field("totals")
-@sync_to_async
-def resolve_totals(component: Component, info) -> Optional[ReportTotals]:
+async def resolve_totals(component: Component, info) -> Optional[ReportTotals]:
     commit: Commit = info.context["component_commit"]
-    report = commit.full_report
-    filtered_report = component_filtered_report(report, component)
-    return filtered_report.totals
+    report = await CommitReportLoader.loader(info).load(commit)
+    return await _component_totals(report, component)
+
+
+@sync_to_async
+def _component_totals(report, component: Component) -> Optional[ReportTotals]:
+    return component_filtered_totals(report, component)
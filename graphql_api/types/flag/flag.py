@@ -45,6 +45,9 @@ def resolve_percent_change(flag: RepositoryFlag, info) -> float:
 def resolve_measurements(
     flag: RepositoryFlag, info, interval: Interval, after: datetime, before: datetime
 ) -> Iterable[MeasurementSummary]:
+    if aligned := info.context.get("flag_aligned_measurements"):
+        return aligned.measurements(flag.pk)
+
     measurements = info.context["flag_measurements"].get(flag.pk, [])
     if len(measurements) == 0:
         return []
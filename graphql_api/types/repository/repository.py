@@ -6,12 +6,12 @@ from ariadne import ObjectType, UnionType, convert_kwargs_to_snake_case
 from django.conf import settings
 from django.forms.utils import from_current_timezone
 
-import timeseries.helpers as timeseries_helpers
 from codecov.db import sync_to_async
 from core.models import Repository
 from graphql_api.actions.commits import repo_commits
 from graphql_api.actions.flags import flag_measurements, flags_for_repo
 from graphql_api.dataloader.commit import CommitLoader
+from graphql_api.dataloader.measurements import RepositoryMeasurementsLoader
 from graphql_api.dataloader.owner import OwnerLoader
 from graphql_api.helpers.connection import (
     queryset_to_connection,
@@ -21,7 +21,7 @@ from graphql_api.helpers.lookahead import lookahead
 from graphql_api.types.enums import OrderingDirection
 from graphql_api.types.errors.errors import NotFoundError, OwnerNotActivatedError
 from services.profiling import CriticalFile, ProfilingSummary
-from timeseries.helpers import fill_sparse_measurements
+from timeseries.helpers import align_sparse_measurements, fill_sparse_measurements
 from timeseries.models import Dataset, Interval, MeasurementName, MeasurementSummary
 
 repository_bindable = ObjectType("Repository")
@@ -226,9 +226,14 @@ def resolve_flags(
 
             flag_ids = [edge["node"].pk for edge in connection.edges]
 
-            info.context["flag_measurements"] = flag_measurements(
+            measurements = flag_measurements(
                 repository, flag_ids, interval, after, before
             )
+            info.context["flag_measurements"] = measurements
+            # filled in for all the flags at once
+            info.context["flag_aligned_measurements"] = align_sparse_measurements(
+                measurements, interval, after, before
+            )
         else:
             info.context["flag_measurements"] = {}
 
@@ -273,8 +278,7 @@ def resolve_flags_measurements_backfilled(repository: Repository, info) -> bool:
 
 
 @repository_bindable.field("measurements")
-@sync_to_async
-def resolve_measurements(
+async def resolve_measurements(
     repository: Repository,
     info,
     interval: Interval,
@@ -282,14 +286,11 @@ def resolve_measurements(
     after: Optional[datetime] = None,
     branch: Optional[str] = None,
 ) -> Iterable[MeasurementSummary]:
+    # batched with the measurements of the other repositories being resolved
+    loader = RepositoryMeasurementsLoader.loader(info, interval, after, before, branch)
+    measurements = await loader.load(repository)
     return fill_sparse_measurements(
-        timeseries_helpers.repository_coverage_measurements_with_fallback(
-            repository,
-            interval,
-            start_date=after,
-            end_date=before,
-            branch=branch,
-        ),
+        measurements,
         interval,
         start_date=after,
         end_date=before,
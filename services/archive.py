@@ -1,5 +1,6 @@
 import json
 import logging
+import zlib
 from base64 import b16encode
 from enum import Enum
 from hashlib import md5
@@ -8,6 +9,9 @@ from uuid import uuid4
 from django.conf import settings
 from django.utils import timezone
 from minio import Minio
+from minio.error import S3Error
+from shared.reports.resources import END_OF_CHUNK
+from shared.storage.exceptions import FileNotInStorageError
 from shared.utils.ReportEncoder import ReportEncoder
 
 from services.storage import StorageService
@@ -15,6 +19,15 @@ from utils.config import get_config
 
 log = logging.getLogger(__name__)
 
+# optional header preceding the first chunk (see `shared.reports.resources`)
+END_OF_HEADER = "\n<<<<< end_of_header >>>>>\n"
+
+# size of the reads when streaming files from storage
+STREAM_READ_SIZE = 64 * 1024
+
+# size of the parts of the files streamed to storage (the minimum allowed by S3)
+STREAM_WRITE_PART_SIZE = 5 * 1024 * 1024
+
 
 class MinioEndpoints(Enum):
     chunks = "{version}/repos/{repo_hash}/commits/{commitid}/chunks.txt"
@@ -182,6 +195,33 @@ class ArchiveService(object):
 
         return path
 
+    """
+    Same as `write_raw_upload` for data given as an iterable of blocks of bytes,
+    streamed to storage (in parts of `STREAM_WRITE_PART_SIZE`) rather than held in
+    memory.  `gzipped` data is stored with a gzip content encoding.
+    Returns the path it writes.
+    """
+
+    def write_raw_upload_stream(self, commit_sha, report_id, blocks, gzipped=False):
+        path = MinioEndpoints.raw.get_path(
+            date=timezone.now().strftime("%Y-%m-%d"),
+            repo_hash=self.storage_hash,
+            commit_sha=commit_sha,
+            reportid=report_id,
+        )
+
+        self.storage.minio_client.put_object(
+            self.root,
+            path,
+            BlocksReader(blocks),
+            length=-1,
+            part_size=STREAM_WRITE_PART_SIZE,
+            content_type="text/plain",
+            metadata={"Content-Encoding": "gzip"} if gzipped else None,
+        )
+
+        return path
+
     """
     Convenience method to write a chunks.txt file to storage.
     """
@@ -230,6 +270,63 @@ class ArchiveService(object):
         log.info("Downloading chunks from path %s for commit %s", path, commit_sha)
         return self.read_file(path)
 
+    """
+    Convenience method to read a single chunk section (the coverage lines for
+    one file, at the given `file_index`) out of a chunks file. The chunks file
+    is streamed and the download stops as soon as the section has been read.
+    Returns None if the chunks file has fewer sections than `chunk_index`.
+    """
+
+    def read_chunk(self, commit_sha, chunk_index):
+        path = MinioEndpoints.chunks.get_path(
+            version="v4", repo_hash=self.storage_hash, commitid=commit_sha
+        )
+        log.info(
+            "Streaming chunk %s from path %s for commit %s",
+            chunk_index,
+            path,
+            commit_sha,
+        )
+        blocks = self.stream_file(path)
+        try:
+            sections = iter_sections(blocks, separator=END_OF_CHUNK.encode())
+            for index, section in enumerate(sections):
+                if index == 0:
+                    _, header, first_chunk = section.partition(END_OF_HEADER.encode())
+                    if header:
+                        section = first_chunk
+                if index == chunk_index:
+                    return section.decode()
+            return None
+        finally:
+            # stops the download if we didn't need to read the whole file
+            blocks.close()
+
+    """
+    Generic method to stream a file from the archive in blocks of bytes.
+    Files are stored gzipped (with a gzip content encoding) by `write_file`,
+    the blocks are decompressed on the fly so that callers always get the
+    file's contents.
+    """
+
+    def stream_file(self, path):
+        try:
+            response = self.storage.minio_client.get_object(self.root, path)
+        except S3Error as e:
+            if e.code == "NoSuchKey":
+                raise FileNotInStorageError(
+                    f"File {path} does not exist in {self.root}"
+                )
+            raise
+        try:
+            blocks = response.stream(STREAM_READ_SIZE, decode_content=False)
+            if response.headers.get("Content-Encoding") == "gzip":
+                blocks = gunzip_blocks(blocks)
+            yield from blocks
+        finally:
+            response.close()
+            response.release_conn()
+
     """
     Delete a chunk file from the archive
     """
@@ -257,3 +354,65 @@ class ArchiveService(object):
             expires = self.ttl
 
         return self.storage.create_presigned_put(self.root, path, expires)
+
+
+class BlocksReader:
+    """
+    File-like object reading from an iterable of blocks of bytes.
+    """
+
+    def __init__(self, blocks):
+        self.blocks = iter(blocks)
+        self.buffer = bytearray()
+
+    def read(self, size=-1):
+        while size < 0 or len(self.buffer) < size:
+            block = next(self.blocks, None)
+            if block is None:
+                break
+            self.buffer.extend(block)
+
+        if size < 0:
+            size = len(self.buffer)
+        data = bytes(self.buffer[:size])
+        del self.buffer[:size]
+        return data
+
+
+def gzip_blocks(blocks):
+    """
+    Gzip-compresses a stream of byte blocks on the fly.
+    """
+    compressor = zlib.compressobj(wbits=zlib.MAX_WBITS | 16)
+    for block in blocks:
+        if compressed := compressor.compress(block):
+            yield compressed
+    yield compressor.flush()
+
+
+def gunzip_blocks(blocks):
+    """
+    Decompresses a stream of gzipped byte blocks on the fly.
+    """
+    decompressor = zlib.decompressobj(wbits=zlib.MAX_WBITS | 16)
+    for block in blocks:
+        if decompressed := decompressor.decompress(block):
+            yield decompressed
+    yield decompressor.flush()
+
+
+def iter_sections(blocks, separator: bytes):
+    """
+    Splits a stream of byte blocks on `separator`, yielding each section as soon
+    as it is complete. Separators spanning multiple blocks are handled.
+    """
+    buffer = bytearray()
+    for block in blocks:
+        # the separator may start in the unsearched tail of the previous block
+        search_from = max(len(buffer) - len(separator) + 1, 0)
+        buffer.extend(block)
+        while (index := buffer.find(separator, search_from)) != -1:
+            yield bytes(buffer[:index])
+            del buffer[: index + len(separator)]
+            search_from = 0
+    yield bytes(buffer)
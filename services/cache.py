@@ -0,0 +1,223 @@
+import logging
+import threading
+import zlib
+from collections import OrderedDict
+from typing import Callable, Optional
+
+import redis_lock
+from redis.exceptions import RedisError
+from shared.metrics import metrics
+
+from services.redis_configuration import get_redis_connection
+
+log = logging.getLogger(__name__)
+
+
+class LRUBytesCache:
+    """
+    In-process LRU cache bounded by the total size (in bytes) of its values.
+
+    Each entry is stored along with a `version`.  Looking up a key with a
+    different version than the one stored is treated as a miss and the stale
+    entry is dropped, which lets callers invalidate entries simply by passing
+    a newer version (ex. an `updated_at` timestamp).
+    """
+
+    def __init__(self, name: str, max_bytes: int):
+        self.name = name
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str, version: str) -> Optional[bytes]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            entry_version, value = entry
+            if entry_version != version:
+                self._remove(key)
+                metrics.incr(f"cache.{self.name}.local.invalidated")
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, version: str, value: bytes):
+        size = len(value)
+        if size > self.max_bytes:
+            # never evict the whole cache for a single huge value
+            return
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (version, value)
+            self.current_bytes += size
+            while self.current_bytes > self.max_bytes:
+                _, (_, evicted_value) = self._entries.popitem(last=False)
+                self.current_bytes -= len(evicted_value)
+                metrics.incr(f"cache.{self.name}.local.evicted")
+
+    def delete(self, key: str):
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+
+    def _remove(self, key: str):
+        _, value = self._entries.pop(key)
+        self.current_bytes -= len(value)
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class TieredCache:
+    """
+    Two-tier cache for large, immutable-per-version blobs:
+
+      1. an in-process `LRUBytesCache`
+      2. a shared redis tier holding a zlib-compressed copy of the value
+
+    Values are `bytes`.  A redis failure is logged and treated as a miss so that
+    the cache can never make a request fail.
+    """
+
+    VERSION_SEPARATOR = b"\n"
+
+    def __init__(
+        self,
+        name: str,
+        max_local_bytes: int,
+        redis_ttl: int,
+        redis_connection=None,
+    ):
+        self.name = name
+        self.redis_ttl = redis_ttl
+        self.local = LRUBytesCache(name, max_local_bytes)
+        self._redis = redis_connection
+
+    @property
+    def redis(self):
+        if self._redis is None:
+            self._redis = get_redis_connection()
+        return self._redis
+
+    def _redis_key(self, key: str) -> str:
+        return f"{self.name}/{key}"
+
+    def get(self, key: str, version: str) -> Optional[bytes]:
+        value = self.local.get(key, version)
+        if value is not None:
+            metrics.incr(f"cache.{self.name}.local.hit")
+            return value
+        metrics.incr(f"cache.{self.name}.local.miss")
+
+        value = self._get_from_redis(key, version)
+        if value is not None:
+            metrics.incr(f"cache.{self.name}.redis.hit")
+            self.local.set(key, version, value)
+            return value
+        metrics.incr(f"cache.{self.name}.redis.miss")
+        return None
+
+    def set(self, key: str, version: str, value: bytes):
+        self.local.set(key, version, value)
+        payload = version.encode() + self.VERSION_SEPARATOR + value
+        try:
+            self.redis.set(
+                self._redis_key(key), zlib.compress(payload), ex=self.redis_ttl
+            )
+        except (OSError, RedisError) as e:
+            log.warning(
+                "Error writing to redis cache",
+                extra=dict(cache=self.name, key=key, error=str(e)),
+            )
+
+    def get_or_set(
+        self, key: str, version: str, fn: Callable[[], bytes], lock_timeout: int = 30
+    ) -> bytes:
+        """
+        Returns the cached value, computing it with `fn` on a miss.
+
+        Computing the value is single-flighted through a redis lock: when several
+        workers miss on the same key, only one of them calls `fn` while the others
+        wait for it and read the value it cached. If the lock can't be acquired
+        within `lock_timeout` seconds the value is computed anyway.
+        """
+        value = self.get(key, version)
+        if value is not None:
+            return value
+
+        lock = redis_lock.Lock(
+            self.redis, self._redis_key(f"lock/{key}"), expire=lock_timeout
+        )
+        try:
+            acquired = lock.acquire(timeout=lock_timeout)
+        except (OSError, RedisError) as e:
+            log.warning(
+                "Error acquiring redis cache lock",
+                extra=dict(cache=self.name, key=key, error=str(e)),
+            )
+            acquired = False
+
+        if not acquired:
+            metrics.incr(f"cache.{self.name}.lock.failed")
+            value = fn()
+            self.set(key, version, value)
+            return value
+
+        try:
+            # another worker may have computed the value while we were waiting
+            value = self.get(key, version)
+            if value is None:
+                value = fn()
+                self.set(key, version, value)
+            return value
+        finally:
+            try:
+                lock.release()
+            except (redis_lock.NotAcquired, OSError, RedisError):
+                # the lock expired while computing the value
+                pass
+
+    def delete(self, key: str):
+        self.local.delete(key)
+        try:
+            self.redis.delete(self._redis_key(key))
+        except (OSError, RedisError) as e:
+            log.warning(
+                "Error deleting from redis cache",
+                extra=dict(cache=self.name, key=key, error=str(e)),
+            )
+
+    def _get_from_redis(self, key: str, version: str) -> Optional[bytes]:
+        try:
+            compressed = self.redis.get(self._redis_key(key))
+        except (OSError, RedisError) as e:
+            log.warning(
+                "Error reading from redis cache",
+                extra=dict(cache=self.name, key=key, error=str(e)),
+            )
+            return None
+        if compressed is None:
+            return None
+
+        try:
+            payload = zlib.decompress(compressed)
+        except zlib.error:
+            log.warning(
+                "Unable to decompress cached value",
+                extra=dict(cache=self.name, key=key),
+            )
+            return None
+
+        cached_version, _, value = payload.partition(self.VERSION_SEPARATOR)
+        if cached_version.decode() != version:
+            metrics.incr(f"cache.{self.name}.redis.invalidated")
+            return None
+        return value
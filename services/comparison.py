@@ -1,16 +1,18 @@
 import asyncio
-import copy
 import functools
 import json
 import logging
-from collections import Counter
+from collections import Counter, deque
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
 from dataclasses import dataclass, field
 from datetime import datetime
-from typing import List, Optional
+from itertools import islice
+from typing import Dict, List, Optional
 
 import minio
 import pytz
 from asgiref.sync import async_to_sync
+from django.conf import settings
 from django.db.models import Prefetch
 from django.utils.functional import cached_property
 from shared.helpers.yaml import walk
@@ -23,6 +25,8 @@ from core.models import Commit
 from reports.models import CommitReport, ReportDetails
 from services import ServiceException
 from services.archive import ArchiveService
+from services.cache import TieredCache
+from services.line_coverage import LineCoverage
 from services.redis_configuration import get_redis_connection
 from services.repo_providers import RepoProviderService
 from utils.config import get_config
@@ -35,6 +39,24 @@ redis = get_redis_connection()
 
 MAX_DIFF_SIZE = 170
 
+# number of file comparisons sent to a worker process at once
+PROCESS_POOL_CHUNK_SIZE = 16
+
+# bump when changing the format of cached git comparisons
+GIT_COMPARISON_CACHE_VERSION = "1"
+
+git_comparison_cache = TieredCache(
+    "git-comparison",
+    max_local_bytes=settings.GIT_COMPARISON_CACHE_MAX_LOCAL_BYTES,
+    redis_ttl=settings.GIT_COMPARISON_CACHE_REDIS_TTL,
+)
+
+comparison_report_cache = TieredCache(
+    "comparison-report",
+    max_local_bytes=settings.COMPARISON_REPORT_CACHE_MAX_LOCAL_BYTES,
+    redis_ttl=settings.COMPARISON_REPORT_CACHE_REDIS_TTL,
+)
+
 
 def _is_added(line_value):
     return line_value and line_value[0] == "+"
@@ -96,14 +118,16 @@ class FileComparisonTraverseManager:
             }
 
             The segment["header"], also known as the hunk-header (https://en.wikipedia.org/wiki/Diff#Unified_format),
-            is an array of strings, which is why we have to use the int() builtin function
-            to compare with self.head_ln and self.base_ln. It is used by this algorithm to
+            is an array of strings. The headers are parsed to integers once, up front, and are used
+            by this algorithm to
               1. Set initial values for the self.base_ln and self.head_ln line-counters, and
               2. Detect if self.base and/or self.head refer to lines in the diff at any given time
 
             This algorithm relies on the fact that segments are returned in ascending
             order for each file, which means that the "nearest" segment to the current line
-            being traversed is located at segments[0].
+            being traversed is the one at the segment cursor. Segments are never mutated: a
+            cursor over the segments and another over the current segment's lines are advanced
+            instead of popping values off of them.
 
         src -- this is the source code of the file at the head-reference, where each line
             is a cell in the array. If we are not traversing a segment, and src is provided,
@@ -111,83 +135,109 @@ class FileComparisonTraverseManager:
         """
         self.head_file_eof = head_file_eof
         self.base_file_eof = base_file_eof
-        self.segments = copy.deepcopy(segments)
+        self.segments = segments
         self.src = src
 
+        # (base start, base end, head start, head end) - ends are exclusive
+        self._headers = []
+        for segment in segments:
+            header = segment["header"]
+            base_start, head_start = int(header[0]), int(header[2])
+            self._headers.append(
+                (
+                    base_start,
+                    base_start + int(header[1] or 1),
+                    head_start,
+                    head_start + int(header[3] or 1),
+                )
+            )
+        self._segment_idx = 0
+        self._line_idx = 0
+
         if self.segments:
             # Base offsets can be 0 if files are added or removed
-            self.base_ln = min(1, int(self.segments[0]["header"][0]))
-            self.head_ln = min(1, int(self.segments[0]["header"][2]))
+            self.base_ln = min(1, self._headers[0][0])
+            self.head_ln = min(1, self._headers[0][2])
         else:
             self.base_ln, self.head_ln = 1, 1
 
+    def _has_segments(self):
+        return self._segment_idx < len(self.segments)
+
     def traverse_finished(self):
-        if self.segments:
+        if self._has_segments():
             return False
         if self.src:
             return self.head_ln > len(self.src)
         return self.head_ln >= self.head_file_eof and self.base_ln >= self.base_file_eof
 
     def traversing_diff(self):
-        if self.segments == []:
+        if not self._has_segments():
             return False
 
-        base_ln_within_offset = (
-            int(self.segments[0]["header"][0])
-            <= self.base_ln
-            < int(self.segments[0]["header"][0])
-            + int(self.segments[0]["header"][1] or 1)
-        )
-        head_ln_within_offset = (
-            int(self.segments[0]["header"][2])
-            <= self.head_ln
-            < int(self.segments[0]["header"][2])
-            + int(self.segments[0]["header"][3] or 1)
+        base_start, base_end, head_start, head_end = self._headers[self._segment_idx]
+        return (
+            base_start <= self.base_ln < base_end
+            or head_start <= self.head_ln < head_end
         )
-        return base_ln_within_offset or head_ln_within_offset
 
     def pop_line(self):
         if self.traversing_diff():
-            return self.segments[0]["lines"].pop(0)
+            line = self.segments[self._segment_idx]["lines"][self._line_idx]
+            self._line_idx += 1
+            return line
 
         if self.src:
             return self.src[self.head_ln - 1]
 
-    def apply(self, visitors):
+    def traverse(self):
         """
-        Traverses the lines in a file comparison while accounting for the diff.
+        Generator that traverses the lines in a file comparison while accounting for
+        the diff, yielding (base_ln, head_ln, line_value, is_diff) for each line.
         If a line only appears in the base file (removed in head), it is prefixed
         with '-', and we only increment self.base_ln. If a line only appears in
         the head file, it is newly added and prefixed with '+', and we only
         increment self.head_ln.
-
-        visitors -- A list of visitors applied to each line.
         """
         while not self.traverse_finished():
             line_value = self.pop_line()
             is_diff = self.traversing_diff()
+            added = is_diff and _is_added(line_value)
+            removed = is_diff and _is_removed(line_value)
+
+            yield (
+                None if added else self.base_ln,
+                None if removed else self.head_ln,
+                line_value,
+                is_diff,  # TODO(pierce): remove when upon combining diff + changes tabs in UI
+            )
 
-            for visitor in visitors:
-                visitor(
-                    None if is_diff and _is_added(line_value) else self.base_ln,
-                    None if is_diff and _is_removed(line_value) else self.head_ln,
-                    line_value,
-                    is_diff,  # TODO(pierce): remove when upon combining diff + changes tabs in UI
-                )
-
-            if is_diff and _is_added(line_value):
+            if added:
                 self.head_ln += 1
-            elif is_diff and _is_removed(line_value):
+            elif removed:
                 self.base_ln += 1
             else:
                 self.head_ln += 1
                 self.base_ln += 1
 
-            if self.segments and not self.segments[0]["lines"]:
+            if self._has_segments() and self._line_idx >= len(
+                self.segments[self._segment_idx]["lines"]
+            ):
                 # Either the segment has no lines (and is therefore of no use)
-                # or all lines have been popped and visited, which means we are
+                # or all lines have been visited, which means we are
                 # done traversing it
-                self.segments.pop(0)
+                self._segment_idx += 1
+                self._line_idx = 0
+
+    def apply(self, visitors):
+        """
+        Applies each visitor to every line yielded by '.traverse()'.
+
+        visitors -- A list of visitors applied to each line.
+        """
+        for base_ln, head_ln, line_value, is_diff in self.traverse():
+            for visitor in visitors:
+                visitor(base_ln, head_ln, line_value, is_diff)
 
 
 class FileComparisonVisitor:
@@ -572,6 +622,22 @@ class FileComparison:
         This limitation improves performance by limiting searching for changes to only files that
         have them.
         """
+        segments = (
+            self.diff_data["segments"]
+            if self.diff_data and "segments" in self.diff_data
+            else []
+        )
+        should_traverse = (
+            self.diff_data or self.src or self.should_search_for_changes is not False
+        )
+        if should_traverse and not segments and not self.src:
+            # Without segments or src no line comparisons are created and base
+            # and head lines line up, so the change summary can be computed from
+            # the compact line coverage of both files without traversing them.
+            base_coverage = LineCoverage.from_report_file(self.base_file)
+            head_coverage = LineCoverage.from_report_file(self.head_file)
+            return base_coverage.change_summary(head_coverage), []
+
         change_summary_visitor = CreateChangeSummaryVisitor(
             self.base_file, self.head_file
         )
@@ -579,13 +645,11 @@ class FileComparison:
             self.base_file, self.head_file
         )
 
-        if self.diff_data or self.src or self.should_search_for_changes is not False:
+        if should_traverse:
             FileComparisonTraverseManager(
                 head_file_eof=self.head_file.eof if self.head_file is not None else 0,
                 base_file_eof=self.base_file.eof if self.base_file is not None else 0,
-                segments=self.diff_data["segments"]
-                if self.diff_data and "segments" in self.diff_data
-                else [],
+                segments=segments,
                 src=self.src,
             ).apply([change_summary_visitor, create_lines_visitor])
 
@@ -610,6 +674,70 @@ class FileComparison:
         return Segment.segments(self)
 
 
+@functools.lru_cache(maxsize=1)
+def get_files_executor() -> Optional[Executor]:
+    """
+    Returns the executor configured to compute file comparisons in parallel, or
+    None if file comparisons should be computed serially (the default).
+    """
+    executor_type = settings.COMPARISON_FILES_EXECUTOR
+    workers = settings.COMPARISON_FILES_WORKERS
+    if executor_type == "thread":
+        return ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="comparison-files"
+        )
+    if executor_type == "process":
+        return ProcessPoolExecutor(max_workers=workers)
+    return None
+
+
+def _calculate_changes_and_lines(file_comparisons):
+    return [
+        file_comparison._calculated_changes_and_lines
+        for file_comparison in file_comparisons
+    ]
+
+
+def _with_results(file_comparisons, future):
+    for file_comparison, result in zip(file_comparisons, future.result()):
+        # with a process pool the computation happened on a copy of the file
+        # comparison, so we store the result on the original one
+        file_comparison.__dict__["_calculated_changes_and_lines"] = result
+        yield file_comparison
+
+
+def calculate_file_comparisons(file_comparisons, executor: Executor):
+    """
+    Computes the change summary and line comparisons of the given file comparisons
+    in the executor, yielding the file comparisons in their original order as
+    soon as their results are available.
+
+    Only `2 * COMPARISON_FILES_WORKERS` chunks of file comparisons are in the
+    executor at once: the next ones are read from `file_comparisons` as results
+    are yielded, so the file comparisons of a large comparison are never all
+    built or computed ahead of the consumer.
+    """
+    chunksize = (
+        PROCESS_POOL_CHUNK_SIZE if isinstance(executor, ProcessPoolExecutor) else 1
+    )
+    max_pending = 2 * settings.COMPARISON_FILES_WORKERS
+    file_comparisons = iter(file_comparisons)
+    pending = deque()
+    try:
+        for chunk in iter(lambda: list(islice(file_comparisons, chunksize)), []):
+            pending.append(
+                (chunk, executor.submit(_calculate_changes_and_lines, chunk))
+            )
+            if len(pending) >= max_pending:
+                yield from _with_results(*pending.popleft())
+        while pending:
+            yield from _with_results(*pending.popleft())
+    finally:
+        # the consumer stopped early
+        for _, future in pending:
+            future.cancel()
+
+
 class Comparison(object):
     def __init__(self, user, base_commit, head_commit):
         # TODO: rename to owner
@@ -632,8 +760,14 @@ class Comparison(object):
 
     @cached_property
     def files(self):
-        for file_name in self.head_report.files:
-            yield self.get_file_comparison(file_name)
+        file_comparisons = (
+            self.get_file_comparison(file_name) for file_name in self.head_report.files
+        )
+        executor = get_files_executor()
+        if executor is None:
+            yield from file_comparisons
+        else:
+            yield from calculate_file_comparisons(file_comparisons, executor)
 
     def get_file_comparison(self, file_name, with_src=False, bypass_max_diff=False):
         head_file = self.head_report.get(file_name)
@@ -745,7 +879,30 @@ class Comparison(object):
         """
         Fetches comparison and reverse comparison concurrently, then
         caches the result. Returns (comparison, reverse_comparison).
+
+        Commit SHAs are immutable so, when enabled, the result is also cached in
+        `git_comparison_cache` and shared between processes.
         """
+        if not settings.GIT_COMPARISON_CACHE_ENABLED:
+            return self._fetch_comparison_and_reverse_comparison_from_provider()
+
+        key = "/".join(
+            (
+                str(self.base_commit.repository_id),
+                self.base_commit.commitid,
+                self.head_commit.commitid,
+            )
+        )
+        data = git_comparison_cache.get_or_set(
+            key,
+            GIT_COMPARISON_CACHE_VERSION,
+            lambda: json.dumps(
+                self._fetch_comparison_and_reverse_comparison_from_provider()
+            ).encode(),
+        )
+        return json.loads(data)
+
+    def _fetch_comparison_and_reverse_comparison_from_provider(self):
         adapter = RepoProviderService().get_adapter(
             self.user, self.base_commit.repository
         )
@@ -953,10 +1110,16 @@ class ComparisonReport(object):
             ImpactedFile.create(**data) for data in comparison_data.get("files", [])
         ]
 
-    def impacted_file(self, path: str) -> Optional[ImpactedFile]:
+    @cached_property
+    def _files_by_head_name(self) -> Dict[str, ImpactedFile]:
+        files_by_head_name = {}
         for file in self.files:
-            if file.head_name == path:
-                return file
+            # the first file wins, as when scanning the files in order
+            files_by_head_name.setdefault(file.head_name, file)
+        return files_by_head_name
+
+    def impacted_file(self, path: str) -> Optional[ImpactedFile]:
+        return self._files_by_head_name.get(path)
 
     @cached_property
     def impacted_files(self) -> List[ImpactedFile]:
@@ -974,10 +1137,17 @@ class ComparisonReport(object):
         """
         Fetches the raw comparison data from storage
         """
-        repository = self.commit_comparison.compare_commit.repository
-        archive_service = ArchiveService(repository)
         try:
-            data = archive_service.read_file(self.commit_comparison.report_storage_path)
+            if settings.COMPARISON_REPORT_CACHE_ENABLED:
+                # the data is rewritten by the worker whenever it recomputes the
+                # comparison, which bumps the commit comparison's `updated_at`
+                data = comparison_report_cache.get_or_set(
+                    self.commit_comparison.report_storage_path,
+                    self.commit_comparison.updated_at.isoformat(),
+                    lambda: self._read_raw_comparison_data().encode(),
+                )
+            else:
+                data = self._read_raw_comparison_data()
             return json.loads(data)
         except:
             log.error(
@@ -985,6 +1155,11 @@ class ComparisonReport(object):
             )
             return {}
 
+    def _read_raw_comparison_data(self) -> str:
+        repository = self.commit_comparison.compare_commit.repository
+        archive_service = ArchiveService(repository)
+        return archive_service.read_file(self.commit_comparison.report_storage_path)
+
 
 class PullRequestComparison(Comparison):
     """
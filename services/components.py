@@ -1,4 +1,4 @@
-from typing import List
+from typing import List, Tuple
 
 from django.utils.functional import cached_property
 from shared.components import Component
@@ -22,12 +22,49 @@ def commit_components(commit: Commit, owner: Owner) -> List[Component]:
     return yaml.get_components()
 
 
+def _component_key(component: Component) -> Tuple:
+    # components are identified by their patterns (rather than by their id) since
+    # the yaml defining them can change between commits
+    return (
+        component.component_id,
+        tuple(component.paths or ()),
+        tuple(component.flag_regexes or ()),
+    )
+
+
 def component_filtered_report(report: Report, component: Component) -> FilteredReport:
     """
     Filter a report such that the totals, etc. are only pertaining to the given component.
+
+    The filtered reports are built once per report and component (their flags and
+    paths matched once) and kept on the report.
     """
-    flags = component.get_matching_flags(report.flags.keys())
-    return report.filter(flags=flags, paths=component.paths)
+    filtered_reports = getattr(report, "_component_reports", None)
+    if filtered_reports is None:
+        filtered_reports = {}
+        report._component_reports = filtered_reports
+
+    key = _component_key(component)
+    if key not in filtered_reports:
+        flags = component.get_matching_flags(report.flags.keys())
+        filtered_reports[key] = report.filter(flags=flags, paths=component.paths)
+    return filtered_reports[key]
+
+
+def component_filtered_totals(report: Report, component: Component) -> ReportTotals:
+    """
+    The totals of the report filtered by the given component, computed once per
+    report and component.
+    """
+    totals = getattr(report, "_component_totals", None)
+    if totals is None:
+        totals = {}
+        report._component_totals = totals
+
+    key = _component_key(component)
+    if key not in totals:
+        totals[key] = component_filtered_report(report, component).totals
+    return totals[key]
 
 
 class ComponentComparison:
@@ -45,11 +82,11 @@ class ComponentComparison:
 
     @cached_property
     def base_totals(self) -> ReportTotals:
-        return self.base_report.totals
+        return component_filtered_totals(self.comparison.base_report, self.component)
 
     @cached_property
     def head_totals(self) -> ReportTotals:
-        return self.head_report.totals
+        return component_filtered_totals(self.comparison.head_report, self.component)
 
     @cached_property
     def patch_totals(self) -> ReportTotals:
@@ -0,0 +1,118 @@
+import json
+import re
+from collections import Counter
+from itertools import product
+from typing import Optional, Sequence
+
+from shared.reports.resources import ReportFile
+from shared.utils.merge import LineType, line_type
+
+# values stored in `LineCoverage.types`
+COVERAGE_TYPE_CODES = {LineType.hit: 0, LineType.miss: 1, LineType.partial: 2}
+NO_COVERAGE = 3
+
+SUMMARY_KEYS = {
+    COVERAGE_TYPE_CODES[LineType.hit]: "hits",
+    COVERAGE_TYPE_CODES[LineType.miss]: "misses",
+    COVERAGE_TYPE_CODES[LineType.partial]: "partials",
+}
+
+# the (base type, head type) pairs of the lines whose coverage changed
+CHANGED_TYPES = [
+    (base_type, head_type)
+    for base_type, head_type in product(SUMMARY_KEYS, repeat=2)
+    if base_type != head_type
+]
+
+
+# the coverage value (first item) of a line stored as JSON text, or an empty
+# string for the lines without coverage, matched at the start of every line
+COVERAGE_VALUE = re.compile(r"^(?:\[([^,\]\n]*))?", re.MULTILINE)
+
+
+class _TypeCodes(dict):
+    """
+    Type codes of the coverage values (as JSON text) found in a file's lines.
+    """
+
+    def __missing__(self, value: str) -> int:
+        code = self.of_coverage(json.loads(value)) if value else NO_COVERAGE
+        self[value] = code
+        return code
+
+    @staticmethod
+    def of_coverage(coverage) -> int:
+        return COVERAGE_TYPE_CODES.get(line_type(coverage), NO_COVERAGE)
+
+    def of_line(self, line) -> int:
+        if not line:
+            return NO_COVERAGE
+        if type(line) is list:
+            return self.of_coverage(line[0])
+        return self[COVERAGE_VALUE.match(line).group(1) or ""]
+
+
+class LineCoverage:
+    """
+    Compact representation of the coverage types of the lines of a single file.
+
+    `ReportFile` keeps one list (or JSON string) per line, this stores the
+    coverage type code of each line (see `COVERAGE_TYPE_CODES`, or NO_COVERAGE)
+    in a single `bytes`, indexed by `line number - 1`, so that files can be
+    compared without going through their lines in Python.
+    """
+
+    def __init__(self, types: bytes):
+        self.types = types
+
+    @classmethod
+    def from_report_file(cls, report_file: Optional[ReportFile]) -> "LineCoverage":
+        if report_file is None:
+            return cls(b"")
+        return cls.from_lines(report_file._lines)
+
+    @classmethod
+    def from_lines(cls, lines: Sequence) -> "LineCoverage":
+        """
+        Builds a `LineCoverage` from the underlying lines of a `ReportFile`
+        (see `FileComparisonVisitor._get_line` for the line format).
+
+        Lines that are still the JSON text read from the chunk aren't parsed: the
+        coverage values are found in their joined text with a single regex scan
+        and each distinct value is only converted to its type code once.
+        """
+        type_codes = _TypeCodes()
+        try:
+            text = "\n".join(lines)
+        except TypeError:
+            # some lines have already been parsed (or are missing)
+            return cls(bytes(type_codes.of_line(line) for line in lines))
+        if not lines:
+            return cls(b"")
+        return cls(bytes(map(type_codes.__getitem__, COVERAGE_VALUE.findall(text))))
+
+    def __len__(self) -> int:
+        return len(self.types)
+
+    def change_summary(self, head: "LineCoverage") -> Counter:
+        """
+        Summary of the coverage changes between this (base) file and the head file
+        assuming their lines line up, i.e. the file is not part of the diff.
+        Same as traversing the files with `CreateChangeSummaryVisitor`.
+        """
+        size = min(len(self.types), len(head.types))
+        # every type code fits in 2 bits so, read as big integers, the types of
+        # both files combine into one byte per line, `base type * 4 + head type`,
+        # without any carry between lines and the changes are counted in C
+        pairs = (
+            int.from_bytes(self.types[:size], "big") * 4
+            + int.from_bytes(head.types[:size], "big")
+        ).to_bytes(size, "big")
+
+        summary = Counter()
+        for base_type, head_type in CHANGED_TYPES:
+            count = pairs.count(base_type * 4 + head_type)
+            if count:
+                summary[SUMMARY_KEYS[base_type]] -= count
+                summary[SUMMARY_KEYS[head_type]] += count
+        return summary
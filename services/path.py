@@ -1,8 +1,8 @@
 import re
-from collections import defaultdict
-from dataclasses import dataclass
+from bisect import bisect_left
+from dataclasses import dataclass, field
 from functools import cached_property
-from typing import Iterable, List, Optional, Union
+from typing import Dict, Iterable, Iterator, List, Optional, Union
 
 from asgiref.sync import async_to_sync
 from django.conf import settings
@@ -64,17 +64,27 @@ class Dir(PathNode):
 
     full_path: str
     children: List[PathNode]
+    # totals already rolled up by a `PathTrie`
+    precomputed_totals: Optional[ReportTotals] = field(
+        default=None, compare=False, repr=False
+    )
 
     @cached_property
     def totals(self):
+        if self.precomputed_totals is not None:
+            return self.precomputed_totals
         # A dir's totals are sum of its children's totals
-        totals = ReportTotals.default_totals()
-        for child in self.children:
-            totals.lines += child.lines
-            totals.hits += child.hits
-            totals.partials += child.partials
-            totals.misses += child.misses
-        return totals
+        return sum_totals(self.children)
+
+
+def sum_totals(nodes: Iterable[PathNode]) -> ReportTotals:
+    totals = ReportTotals.default_totals()
+    for node in nodes:
+        totals.lines += node.lines
+        totals.hits += node.hits
+        totals.partials += node.partials
+        totals.misses += node.misses
+    return totals
 
 
 @dataclass
@@ -108,6 +118,133 @@ class PrefixedPath:
         return f"{self.prefix}/{name}" if self.prefix else name
 
 
+class PathTrieNode(PathNode):
+    """
+    Node of a `PathTrie`: a file (`index` is its position in the report's
+    files) and/or a directory (it has `children`).
+    """
+
+    __slots__ = ("full_path", "children", "index", "totals")
+
+    def __init__(self, full_path: str):
+        self.full_path = full_path
+        self.children: Dict[str, PathTrieNode] = {}
+        self.index: Optional[int] = None
+        self.totals: Optional[ReportTotals] = None
+
+    @property
+    def is_file(self) -> bool:
+        return self.index is not None
+
+
+class PathTrie:
+    """
+    Prefix trie over the file paths of a report.
+
+    Directory totals are rolled up from the file totals in a single bottom-up
+    pass the first time a directory's totals are needed, and kept on the nodes
+    so that later queries on the same report don't recompute them.
+    """
+
+    def __init__(self, report: Report, paths: Optional[Iterable[str]] = None):
+        self.report = report
+        self.root = PathTrieNode("")
+        for index, full_path in enumerate(report.files if paths is None else paths):
+            node = self.root
+            for part in full_path.split("/"):
+                child = node.children.get(part)
+                if child is None:
+                    child = PathTrieNode(
+                        f"{node.full_path}/{part}" if node.full_path else part
+                    )
+                    node.children[part] = child
+                node = child
+            node.index = index
+
+    def find(self, path: str) -> Optional[PathTrieNode]:
+        node = self.root
+        if not path:
+            return node
+        for part in path.split("/"):
+            node = node.children.get(part)
+            if node is None:
+                return None
+        return node
+
+    def files(self, node: PathTrieNode) -> List[PathTrieNode]:
+        """
+        All the file nodes under `node` (included), in the report's order.
+        """
+        files, stack = [], [node]
+        while stack:
+            current = stack.pop()
+            if current.is_file:
+                files.append(current)
+            stack.extend(current.children.values())
+        files.sort(key=lambda file: file.index)
+        return files
+
+    def rollup(self, node: PathTrieNode) -> ReportTotals:
+        """
+        Computes the totals of `node` and of every node under it that doesn't
+        have them yet.
+        """
+        stack, ordered = [node], []
+        while stack:
+            current = stack.pop()
+            if current.totals is None:
+                ordered.append(current)
+                stack.extend(current.children.values())
+
+        # children always come after their parent in `ordered`
+        for current in reversed(ordered):
+            if current.children:
+                current.totals = sum_totals(current.children.values())
+            else:
+                current.totals = self.report.get(current.full_path).totals
+        return node.totals
+
+
+def report_path_trie(report: Report) -> PathTrie:
+    """
+    Returns the `PathTrie` of the report's files, built once per report.
+    """
+    trie = getattr(report, "_path_trie", None)
+    if trie is None:
+        trie = PathTrie(report)
+        report._path_trie = trie
+    return trie
+
+
+class PathIndex:
+    """
+    The sorted file paths of a report, answering prefix queries with a binary
+    search rather than matching every path.
+    """
+
+    def __init__(self, paths: Iterable[str]):
+        self.paths = sorted(paths)
+
+    def starting_with(self, prefix: str) -> List[str]:
+        if not prefix:
+            return list(self.paths)
+        start = bisect_left(self.paths, prefix)
+        # the paths starting with `prefix` sort before its successor string
+        end = bisect_left(self.paths, prefix[:-1] + chr(ord(prefix[-1]) + 1), start)
+        return self.paths[start:end]
+
+
+def report_path_index(report: Report) -> PathIndex:
+    """
+    Returns the `PathIndex` of the report's files, built once per report.
+    """
+    index = getattr(report, "_path_index", None)
+    if index is None:
+        index = PathIndex(report.files)
+        report._path_index = index
+    return index
+
+
 def is_subpath(full_path: str, subpath: str):
     if not subpath:
         return True
@@ -145,69 +282,69 @@ class ReportPaths:
     ):
         self.report = report
         self.prefix = path or ""
+        self.search_term = search_term
+        self.trie = report_path_trie(report)
 
-        self._paths = [
-            PrefixedPath(full_path=full_path, prefix=self.prefix)
-            for full_path in report.files
-            if is_subpath(full_path, self.prefix)
-        ]
-
-        if search_term:
-            self._paths = [
-                path for path in self.paths if search_term in path.relative_path
+    @cached_property
+    def _file_nodes(self) -> List[PathTrieNode]:
+        node = self.trie.find(self.prefix)
+        if node is None:
+            return []
+        files = self.trie.files(node)
+        if self.search_term:
+            files = [
+                file
+                for file in files
+                if self.search_term in self._prefixed_path(file).relative_path
             ]
+        return files
 
-    @property
-    def paths(self):
-        return self._paths
+    @cached_property
+    def paths(self) -> List[PrefixedPath]:
+        return [self._prefixed_path(file) for file in self._file_nodes]
 
     def full_filelist(self) -> Iterable[File]:
         """
         Return a flat file list of all files under the specified `path` prefix/directory.
         """
         return [
-            File(full_path=path.full_path, totals=self._totals(path))
-            for path in self.paths
+            File(full_path=file.full_path, totals=self.trie.rollup(file))
+            for file in self._file_nodes
         ]
 
     def single_directory(self) -> Iterable[Union[File, Dir]]:
         """
         Return a single directory (specified by `path`) of mixed file/directory results.
         """
-        return self._single_directory_recursive(self.paths)
-
-    def _totals(self, path: PrefixedPath) -> ReportTotals:
-        """
-        Returns the report totals for a given prefixed path.
-        """
-        return self.report.get(path.full_path).totals
-
-    def _single_directory_recursive(
-        self, paths: Iterable[PrefixedPath]
-    ) -> Iterable[Union[File, Dir]]:
-        grouped = defaultdict(list)
-        for path in paths:
-            grouped[path.basename].append(path)
-
-        results = []
-
-        for basename, paths in grouped.items():
-            paths = list(paths)
-            if len(paths) == 1 and paths[0].is_file:
-                path = paths[0]
-                results.append(
-                    File(full_path=path.full_path, totals=self._totals(path))
+        trie = self.trie
+        if self.search_term:
+            # directory totals only include the files matching the search term
+            trie = PathTrie(
+                self.report, paths=[file.full_path for file in self._file_nodes]
+            )
+
+        node = trie.find(self.prefix)
+        if node is None:
+            return []
+        if not node.children:
+            return [File(full_path=node.full_path, totals=trie.rollup(node))]
+
+        trie.rollup(node)
+        return list(self._single_directory_nodes(node))
+
+    def _prefixed_path(self, file: PathTrieNode) -> PrefixedPath:
+        return PrefixedPath(full_path=file.full_path, prefix=self.prefix)
+
+    def _single_directory_nodes(self, node: PathTrieNode) -> Iterator[Union[File, Dir]]:
+        for child in node.children.values():
+            if child.children:
+                yield Dir(
+                    full_path=child.full_path,
+                    children=list(self._single_directory_nodes(child)),
+                    precomputed_totals=child.totals,
                 )
             else:
-                children = self._single_directory_recursive(
-                    [
-                        PrefixedPath(full_path=path.full_path, prefix=basename)
-                        for path in paths
-                    ]
-                )
-                results.append(Dir(full_path=basename, children=children))
-
-        return results
+                yield File(full_path=child.full_path, totals=child.totals)
 
 
 def provider_path_exists(path: str, commit: Commit, owner: Owner):
@@ -1,3 +1,5 @@
+from functools import lru_cache
+
 from redis import Redis
 
 from utils.config import get_config
@@ -17,5 +19,7 @@ def get_redis_connection() -> Redis:
     return _get_redis_instance_from_url(url)
 
 
+@lru_cache
 def _get_redis_instance_from_url(url):
+    # the client (and its connection pool) is shared by all the requests
     return Redis.from_url(url)
@@ -1,19 +1,26 @@
-from typing import Optional
+from typing import Callable, List, Optional, Tuple
 
 from django.conf import settings
-from django.db.models import Prefetch, Q
+from django.db.models import Prefetch, prefetch_related_objects
 from django.utils.functional import cached_property
 from shared.helpers.flag import Flag
 from shared.reports.readonly import ReadOnlyReport as SharedReadOnlyReport
-from shared.reports.resources import Report
+from shared.reports.resources import Report, ReportFile
 from shared.reports.types import ReportFileSummary, ReportTotals
 from shared.utils.sessions import Session, SessionType
 
 from core.models import Commit
 from reports.models import AbstractTotals, CommitReport, ReportDetails, ReportSession
 from services.archive import ArchiveService
+from services.cache import TieredCache
 from utils.config import RUN_ENV
 
+report_chunks_cache = TieredCache(
+    "report-chunks",
+    max_local_bytes=settings.REPORT_CACHE_MAX_LOCAL_BYTES,
+    redis_ttl=settings.REPORT_CACHE_REDIS_TTL,
+)
+
 
 class ReportMixin:
     def file_reports(self):
@@ -54,6 +61,16 @@ def build_report(chunks, files, sessions, totals, report_class=None):
     )
 
 
+def new_report_builder_enabled(commit: Commit) -> bool:
+    # TODO: this can be removed once confirmed working well on prod
+    return (
+        RUN_ENV == "DEV"
+        or RUN_ENV == "STAGING"
+        or RUN_ENV == "TESTING"
+        or commit.repository_id in settings.REPORT_BUILDER_REPO_IDS
+    )
+
+
 def build_report_from_commit(commit: Commit, report_class=None):
     """
     Builds a `shared.reports.resources.Report` from a given commit.
@@ -62,16 +79,8 @@ def build_report_from_commit(commit: Commit, report_class=None):
     from various `reports_*` tables in the database.
     """
 
-    # TODO: this can be removed once confirmed working well on prod
-    new_report_builder_enabled = (
-        RUN_ENV == "DEV"
-        or RUN_ENV == "STAGING"
-        or RUN_ENV == "TESTING"
-        or commit.repository_id in settings.REPORT_BUILDER_REPO_IDS
-    )
-
     commit_report = fetch_commit_report(commit)
-    if commit_report and new_report_builder_enabled:
+    if commit_report and new_report_builder_enabled(commit):
         files = build_files(commit_report)
         sessions = build_sessions(commit_report)
         try:
@@ -86,27 +95,199 @@ def build_report_from_commit(commit: Commit, report_class=None):
         sessions = commit.report["sessions"]
         totals = commit.totals
 
-    chunks = ArchiveService(commit.repository).read_chunks(commit.commitid)
+    chunks = fetch_chunks(commit, commit_report)
 
     return build_report(chunks, files, sessions, totals, report_class=report_class)
 
 
+def build_report_file_from_commit(commit: Commit, path: str) -> Optional[ReportFile]:
+    """
+    Builds a single `shared.reports.resources.ReportFile` from a given commit
+    without building the whole report.
+
+    The file's index into the chunks is looked up in the report details and only
+    that chunk section is decoded from archive storage.
+    """
+    commit_report = commit.reports.select_related("reportdetails").first()
+    file_summary = _commit_file_summary(commit, commit_report, path)
+    if file_summary is None:
+        return None
+
+    return _read_report_file(commit, path, file_summary)
+
+
+def _commit_file_summary(
+    commit: Commit, commit_report: Optional[CommitReport], path: str
+) -> Optional[ReportFileSummary]:
+    if commit_report and new_report_builder_enabled(commit):
+        return build_file_summary(commit_report, path)
+    if not commit.report:
+        return None
+    return _legacy_file_summary(commit.report["files"].get(path))
+
+
+def _read_report_file(
+    commit: Commit, path: str, file_summary: ReportFileSummary
+) -> ReportFile:
+    lines = ArchiveService(commit.repository).read_chunk(
+        commit.commitid, file_summary.file_index
+    )
+    return ReportFile(name=path, totals=file_summary.file_totals, lines=lines)
+
+
+def commit_ancestors(commit: Commit, depth: int) -> List[Commit]:
+    """
+    The given commit followed by (up to `depth` of) its ancestors, following the
+    parent of each commit, fetched with a single recursive query.
+    """
+    return list(
+        Commit.objects.raw(
+            """
+            WITH RECURSIVE ancestors AS (
+                SELECT id, repoid, parent, 0 AS depth
+                FROM commits
+                WHERE id = %s
+              UNION ALL
+                SELECT c.id, c.repoid, c.parent, a.depth + 1
+                FROM ancestors a
+                INNER JOIN commits c ON c.repoid = a.repoid AND c.commitid = a.parent
+                WHERE a.depth < %s
+            )
+            SELECT commits.*
+            FROM commits
+            INNER JOIN ancestors ON commits.id = ancestors.id
+            ORDER BY ancestors.depth
+            """,
+            [commit.id, depth],
+        )
+    )
+
+
+# attribute holding the commit reports prefetched by `find_report_file_in_ancestors`
+PREFETCHED_FILE_COMMIT_REPORTS_ATTR = "_prefetched_file_commit_reports"
+
+
+def find_report_file_in_ancestors(
+    commit: Commit,
+    path: str,
+    walk_back: int,
+    is_valid: Callable[[Commit], bool],
+    oldest_sha: Optional[str] = None,
+) -> Tuple[Commit, Optional[ReportFile]]:
+    """
+    Walks back (up to `walk_back` commits) from the given commit until finding a
+    valid commit with coverage info for the given path, stopping at the
+    `oldest_sha` commit.  Returns the last commit visited and its report file.
+
+    The ancestors and their report details are fetched with a fixed number of
+    queries and the presence of the file is checked in the report details of each
+    commit so that only the chunk section of the returned file is loaded.
+    """
+    ancestors = commit_ancestors(commit, walk_back)
+    prefetch_related_objects(
+        ancestors,
+        "repository",
+        Prefetch(
+            "reports",
+            queryset=CommitReport.objects.select_related("reportdetails").order_by(
+                "pk"
+            ),
+            to_attr=PREFETCHED_FILE_COMMIT_REPORTS_ATTR,
+        ),
+    )
+
+    for depth, ancestor in enumerate(ancestors):
+        commit_reports = getattr(ancestor, PREFETCHED_FILE_COMMIT_REPORTS_ATTR)
+        file_summary = _commit_file_summary(
+            ancestor, commit_reports[0] if commit_reports else None, path
+        )
+        is_last = depth == walk_back or (
+            depth > 0 and oldest_sha and oldest_sha == ancestor.commitid
+        )
+        if is_last or (file_summary is not None and is_valid(ancestor)):
+            if file_summary is None:
+                return ancestor, None
+            return ancestor, _read_report_file(ancestor, path, file_summary)
+
+    # the parent of the last ancestor is missing
+    return (ancestors[-1] if ancestors else commit), None
+
+
+def fetch_chunks(commit: Commit, commit_report: Optional[CommitReport]) -> str:
+    """
+    Fetch the chunks for the given commit from archive storage, going through
+    `report_chunks_cache` when it's enabled.
+
+    Cached chunks are versioned by the commit and report details timestamps so
+    that any new processed upload (which rewrites the chunks) invalidates them.
+    """
+    if not settings.REPORT_CACHE_ENABLED:
+        return ArchiveService(commit.repository).read_chunks(commit.commitid)
+
+    key = f"{commit.repository_id}/{commit.commitid}"
+    version = _chunks_version(commit, commit_report)
+
+    cached = report_chunks_cache.get(key, version)
+    if cached is not None:
+        return cached.decode()
+
+    chunks = ArchiveService(commit.repository).read_chunks(commit.commitid)
+    report_chunks_cache.set(key, version, chunks.encode())
+    return chunks
+
+
+def _chunks_version(commit: Commit, commit_report: Optional[CommitReport]) -> str:
+    timestamps = [commit.updatestamp]
+    if commit_report is not None:
+        timestamps.append(commit_report.updated_at)
+        try:
+            timestamps.append(commit_report.reportdetails.updated_at)
+        except CommitReport.reportdetails.RelatedObjectDoesNotExist:
+            pass
+    return "|".join(ts.isoformat() if ts else "" for ts in timestamps)
+
+
+# attribute holding the commit reports prefetched by `prefetch_commit_reports`
+PREFETCHED_COMMIT_REPORTS_ATTR = "_prefetched_full_report_commit_reports"
+
+
+def _commit_report_queryset():
+    return CommitReport.objects.prefetch_related(
+        Prefetch(
+            "sessions",
+            queryset=ReportSession.objects.prefetch_related("flags").select_related(
+                "uploadleveltotals"
+            ),
+        ),
+    ).select_related("reportdetails", "reportleveltotals")
+
+
 def fetch_commit_report(commit: Commit) -> Optional[CommitReport]:
     """
     Fetch a single `CommitReport` for the given commit.
     All the necessary report relations are prefetched.
     """
-    return (
-        commit.reports.prefetch_related(
-            Prefetch(
-                "sessions",
-                queryset=ReportSession.objects.prefetch_related("flags").select_related(
-                    "uploadleveltotals"
-                ),
-            ),
-        )
-        .select_related("reportdetails", "reportleveltotals")
-        .first()
+    if hasattr(commit, PREFETCHED_COMMIT_REPORTS_ATTR):
+        commit_reports = getattr(commit, PREFETCHED_COMMIT_REPORTS_ATTR)
+        return commit_reports[0] if commit_reports else None
+
+    return _commit_report_queryset().filter(commit=commit).order_by("pk").first()
+
+
+def prefetch_commit_reports(commits: List[Commit]):
+    """
+    Prefetches everything needed to build the reports of the given commits
+    (except for the chunks) with a fixed number of queries, no matter how
+    many commits there are.
+    """
+    prefetch_related_objects(
+        commits,
+        "repository__author",
+        Prefetch(
+            "reports",
+            queryset=_commit_report_queryset().order_by("pk"),
+            to_attr=PREFETCHED_COMMIT_REPORTS_ATTR,
+        ),
     )
 
 
@@ -168,9 +349,10 @@ def build_sessions(commit_report: CommitReport) -> dict[int, Session]:
     carryforward_sessions = {}
     uploaded_flags = set()
 
-    for upload in commit_report.sessions.filter(
-        Q(state="complete") | Q(state="processed")
-    ):
+    # filtered in memory so that prefetched sessions don't need another query
+    for upload in commit_report.sessions.all():
+        if upload.state not in ("complete", "processed"):
+            continue
         session = build_session(upload)
         if session.session_type == SessionType.carriedforward:
             carryforward_sessions[upload.order_number] = session
@@ -203,11 +385,42 @@ def build_files(commit_report: CommitReport) -> dict[str, ReportFileSummary]:
         return {}
 
     return {
-        file["filename"]: ReportFileSummary(
-            file_index=file["file_index"],
-            file_totals=ReportTotals(*file["file_totals"]),
-            session_totals=file["session_totals"],
-            diff_totals=file["diff_totals"],
-        )
-        for file in report_details.files_array
+        file["filename"]: _file_summary(file) for file in report_details.files_array
     }
+
+
+def build_file_summary(
+    commit_report: CommitReport, path: str
+) -> Optional[ReportFileSummary]:
+    """
+    Same as `build_files` but only for the file at the given `path`.
+    """
+    try:
+        report_details = commit_report.reportdetails
+    except CommitReport.reportdetails.RelatedObjectDoesNotExist:
+        return None
+
+    for file in report_details.files_array:
+        if file["filename"] == path:
+            return _file_summary(file)
+    return None
+
+
+def _file_summary(file: dict) -> ReportFileSummary:
+    return ReportFileSummary(
+        file_index=file["file_index"],
+        file_totals=ReportTotals(*file["file_totals"]),
+        session_totals=file["session_totals"],
+        diff_totals=file["diff_totals"],
+    )
+
+
+def _legacy_file_summary(file: Optional[list]) -> Optional[ReportFileSummary]:
+    # files in `commit.report` are stored as
+    # [file_index, file_totals, session_totals, diff_totals]
+    if file is None:
+        return None
+    file_index, file_totals, *rest = file
+    return ReportFileSummary(
+        file_index, ReportTotals(*file_totals) if file_totals else None, *rest
+    )
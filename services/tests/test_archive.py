@@ -1,13 +1,20 @@
+import gzip
 import json
 from pathlib import Path
 from time import time
-from unittest.mock import patch
+from unittest.mock import MagicMock, patch
 
 from django.test import TestCase
 from shared.storage import MinioStorageService
 
 from core.tests.factories import RepositoryFactory
-from services.archive import ArchiveService
+from services.archive import (
+    ArchiveService,
+    BlocksReader,
+    gunzip_blocks,
+    gzip_blocks,
+    iter_sections,
+)
 
 current_file = Path(__file__)
 
@@ -20,6 +27,104 @@ class ArchiveServiceTests(TestCase):
         service = ArchiveService(repo)
         assert service.create_raw_upload_presigned_put("ABCD") == "presigned url"
 
+    @patch("services.archive.ArchiveService.stream_file")
+    def test_read_chunk(self, stream_file_mock):
+        chunks = "{}\n[1]\n<<<<< end_of_chunk >>>>>\n{}\n[0]\n[1]"
+        # split the chunks in small blocks to make sure we handle
+        # separators that span multiple blocks
+        data = chunks.encode()
+        stream_file_mock.return_value = (
+            data[i : i + 5] for i in range(0, len(data), 5)
+        )
+        repo = RepositoryFactory.create()
+        service = ArchiveService(repo)
+        assert service.read_chunk("abcd", 1) == "{}\n[0]\n[1]"
+
+    @patch("services.archive.ArchiveService.stream_file")
+    def test_read_chunk_with_header(self, stream_file_mock):
+        chunks = '{"labels_index": {}}\n<<<<< end_of_header >>>>>\n{}\n[1]\n<<<<< end_of_chunk >>>>>\n{}\n[0]'
+        stream_file_mock.return_value = (block for block in [chunks.encode()])
+        repo = RepositoryFactory.create()
+        service = ArchiveService(repo)
+        assert service.read_chunk("abcd", 0) == "{}\n[1]"
+
+    @patch("services.archive.ArchiveService.stream_file")
+    def test_read_chunk_out_of_range(self, stream_file_mock):
+        stream_file_mock.return_value = (block for block in [b"{}\n[1]"])
+        repo = RepositoryFactory.create()
+        service = ArchiveService(repo)
+        assert service.read_chunk("abcd", 3) is None
+
+    def test_read_chunk_gzip_encoded(self):
+        # chunks are stored gzipped by `write_file`
+        chunks = "{}\n[1]\n<<<<< end_of_chunk >>>>>\n{}\n[0]\n[1]"
+        data = gzip.compress(chunks.encode())
+        response = MagicMock(headers={"Content-Encoding": "gzip"})
+        response.stream.return_value = (
+            data[i : i + 5] for i in range(0, len(data), 5)
+        )
+        repo = RepositoryFactory.create()
+        service = ArchiveService(repo)
+        with patch.object(
+            service.storage.minio_client, "get_object", return_value=response
+        ):
+            assert service.read_chunk("abcd", 1) == "{}\n[0]\n[1]"
+        response.stream.assert_called_once_with(64 * 1024, decode_content=False)
+        response.release_conn.assert_called_once()
+
+    def test_stream_file_not_gzip_encoded(self):
+        response = MagicMock(headers={})
+        response.stream.return_value = iter([b"{}\n", b"[1]"])
+        repo = RepositoryFactory.create()
+        service = ArchiveService(repo)
+        with patch.object(
+            service.storage.minio_client, "get_object", return_value=response
+        ):
+            assert b"".join(service.stream_file("path")) == b"{}\n[1]"
+
+    def test_write_raw_upload_stream(self):
+        repo = RepositoryFactory.create()
+        service = ArchiveService(repo)
+        with patch.object(service.storage.minio_client, "put_object") as put_mock:
+            put_mock.side_effect = lambda bucket, path, data, **kwargs: data.read()
+            path = service.write_raw_upload_stream(
+                "abcd", "report", iter([b"coverage ", b"report"]), gzipped=True
+            )
+
+        assert path.endswith(f"/{service.storage_hash}/abcd/report.txt")
+        put_mock.assert_called_once()
+        assert put_mock.call_args.args[:2] == (service.root, path)
+        assert put_mock.call_args.kwargs["length"] == -1
+        assert put_mock.call_args.kwargs["metadata"] == {"Content-Encoding": "gzip"}
+
+
+def test_iter_sections():
+    blocks = [b"aa|", b"|bb", b"b|", b"|", b"|c"]
+    assert list(iter_sections(iter(blocks), separator=b"||")) == [
+        b"aa",
+        b"bbb",
+        b"|c",
+    ]
+
+
+def test_blocks_reader():
+    reader = BlocksReader(iter([b"abc", b"", b"defg", b"h"]))
+    assert reader.read(2) == b"ab"
+    assert reader.read(4) == b"cdef"
+    assert reader.read() == b"gh"
+    assert reader.read(1) == b""
+
+
+def test_gzip_blocks():
+    blocks = [b"coverage " * 1000, b"report"]
+    assert gzip.decompress(b"".join(gzip_blocks(iter(blocks)))) == b"".join(blocks)
+
+
+def test_gunzip_blocks():
+    data = gzip.compress(b"coverage " * 1000)
+    blocks = [data[i : i + 7] for i in range(0, len(data), 7)]
+    assert b"".join(gunzip_blocks(iter(blocks))) == b"coverage " * 1000
+
 
 class TestWriteData(object):
     def test_write_report_details_to_storage(self, mocker, db):
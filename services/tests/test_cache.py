@@ -0,0 +1,131 @@
+import zlib
+
+import fakeredis
+from redis.exceptions import ConnectionError
+
+from services.cache import LRUBytesCache, TieredCache
+
+
+class TestLRUBytesCache(object):
+    def test_get_set(self):
+        cache = LRUBytesCache("test", max_bytes=100)
+        assert cache.get("a", "v1") is None
+        cache.set("a", "v1", b"hello")
+        assert cache.get("a", "v1") == b"hello"
+        assert cache.current_bytes == 5
+
+    def test_version_mismatch_invalidates(self):
+        cache = LRUBytesCache("test", max_bytes=100)
+        cache.set("a", "v1", b"hello")
+        assert cache.get("a", "v2") is None
+        assert len(cache) == 0
+        assert cache.current_bytes == 0
+
+    def test_evicts_least_recently_used(self):
+        cache = LRUBytesCache("test", max_bytes=10)
+        cache.set("a", "v1", b"aaaa")
+        cache.set("b", "v1", b"bbbb")
+        # touch `a` so that `b` is the least recently used
+        assert cache.get("a", "v1") == b"aaaa"
+        cache.set("c", "v1", b"cccc")
+        assert cache.get("b", "v1") is None
+        assert cache.get("a", "v1") == b"aaaa"
+        assert cache.get("c", "v1") == b"cccc"
+        assert cache.current_bytes == 8
+
+    def test_value_larger_than_cache_is_not_stored(self):
+        cache = LRUBytesCache("test", max_bytes=4)
+        cache.set("a", "v1", b"aaa")
+        cache.set("b", "v1", b"bbbbbbbb")
+        assert cache.get("a", "v1") == b"aaa"
+        assert cache.get("b", "v1") is None
+
+
+class TestTieredCache(object):
+    def test_set_writes_compressed_value_to_redis(self):
+        redis = fakeredis.FakeStrictRedis()
+        cache = TieredCache(
+            "test", max_local_bytes=100, redis_ttl=60, redis_connection=redis
+        )
+        cache.set("a", "v1", b"hello")
+        assert zlib.decompress(redis.get("test/a")) == b"v1\nhello"
+        assert 0 < redis.ttl("test/a") <= 60
+
+    def test_get_falls_back_to_redis(self):
+        redis = fakeredis.FakeStrictRedis()
+        cache = TieredCache(
+            "test", max_local_bytes=100, redis_ttl=60, redis_connection=redis
+        )
+        cache.set("a", "v1", b"hello")
+        cache.local.clear()
+
+        assert cache.get("a", "v1") == b"hello"
+        # value has been promoted to the local tier
+        assert cache.local.get("a", "v1") == b"hello"
+
+    def test_get_stale_version_in_redis(self):
+        redis = fakeredis.FakeStrictRedis()
+        cache = TieredCache(
+            "test", max_local_bytes=100, redis_ttl=60, redis_connection=redis
+        )
+        cache.set("a", "v1", b"hello")
+        cache.local.clear()
+        assert cache.get("a", "v2") is None
+
+    def test_redis_errors_are_treated_as_misses(self, mocker):
+        redis = mocker.MagicMock()
+        redis.get.side_effect = ConnectionError()
+        redis.set.side_effect = ConnectionError()
+        cache = TieredCache(
+            "test", max_local_bytes=100, redis_ttl=60, redis_connection=redis
+        )
+        cache.set("a", "v1", b"hello")
+        assert cache.get("a", "v1") == b"hello"
+        cache.local.clear()
+        assert cache.get("a", "v1") is None
+
+    def test_get_or_set_computes_value_once(self, mocker):
+        mocker.patch("services.cache.redis_lock.Lock")
+        redis = fakeredis.FakeStrictRedis()
+        cache = TieredCache(
+            "test", max_local_bytes=100, redis_ttl=60, redis_connection=redis
+        )
+        fn = mocker.MagicMock(return_value=b"hello")
+
+        assert cache.get_or_set("a", "v1", fn) == b"hello"
+        cache.local.clear()
+        assert cache.get_or_set("a", "v1", fn) == b"hello"
+        assert fn.call_count == 1
+
+    def test_get_or_set_value_computed_while_waiting_for_lock(self, mocker):
+        redis = fakeredis.FakeStrictRedis()
+        cache = TieredCache(
+            "test", max_local_bytes=100, redis_ttl=60, redis_connection=redis
+        )
+
+        def acquire(timeout):
+            # another worker holding the lock cached the value in the meantime
+            cache.set("a", "v1", b"from another worker")
+            cache.local.clear()
+            return True
+
+        lock = mocker.patch("services.cache.redis_lock.Lock").return_value
+        lock.acquire.side_effect = acquire
+        fn = mocker.MagicMock(return_value=b"hello")
+
+        assert cache.get_or_set("a", "v1", fn) == b"from another worker"
+        assert not fn.called
+        lock.release.assert_called_once()
+
+    def test_get_or_set_lock_not_acquired(self, mocker):
+        lock = mocker.patch("services.cache.redis_lock.Lock").return_value
+        lock.acquire.return_value = False
+        redis = fakeredis.FakeStrictRedis()
+        cache = TieredCache(
+            "test", max_local_bytes=100, redis_ttl=60, redis_connection=redis
+        )
+        fn = mocker.MagicMock(return_value=b"hello")
+
+        assert cache.get_or_set("a", "v1", fn) == b"hello"
+        assert fn.call_count == 1
+        assert not lock.release.called
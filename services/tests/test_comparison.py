@@ -2,13 +2,16 @@ import asyncio
 import enum
 import json
 from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from functools import cached_property
 from unittest.mock import PropertyMock, patch
 
+import fakeredis
 import minio
 import pytest
 import pytz
-from django.test import TestCase
+from django.test import TestCase, override_settings
 from shared.reports.resources import ReportFile
 from shared.reports.types import ReportTotals
 from shared.utils.merge import LineType
@@ -32,6 +35,9 @@ from services.comparison import (
     LineComparison,
     MissingComparisonReport,
     PullRequestComparison,
+    calculate_file_comparisons,
+    comparison_report_cache,
+    git_comparison_cache,
 )
 from services.report import SerializableReport
 
@@ -266,6 +272,27 @@ class FileComparisonTraverseManagerTests(TestCase):
         manager.apply([visitor])
         assert visitor.line_numbers == [(1, 1), (2, 2), (3, None), (None, 3)]
 
+    def test_traverse_yields_lines(self):
+        segments = [{"header": ["2", "1", "2", "2"], "lines": ["-old", "+new"]}]
+        manager = FileComparisonTraverseManager(
+            head_file_eof=3, base_file_eof=3, segments=segments, src=["a", "new"]
+        )
+
+        assert list(manager.traverse()) == [
+            (1, 1, "a", False),
+            (2, None, "-old", True),
+            (None, 2, "+new", True),
+        ]
+
+    def test_apply_does_not_mutate_segments(self):
+        segments = [{"header": ["1", "1", "1", "2"], "lines": ["+"]}]
+        manager = FileComparisonTraverseManager(
+            head_file_eof=4, base_file_eof=3, segments=segments
+        )
+        manager.apply([LineNumberCollector()])
+
+        assert segments == [{"header": ["1", "1", "1", "2"], "lines": ["+"]}]
+
 
 class CreateLineComparisonVisitorTests(TestCase):
     def setUp(self):
@@ -736,6 +763,67 @@ class ComparisonTests(TestCase):
             assert fc.head_file.name in head_report_files
             assert fc.base_file is None
 
+    def test_files_with_executor_matches_serial_files(
+        self, base_report_mock, head_report_mock, git_comparison_mock
+    ):
+        head_report_files = {f"file{i}": file_data for i in range(10)}
+        head_report_mock.return_value = SerializableReport(files=head_report_files)
+        base_report_mock.return_value = SerializableReport(files=head_report_files)
+        git_comparison_mock.return_value = {
+            "diff": {
+                "files": {
+                    "file3": {
+                        "segments": [{"header": ["1", "1", "1", "2"], "lines": ["+"]}]
+                    }
+                }
+            }
+        }
+
+        serial = list(self.comparison.files)
+
+        comparison = Comparison(
+            user=self.comparison.user,
+            base_commit=self.comparison.base_commit,
+            head_commit=self.comparison.head_commit,
+        )
+        with ThreadPoolExecutor(max_workers=3) as executor:
+            with patch("services.comparison.get_files_executor", return_value=executor):
+                parallel = list(comparison.files)
+
+        assert [fc.name for fc in parallel] == [fc.name for fc in serial]
+        assert [fc.change_summary for fc in parallel] == [
+            fc.change_summary for fc in serial
+        ]
+        assert [
+            [(line.number, line.value) for line in fc.lines] for fc in parallel
+        ] == [[(line.number, line.value) for line in fc.lines] for fc in serial]
+
+    @override_settings(COMPARISON_FILES_WORKERS=2)
+    def test_calculate_file_comparisons_is_lazy(
+        self, base_report_mock, head_report_mock, git_comparison_mock
+    ):
+        class FakeFileComparison:
+            def __init__(self, index):
+                self.index = index
+
+            @cached_property
+            def _calculated_changes_and_lines(self):
+                return Counter(), [self.index]
+
+        read = []
+
+        def file_comparisons():
+            for index in range(20):
+                read.append(index)
+                yield FakeFileComparison(index)
+
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            results = calculate_file_comparisons(file_comparisons(), executor)
+            assert next(results).index == 0
+            # only 2 * COMPARISON_FILES_WORKERS file comparisons were submitted
+            assert read == [0, 1, 2, 3]
+            assert [fc.index for fc in results] == list(range(1, 20))
+
     def test_get_file_comparison_adds_in_file_from_base_report_if_exists(
         self, base_report_mock, head_report_mock, git_comparison_mock
     ):
@@ -1335,6 +1423,57 @@ class ComparisonHasUnmergedBaseCommitsTests(TestCase):
         assert self.comparison.has_unmerged_base_commits is False
 
 
+@override_settings(GIT_COMPARISON_CACHE_ENABLED=True)
+@patch("services.cache.redis_lock.Lock")
+@patch("services.repo_providers.RepoProviderService.get_adapter")
+class ComparisonGitComparisonCacheTests(TestCase):
+    class MockCompareAdapter:
+        def __init__(self):
+            self.calls = []
+
+        async def get_compare(self, base, head):
+            self.calls.append((base, head))
+            return {"commits": [base, head], "diff": {"files": {}}}
+
+    def setUp(self):
+        self.owner = OwnerFactory()
+        self.base = CommitFactory(author=self.owner)
+        self.head = CommitFactory(author=self.owner, repository=self.base.repository)
+        asyncio.set_event_loop(asyncio.new_event_loop())
+        git_comparison_cache.local.clear()
+
+    def tearDown(self):
+        git_comparison_cache.local.clear()
+
+    def test_git_comparison_is_shared_between_comparisons(
+        self, get_adapter_mock, lock_mock
+    ):
+        adapter = ComparisonGitComparisonCacheTests.MockCompareAdapter()
+        get_adapter_mock.return_value = adapter
+
+        with patch.object(git_comparison_cache, "_redis", fakeredis.FakeStrictRedis()):
+            first = Comparison(
+                user=self.owner, base_commit=self.base, head_commit=self.head
+            )
+            assert first.git_comparison == {
+                "commits": [self.base.commitid, self.head.commitid],
+                "diff": {"files": {}},
+            }
+
+            # served from redis by another process
+            git_comparison_cache.local.clear()
+            second = Comparison(
+                user=self.owner, base_commit=self.base, head_commit=self.head
+            )
+            assert second.git_comparison == first.git_comparison
+            assert second.has_unmerged_base_commits is True
+
+        assert adapter.calls == [
+            (self.base.commitid, self.head.commitid),
+            (self.head.commitid, self.base.commitid),
+        ]
+
+
 class SegmentTests(TestCase):
     def _report_lines(self, hits):
         return [
@@ -1673,6 +1812,39 @@ class ComparisonReportTest(TestCase):
         impacted_file = self.comparison_report.impacted_file("fileB")
         assert impacted_file.head_name == "fileB"
 
+    @patch("services.archive.ArchiveService.read_file")
+    def test_impacted_file_missing(self, read_file):
+        read_file.return_value = mock_data_from_archive
+        assert self.comparison_report.impacted_file("fileZ") is None
+        assert self.comparison_report.impacted_file("fileA").head_name == "fileA"
+        assert read_file.call_count == 1
+
+    @override_settings(COMPARISON_REPORT_CACHE_ENABLED=True)
+    @patch("services.cache.redis_lock.Lock")
+    @patch("services.archive.ArchiveService.read_file")
+    def test_comparison_data_is_shared_between_comparison_reports(
+        self, read_file, lock_mock
+    ):
+        read_file.return_value = mock_data_from_archive
+        comparison_report_cache.local.clear()
+
+        with patch.object(
+            comparison_report_cache, "_redis", fakeredis.FakeStrictRedis()
+        ):
+            first = ComparisonReport(self.comparison)
+            assert first.impacted_file("fileB").head_name == "fileB"
+            second = ComparisonReport(self.comparison)
+            assert second.impacted_file("fileB").head_name == "fileB"
+            assert read_file.call_count == 1
+
+            # a recomputed comparison invalidates the cached data
+            self.comparison.save()
+            third = ComparisonReport(self.comparison)
+            assert third.impacted_file("fileB").head_name == "fileB"
+            assert read_file.call_count == 2
+
+        comparison_report_cache.local.clear()
+
     @patch("services.archive.ArchiveService.read_file")
     def test_impacted_files_filtered_by_indirect_changes(self, read_file):
         read_file.return_value = mock_data_from_archive
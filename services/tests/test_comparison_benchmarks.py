@@ -0,0 +1,88 @@
+"""
+Checks that traversing large file comparisons stays linear in the size of the
+diff (ex. that segments aren't copied or popped from), by asserting on the work
+done per line rather than on timings.
+"""
+import json
+from unittest.mock import patch
+
+from shared.reports.resources import ReportFile
+
+from services.comparison import FileComparison, FileComparisonTraverseManager
+
+CHANGED_LINES = 10000
+
+
+def _large_diff(changed_lines=CHANGED_LINES):
+    # alternate hunks of added, removed and unchanged lines
+    segments, line = [], 1
+    while line < changed_lines:
+        lines = ["+added"] * 40 + ["-removed"] * 40 + ["context"] * 20
+        segments.append(
+            {
+                "header": [str(line), "60", str(line), "60"],
+                "lines": lines,
+            }
+        )
+        line += 100
+    return segments
+
+
+def _report_file(name, eof):
+    report_file = ReportFile(name)
+    report_file._lines = [[i % 2, "", [[0, i % 2]], 0, None] for i in range(eof)]
+    return report_file
+
+
+def test_traverse_large_diff_does_not_copy_segments():
+    segments = _large_diff()
+    before = json.dumps(segments)
+    eof = CHANGED_LINES + 1
+
+    manager = FileComparisonTraverseManager(
+        head_file_eof=eof, base_file_eof=eof, segments=segments
+    )
+    assert sum(1 for _ in manager.traverse()) >= CHANGED_LINES
+
+    assert manager.segments is segments
+    # nothing was popped from the segments
+    assert json.dumps(segments) == before
+
+
+def test_traverse_does_constant_work_per_line():
+    traversing_diff = FileComparisonTraverseManager.traversing_diff
+
+    def count_calls(segments):
+        eof = len(segments) * 100 + 1
+        manager = FileComparisonTraverseManager(
+            head_file_eof=eof, base_file_eof=eof, segments=segments
+        )
+        with patch.object(
+            FileComparisonTraverseManager,
+            "traversing_diff",
+            autospec=True,
+            side_effect=traversing_diff,
+        ) as traversing_diff_mock:
+            num_lines = sum(1 for _ in manager.traverse())
+        return num_lines, traversing_diff_mock.call_count
+
+    for segments in (_large_diff(CHANGED_LINES), _large_diff(4 * CHANGED_LINES)):
+        num_lines, calls = count_calls(segments)
+        # once to read the line and once to know whether it is part of the diff
+        assert calls == 2 * num_lines
+
+
+def test_file_comparison_lines_and_change_summary_large_diff():
+    segments = _large_diff()
+    before = json.dumps(segments)
+    eof = CHANGED_LINES + 1
+
+    file_comparison = FileComparison(
+        base_file=_report_file("file.py", eof),
+        head_file=_report_file("file.py", eof),
+        diff_data={"segments": segments},
+        bypass_max_diff=True,
+    )
+    assert len(file_comparison.lines) >= CHANGED_LINES
+    assert file_comparison.change_summary is not None
+    assert json.dumps(segments) == before
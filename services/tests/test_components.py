@@ -14,6 +14,7 @@ from services.components import (
     ComponentComparison,
     commit_components,
     component_filtered_report,
+    component_filtered_totals,
 )
 
 
@@ -132,6 +133,32 @@ class ComponentServiceTest(TransactionTestCase):
         assert report_py.files == ["file_2.py"]
         assert report_py.totals.coverage == report.get("file_2.py").totals.coverage
 
+    def test_component_filtered_report_memoized(self):
+        report = sample_report()
+        component = Component.from_dict(
+            {
+                "component_id": "golang",
+                "paths": [".*/*.go"],
+            }
+        )
+
+        filtered_report = component_filtered_report(report, component)
+        with patch.object(report, "filter") as report_filter:
+            assert component_filtered_report(report, component) is filtered_report
+            totals = component_filtered_totals(report, component)
+            assert totals == filtered_report.totals
+            assert component_filtered_totals(report, component) is totals
+            report_filter.assert_not_called()
+
+        # a component with the same id but different paths (from another yaml)
+        other_component = Component.from_dict(
+            {
+                "component_id": "golang",
+                "paths": [".*/*.py"],
+            }
+        )
+        assert component_filtered_report(report, other_component).files == ["file_2.py"]
+
 
 class ComponentComparisonTest(TransactionTestCase):
     def setUp(self):
@@ -0,0 +1,72 @@
+import json
+
+from shared.reports.resources import ReportFile
+
+from services.comparison import (
+    CreateChangeSummaryVisitor,
+    FileComparisonTraverseManager,
+)
+from services.line_coverage import NO_COVERAGE, LineCoverage
+
+lines = [
+    [1, None, [[0, 1], [1, 0], [2, 3]], None, None],
+    "",
+    json.dumps([0, None, [[0, 0]], None, None]),
+    ["1/2", "b", [[1, "1/2"]], None, None],
+    None,
+]
+
+
+class TestLineCoverage:
+    def test_from_lines(self):
+        coverage = LineCoverage.from_lines(lines)
+        assert len(coverage) == 5
+        assert coverage.types == bytes([0, NO_COVERAGE, 1, 2, NO_COVERAGE])
+
+    def test_from_chunk_lines(self):
+        # lines still stored as the JSON text of the chunk
+        chunk_lines = [json.dumps(line) if line else "" for line in lines]
+        chunk_lines += [json.dumps(["2/2", None]), json.dumps([None, None]), ""]
+        coverage = LineCoverage.from_lines(chunk_lines)
+        assert coverage.types == bytes(
+            [0, NO_COVERAGE, 1, 2, NO_COVERAGE, 0, NO_COVERAGE, NO_COVERAGE]
+        )
+        assert LineCoverage.from_lines([""]).types == bytes([NO_COVERAGE])
+
+    def test_from_report_file(self):
+        assert len(LineCoverage.from_report_file(None)) == 0
+
+        report_file = ReportFile("file1", lines=[[1, "", [[0, 1]], 0, 0]])
+        assert LineCoverage.from_report_file(report_file).types == bytes([0])
+
+    def test_change_summary_matches_visitor(self):
+        base_file = ReportFile(
+            "file1",
+            lines=[[0, "", [], 0, 0], [1, "", [], 0, 0], "", [1, "", [], 0, 0]],
+        )
+        head_file = ReportFile(
+            "file1",
+            lines=[
+                [1, "", [], 0, 0],
+                ["1/2", "", [], 0, 0],
+                [0, "", [], 0, 0],
+                [1, "", [], 0, 0],
+                [0, "", [], 0, 0],
+            ],
+        )
+        visitor = CreateChangeSummaryVisitor(base_file, head_file)
+        FileComparisonTraverseManager(
+            head_file_eof=head_file.eof, base_file_eof=base_file.eof
+        ).apply([visitor])
+
+        summary = LineCoverage.from_report_file(base_file).change_summary(
+            LineCoverage.from_report_file(head_file)
+        )
+        assert summary == visitor.summary
+        assert summary == {"misses": -1, "hits": 0, "partials": 1}
+
+    def test_change_summary_different_lengths(self):
+        base = LineCoverage.from_lines(lines)
+        head = LineCoverage.from_lines([[0, None, [], None, None]] * 2)
+        assert base.change_summary(head) == {"hits": -1, "misses": 1}
+        assert head.change_summary(LineCoverage.from_lines([])) == {}
@@ -10,10 +10,13 @@ from core.tests.factories import CommitFactory
 from services.path import (
     Dir,
     File,
+    PathIndex,
+    PathTrie,
     PrefixedPath,
     ReportPaths,
     dashboard_commit_file_url,
     provider_path_exists,
+    report_path_index,
 )
 from services.report import SerializableReport
 
@@ -259,6 +262,119 @@ class TestReportPathsNested(TestCase):
             File(full_path="src/ui/A/A.js", totals=totals3),
         ]
 
+    def test_single_directory_totals(self):
+        report_paths = ReportPaths(self.report)
+        dir, src = report_paths.single_directory()
+        assert dir.full_path == "dir"
+        assert (dir.lines, dir.hits, dir.misses) == (40, 22, 8)
+        subdir = dir.children[1]
+        assert (subdir.lines, subdir.hits, subdir.misses) == (30, 14, 6)
+        assert (src.lines, src.hits, src.misses) == (20, 6, 4)
+
+    def test_single_directory_search(self):
+        report_paths = ReportPaths(self.report, path="dir", search_term="file3")
+        assert report_paths.single_directory() == [
+            Dir(
+                full_path="dir/subdir",
+                children=[
+                    Dir(
+                        full_path="dir/subdir/dir1",
+                        children=[
+                            File(full_path="dir/subdir/dir1/file3.py", totals=totals3),
+                        ],
+                    ),
+                    Dir(
+                        full_path="dir/subdir/dir2",
+                        children=[
+                            File(full_path="dir/subdir/dir2/file3.py", totals=totals3),
+                        ],
+                    ),
+                ],
+            ),
+        ]
+        assert report_paths.single_directory()[0].lines == 20
+
+    def test_single_directory_file_path(self):
+        report_paths = ReportPaths(self.report, path="dir/file1.py")
+        assert report_paths.single_directory() == [
+            File(full_path="dir/file1.py", totals=totals1),
+        ]
+
+    def test_trie_built_once_per_report(self):
+        with patch("services.path.PathTrie", wraps=PathTrie) as trie:
+            ReportPaths(self.report, path="dir").single_directory()
+            ReportPaths(self.report, path="src").full_filelist()
+            assert trie.call_count == 1
+
+
+class TestPathTrie(TestCase):
+    def setUp(self):
+        files = {
+            "dir/subdir/file2.py": file_data2,
+            "file1.py": file_data1,
+            "dir/file3.py": file_data3,
+        }
+        self.report = SerializableReport(files=files)
+        self.trie = PathTrie(self.report)
+
+    def test_find(self):
+        assert self.trie.find("").full_path == ""
+        assert self.trie.find("dir/subdir").full_path == "dir/subdir"
+        assert self.trie.find("dir/subdir").is_file is False
+        assert self.trie.find("dir/file3.py").is_file is True
+        assert self.trie.find("dir/sub") is None
+        assert self.trie.find("other/file.py") is None
+
+    def test_files_in_report_order(self):
+        assert [file.full_path for file in self.trie.files(self.trie.root)] == [
+            "dir/subdir/file2.py",
+            "file1.py",
+            "dir/file3.py",
+        ]
+
+    def test_rollup(self):
+        totals = self.trie.rollup(self.trie.root)
+        assert (totals.lines, totals.hits, totals.misses) == (30, 19, 6)
+        assert self.trie.find("dir").totals.hits == 11
+        assert self.trie.find("dir/subdir/file2.py").totals == totals2
+
+    def test_rollup_only_computes_missing_totals(self):
+        self.trie.rollup(self.trie.find("dir/subdir"))
+        with patch.object(self.report, "get", wraps=self.report.get) as get:
+            self.trie.rollup(self.trie.root)
+            assert sorted(call.args[0] for call in get.call_args_list) == [
+                "dir/file3.py",
+                "file1.py",
+            ]
+
+
+class TestPathIndex(TestCase):
+    def test_starting_with(self):
+        index = PathIndex(["src/b.py", "src.py", "src/a.py", "lib/c.py", "srcx/d.py"])
+        assert index.paths == [
+            "lib/c.py",
+            "src.py",
+            "src/a.py",
+            "src/b.py",
+            "srcx/d.py",
+        ]
+        assert index.starting_with("src/") == ["src/a.py", "src/b.py"]
+        assert index.starting_with("src") == [
+            "src.py",
+            "src/a.py",
+            "src/b.py",
+            "srcx/d.py",
+        ]
+        assert index.starting_with("other") == []
+        assert index.starting_with("") == index.paths
+
+    def test_built_once_per_report(self):
+        report = SerializableReport(files={"file1.py": file_data1})
+        with patch("services.path.PathIndex", wraps=PathIndex) as path_index:
+            assert report_path_index(report).paths == ["file1.py"]
+            assert report_path_index(report).paths == ["file1.py"]
+            assert path_index.call_count == 1
+
 
 class MockedProviderAdapter:
     async def list_files(self, *args, **kwargs):
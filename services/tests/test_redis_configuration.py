@@ -1,9 +1,18 @@
-from services.redis_configuration import get_redis_connection
+from services.redis_configuration import (
+    _get_redis_instance_from_url,
+    get_redis_connection,
+)
 
 
 def test_get_redis_connection(mocker):
     mocker.patch("services.redis_configuration.get_config", return_value=None)
     mocked = mocker.patch("services.redis_configuration.Redis.from_url")
+    _get_redis_instance_from_url.cache_clear()
     res = get_redis_connection()
     assert res is not None
     mocked.assert_called_with("redis://redis:6379")
+
+    # the connection is shared
+    assert get_redis_connection() is res
+    mocked.assert_called_once()
+    _get_redis_instance_from_url.cache_clear()
@@ -2,7 +2,8 @@ from decimal import Decimal
 from pathlib import Path
 from unittest.mock import MagicMock, patch
 
-from django.test import TestCase
+import fakeredis
+from django.test import TestCase, override_settings
 from shared.utils.sessions import SessionType
 
 from core.tests.factories import CommitFactory, CommitWithReportFactory
@@ -11,7 +12,14 @@ from reports.tests.factories import (
     UploadFlagMembershipFactory,
     UploadLevelTotalsFactory,
 )
-from services.report import build_report, build_report_from_commit
+from services.report import (
+    build_report,
+    build_report_file_from_commit,
+    build_report_from_commit,
+    commit_ancestors,
+    find_report_file_in_ancestors,
+    report_chunks_cache,
+)
 
 current_file = Path(__file__)
 
@@ -324,3 +332,131 @@ class ReportServiceTest(TestCase):
             0,
             [1, 2, 1, 1, 0, "50.00000", 0, 0, 0, 0, 0, 0, 0],
         ]
+
+    @override_settings(REPORT_CACHE_ENABLED=True)
+    @patch("services.archive.ArchiveService.read_chunks")
+    def test_build_report_from_commit_cached_chunks(self, read_chunks_mock):
+        f = open(current_file.parent / "samples" / "chunks.txt", "r")
+        read_chunks_mock.return_value = f.read()
+        commit = CommitWithReportFactory.create(message="aaaaa", commitid="abf6d4d")
+
+        report_chunks_cache.local.clear()
+        with patch.object(report_chunks_cache, "_redis", fakeredis.FakeStrictRedis()):
+            res = build_report_from_commit(commit)
+            assert len(res._chunks) == 3
+            assert read_chunks_mock.call_count == 1
+
+            # served from the in-process cache
+            res = build_report_from_commit(commit)
+            assert len(res._chunks) == 3
+            assert read_chunks_mock.call_count == 1
+
+            # served from the redis cache
+            report_chunks_cache.local.clear()
+            res = build_report_from_commit(commit)
+            assert len(res._chunks) == 3
+            assert read_chunks_mock.call_count == 1
+
+            # a new upload being processed rewrites the report details
+            commit.reports.first().reportdetails.save()
+            res = build_report_from_commit(commit)
+            assert len(res._chunks) == 3
+            assert read_chunks_mock.call_count == 2
+        report_chunks_cache.local.clear()
+
+    @patch("services.archive.ArchiveService.read_chunk")
+    def test_build_report_file_from_commit(self, read_chunk_mock):
+        f = open(current_file.parent / "samples" / "chunks.txt", "r")
+        chunks = f.read().split("\n<<<<< end_of_chunk >>>>>\n")
+        read_chunk_mock.return_value = chunks[2]
+        commit = CommitWithReportFactory.create(message="aaaaa", commitid="abf6d4d")
+
+        report_file = build_report_file_from_commit(commit, "awesome/__init__.py")
+        assert report_file.name == "awesome/__init__.py"
+        assert tuple(report_file.totals) == (
+            0,
+            10,
+            8,
+            2,
+            0,
+            "80.00000",
+            0,
+            0,
+            0,
+            0,
+            0,
+            0,
+            0,
+        )
+        assert len(list(report_file.lines)) == 10
+        read_chunk_mock.assert_called_once_with("abf6d4d", 2)
+
+    @patch("services.archive.ArchiveService.read_chunk")
+    def test_build_report_file_from_commit_missing_file(self, read_chunk_mock):
+        commit = CommitWithReportFactory.create(message="aaaaa", commitid="abf6d4d")
+
+        assert build_report_file_from_commit(commit, "missing.py") is None
+        assert not read_chunk_mock.called
+
+    def test_commit_ancestors(self):
+        commit1 = CommitFactory()
+        commit2 = CommitFactory(
+            repository=commit1.repository, parent_commit_id=commit1.commitid
+        )
+        commit3 = CommitFactory(
+            repository=commit1.repository, parent_commit_id=commit2.commitid
+        )
+        # same sha in another repository
+        CommitFactory(commitid=commit2.commitid)
+
+        with self.assertNumQueries(1):
+            assert commit_ancestors(commit3, 5) == [commit3, commit2, commit1]
+        assert commit_ancestors(commit3, 1) == [commit3, commit2]
+        assert commit_ancestors(commit3, 0) == [commit3]
+
+    @patch("services.archive.ArchiveService.read_chunk")
+    def test_find_report_file_in_ancestors(self, read_chunk_mock):
+        read_chunk_mock.return_value = ""
+        commit1 = CommitWithReportFactory(message="aaaaa", commitid="abf6d4d")
+        commit2 = CommitWithReportFactory(
+            repository=commit1.repository,
+            parent_commit_id=commit1.commitid,
+            state="pending",
+        )
+        commit3 = CommitFactory(
+            repository=commit1.repository, parent_commit_id=commit2.commitid
+        )
+
+        def is_valid(commit):
+            return commit.state == "complete"
+
+        commit, report_file = find_report_file_in_ancestors(
+            commit3, "awesome/__init__.py", 5, is_valid
+        )
+        assert commit == commit1
+        assert report_file.name == "awesome/__init__.py"
+        # only the chunk of the found file is loaded
+        read_chunk_mock.assert_called_once_with("abf6d4d", 2)
+
+        # stops at the oldest sha (or after walking back enough)
+        for kwargs in [
+            dict(walk_back=5, oldest_sha=commit2.commitid),
+            dict(walk_back=1),
+        ]:
+            read_chunk_mock.reset_mock()
+            commit, report_file = find_report_file_in_ancestors(
+                commit3, "awesome/__init__.py", is_valid=is_valid, **kwargs
+            )
+            assert commit == commit2
+            assert report_file.name == "awesome/__init__.py"
+            read_chunk_mock.assert_called_once_with(commit2.commitid, 2)
+
+        commit, report_file = find_report_file_in_ancestors(
+            commit3, "missing.py", 5, is_valid
+        )
+        assert commit == commit1
+        assert report_file is None
+
+    def test_build_report_file_from_commit_no_report(self):
+        commit = CommitFactory()
+        assert build_report_file_from_commit(commit, "awesome/__init__.py") is None
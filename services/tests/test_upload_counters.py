@@ -0,0 +1,143 @@
+from datetime import timedelta
+from unittest.mock import patch
+
+import fakeredis
+import pytest
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from shared.reports.enums import UploadType
+
+from codecov_auth.tests.factories import OwnerFactory
+from core.tests.factories import CommitFactory, RepositoryFactory
+from reports.tests.factories import CommitReportFactory, UploadFactory
+from services.upload_counters import (
+    _count,
+    commit_upload_count,
+    owner_upload_count,
+    record_dispatched_uploads,
+    record_upload,
+)
+
+
+@override_settings(UPLOAD_COUNTERS_ENABLED=True)
+class UploadCountersTests(TestCase):
+    def setUp(self):
+        self.redis = fakeredis.FakeStrictRedis()
+        patcher = patch(
+            "services.upload_counters.get_redis_connection", return_value=self.redis
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.owner = OwnerFactory()
+        self.repo = RepositoryFactory(author=self.owner, private=True)
+        self.commit = CommitFactory(repository=self.repo)
+        self.report = CommitReportFactory(commit=self.commit)
+
+    def test_commit_upload_count(self):
+        UploadFactory(report=self.report)
+        UploadFactory(report=self.report, state="error")
+        UploadFactory(report=self.report, upload_type=UploadType.CARRIEDFORWARD.db_name)
+
+        # reconciled from the database
+        assert commit_upload_count(self.commit) == 1
+
+        upload = UploadFactory(report=self.report)
+        with self.assertNumQueries(0):
+            record_upload(self.repo, self.commit, upload)
+            assert commit_upload_count(self.commit) == 2
+            # uploads are counted once
+            record_upload(self.repo, self.commit, upload)
+            assert commit_upload_count(self.commit) == 2
+
+    def test_commit_upload_count_is_reconciled(self):
+        upload = UploadFactory(report=self.report)
+        assert commit_upload_count(self.commit) == 1
+
+        upload.state = "error"
+        upload.save()
+        assert commit_upload_count(self.commit) == 1
+
+        self.redis.delete(f"upload_counters/commit/{self.commit.id}/reconciled")
+        assert commit_upload_count(self.commit) == 0
+
+    def test_commit_upload_count_dispatched_uploads(self):
+        UploadFactory(report=self.report, upload_type="uploaded")
+        assert commit_upload_count(self.commit) == 1
+        assert owner_upload_count(self.owner.ownerid, 250) == 1
+
+        with self.assertNumQueries(0):
+            record_dispatched_uploads(self.repo, self.commit, ["abc", "def"])
+            assert commit_upload_count(self.commit) == 3
+            assert owner_upload_count(self.owner.ownerid, 250) == 3
+
+    def test_count_rebuild_keeps_concurrent_record(self):
+        self.redis.zadd("key", {"stale": 1.0})
+        calls = []
+
+        def reconcile():
+            calls.append(1)
+            # an upload is recorded while the database is read
+            self.redis.zadd("key", {"3": timezone.now().timestamp() + 1})
+            return [(1, 1.0), (2, 2.0)]
+
+        assert _count("key", 60, reconcile) == 3
+        assert len(calls) == 1
+        assert sorted(self.redis.zrange("key", 0, -1)) == [b"1", b"2", b"3"]
+        assert not self.redis.exists("key/rebuild")
+
+    def test_count_single_rebuild(self):
+        self.redis.zadd("key", {"1": 1.0})
+        # another request is rebuilding the set
+        self.redis.set("key/reconciled", 1)
+
+        def reconcile():
+            raise AssertionError("reconcile should not be called")
+
+        # the current count is returned meanwhile
+        assert _count("key", 60, reconcile) == 1
+
+    def test_count_rebuild_failure(self):
+        def reconcile():
+            raise ValueError()
+
+        with pytest.raises(ValueError):
+            _count("key", 60, reconcile)
+        # the next request rebuilds the set
+        assert not self.redis.exists("key/reconciled")
+        assert _count("key", 60, lambda: [(1, 1.0)]) == 1
+
+    def test_owner_upload_count(self):
+        UploadFactory(report=self.report, upload_type="uploaded")
+        UploadFactory(
+            report__commit__repository=RepositoryFactory(
+                author=self.owner, private=False
+            ),
+            upload_type="uploaded",
+        )
+        assert owner_upload_count(self.owner.ownerid, 250) == 1
+
+        upload = UploadFactory(report=self.report, upload_type="uploaded")
+        record_upload(self.repo, self.commit, upload)
+        with self.assertNumQueries(0):
+            assert owner_upload_count(self.owner.ownerid, 250) == 2
+            assert owner_upload_count(self.owner.ownerid, 1) == 1
+
+    def test_owner_upload_count_window(self):
+        upload = UploadFactory(report=self.report, upload_type="uploaded")
+        upload.created_at = timezone.now() - timedelta(days=31)
+        upload.save()
+        assert owner_upload_count(self.owner.ownerid, 250) == 0
+
+        record_upload(self.repo, self.commit, upload)
+        assert owner_upload_count(self.owner.ownerid, 250) == 0
+        assert self.redis.zcard(f"upload_counters/owner/{self.owner.ownerid}") == 0
+
+    @override_settings(UPLOAD_COUNTERS_ENABLED=False)
+    def test_disabled(self):
+        upload = UploadFactory(report=self.report, upload_type="uploaded")
+        record_upload(self.repo, self.commit, upload)
+        assert self.redis.keys() == []
+
+        assert commit_upload_count(self.commit) == 1
+        assert owner_upload_count(self.owner.ownerid, 250) == 1
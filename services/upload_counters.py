@@ -0,0 +1,199 @@
+from datetime import timedelta
+from typing import Callable, Dict, Iterable, Optional, Tuple
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+from shared.reports.enums import UploadType
+
+from core.models import Commit, Repository
+from reports.models import ReportSession
+from services.redis_configuration import get_redis_connection
+
+# window of the monthly uploads limits of the owners
+OWNER_UPLOADS_WINDOW = timedelta(days=30)
+
+# the counters of commits only matter while uploads are being made to them
+COMMIT_COUNTER_TTL = 24 * 60 * 60
+
+
+def _commit_key(commit: Commit) -> str:
+    return f"upload_counters/commit/{commit.id}"
+
+
+def _owner_key(ownerid: int) -> str:
+    return f"upload_counters/owner/{ownerid}"
+
+
+def _count(
+    key: str,
+    ttl: int,
+    reconcile: Callable[[], Iterable[Tuple[int, float]]],
+    min_timestamp: Optional[float] = None,
+) -> int:
+    """
+    Returns the number of uploads in the sorted set at `key` (the upload ids
+    scored by their creation timestamp), optionally only counting the ones
+    created since `min_timestamp`.
+
+    The sorted set is rebuilt from the (upload id, timestamp) pairs returned by
+    `reconcile` when it was last rebuilt more than `UPLOAD_COUNTERS_RECONCILE_INTERVAL`
+    seconds ago, which catches the uploads created (or errored) by the worker.
+    Only the request that sets the `reconciled` flag (SET NX) rebuilds the set,
+    the others keep reading the current count meanwhile.  The rebuilt set is
+    written to a temporary key and merged over `key` in a single MULTI step that
+    keeps the uploads recorded since the rebuild started, so no WATCH (and no
+    retry while uploads keep being recorded) is needed.
+    """
+    redis = get_redis_connection()
+    reconciled_key = f"{key}/reconciled"
+
+    if redis.set(
+        reconciled_key, 1, ex=settings.UPLOAD_COUNTERS_RECONCILE_INTERVAL, nx=True
+    ):
+        started_at = timezone.now().timestamp()
+        try:
+            members = {
+                str(upload_id): timestamp for upload_id, timestamp in reconcile()
+            }
+        except Exception:
+            # let the next request rebuild the set
+            redis.delete(reconciled_key)
+            raise
+
+        rebuilt_key = f"{key}/rebuild"
+        pipeline = redis.pipeline()
+        pipeline.delete(rebuilt_key)
+        if members:
+            pipeline.zadd(rebuilt_key, members)
+        # the uploads recorded before the rebuild started are in `members`
+        pipeline.zremrangebyscore(key, "-inf", f"({started_at}")
+        pipeline.zunionstore(key, [key, rebuilt_key], aggregate="MAX")
+        pipeline.delete(rebuilt_key)
+        pipeline.expire(key, ttl)
+        pipeline.execute()
+
+    if min_timestamp is not None:
+        # slide the window
+        redis.zremrangebyscore(key, "-inf", f"({min_timestamp}")
+    return redis.zcard(key)
+
+
+def _record(
+    repository: Repository,
+    commit: Commit,
+    members: Dict[str, float],
+    counts_for_commit: bool,
+    counts_for_owner: bool,
+):
+    pipeline = get_redis_connection().pipeline()
+    if counts_for_commit:
+        pipeline.zadd(_commit_key(commit), members)
+        pipeline.expire(_commit_key(commit), COMMIT_COUNTER_TTL)
+    if counts_for_owner and repository.private:
+        pipeline.zadd(_owner_key(repository.author_id), members)
+        pipeline.expire(
+            _owner_key(repository.author_id),
+            int(OWNER_UPLOADS_WINDOW.total_seconds()),
+        )
+    pipeline.execute()
+
+
+def record_upload(repository: Repository, commit: Commit, upload: ReportSession):
+    """
+    Counts a newly created upload in the counters of its commit and owner.
+    """
+    if not settings.UPLOAD_COUNTERS_ENABLED:
+        return
+
+    _record(
+        repository,
+        commit,
+        {str(upload.id): upload.created_at.timestamp()},
+        counts_for_commit=(
+            upload.state != "error"
+            and upload.upload_type != UploadType.CARRIEDFORWARD.db_name
+        ),
+        counts_for_owner=upload.upload_type == "uploaded",
+    )
+
+
+def record_dispatched_uploads(
+    repository: Repository, commit: Commit, reportids: Iterable[str]
+):
+    """
+    Counts uploads sent to the worker before their upload is created (the
+    legacy and batch uploads, whose uploads are created by the worker) in the
+    counters of their commit and owner.  They're counted by report id until the
+    next rebuild of the counters replaces them with their uploads.
+    """
+    if not settings.UPLOAD_COUNTERS_ENABLED:
+        return
+
+    timestamp = timezone.now().timestamp()
+    _record(
+        repository,
+        commit,
+        {f"report/{reportid}": timestamp for reportid in reportids},
+        counts_for_commit=True,
+        counts_for_owner=True,
+    )
+
+
+def commit_upload_count(commit: Commit) -> int:
+    """
+    The number of (non-errored, non-carried forward) uploads of the given commit.
+    """
+    queryset = ReportSession.objects.filter(
+        ~Q(state="error"),
+        ~Q(upload_type=UploadType.CARRIEDFORWARD.db_name),
+        report__commit=commit,
+    )
+
+    if not settings.UPLOAD_COUNTERS_ENABLED:
+        return queryset.count()
+
+    def reconcile():
+        return [
+            (upload_id, created_at.timestamp())
+            for upload_id, created_at in queryset.values_list("id", "created_at")
+        ]
+
+    return _count(_commit_key(commit), COMMIT_COUNTER_TTL, reconcile)
+
+
+def owner_upload_count(ownerid: int, limit: int) -> int:
+    """
+    The number of uploads made to the private repositories of the given owner in
+    the last 30 days, counting at most `limit` uploads.
+    """
+    queryset = ReportSession.objects.filter(
+        report__commit__repository__author_id=ownerid,
+        report__commit__repository__private=True,
+        created_at__gte=timezone.now() - OWNER_UPLOADS_WINDOW,
+        # attempt at making the query more performant by telling the db to not
+        # check old commits, which are unlikely to have recent uploads
+        report__commit__timestamp__gte=timezone.now() - timedelta(days=60),
+        upload_type="uploaded",
+    )
+
+    if not settings.UPLOAD_COUNTERS_ENABLED:
+        return queryset[:limit].count()
+
+    def reconcile():
+        # the newest uploads expire last from the window so, when there are more
+        # than `limit` of them, the counter stays >= `limit` until it is rebuilt
+        return [
+            (upload_id, created_at.timestamp())
+            for upload_id, created_at in queryset.order_by("-created_at").values_list(
+                "id", "created_at"
+            )[:limit]
+        ]
+
+    count = _count(
+        _owner_key(ownerid),
+        int(OWNER_UPLOADS_WINDOW.total_seconds()),
+        reconcile,
+        min_timestamp=(timezone.now() - OWNER_UPLOADS_WINDOW).timestamp(),
+    )
+    return min(count, limit)
@@ -14,7 +14,9 @@ from timeseries.models import Dataset
 
 
 def enqueue_tasks(datasets: QuerySet, start_date: datetime, end_date: datetime):
-    count = datasets.update(backfilled=False)
+    # the measurements are rewritten from the newest commits, so the backfill
+    # watermark restarts until the worker moves it back again
+    count = datasets.update(backfilled=False, backfilled_from=None)
 
     for dataset in datasets:
         TaskService().backfill_dataset(
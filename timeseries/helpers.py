@@ -1,7 +1,9 @@
 import math
+from dataclasses import dataclass
 from datetime import datetime, timedelta
-from typing import Iterable, List, Optional
+from typing import Dict, Hashable, Iterable, List, Mapping, Optional, Union
 
+from dateutil import parser
 from django.conf import settings
 from django.db import connections
 from django.db.models import (
@@ -89,15 +91,19 @@ def aggregate_measurements(
 
 
 def _filter_repos(
-    queryset: QuerySet, repos: Optional[List[Repository]], column_name: str = "repo_id"
+    queryset: QuerySet,
+    repos: Optional[List[Repository]],
+    column_name: str = "repo_id",
+    branch: Optional[str] = None,
 ) -> QuerySet:
     """
     Filter the given generic queryset by a set of (repoid, branch) tuples.
+    The repos' default branches are used unless a `branch` is given.
     """
     if repos:
         queryset = queryset.extra(
             where=[f"({column_name}, branch) in %s"],
-            params=[tuple((repo.repoid, repo.branch) for repo in repos)],
+            params=[tuple((repo.repoid, branch or repo.branch) for repo in repos)],
         )
     return queryset
 
@@ -257,6 +263,100 @@ def fill_sparse_measurements(
     return intervals
 
 
+@dataclass
+class AlignedMeasurements:
+    """
+    Measurements of several series aligned on the same time bins: `timestamps`
+    holds the start date of every bin in the requested range and, for each
+    series key, the `avg`, `min` and `max` columns hold the values of those bins
+    (`None` for the bins the series has no measurement in).
+    """
+
+    timestamps: List[datetime]
+    avg: Dict[Hashable, List[Optional[float]]]
+    min: Dict[Hashable, List[Optional[float]]]
+    max: Dict[Hashable, List[Optional[float]]]
+
+    def measurements(self, key: Hashable) -> List[dict]:
+        """
+        The measurements of a single series in the format returned by
+        `fill_sparse_measurements`.
+        """
+        if key not in self.avg:
+            return []
+        return [
+            {"timestamp_bin": timestamp, "avg": avg, "min": min, "max": max}
+            for timestamp, avg, min, max in zip(
+                self.timestamps, self.avg[key], self.min[key], self.max[key]
+            )
+        ]
+
+
+def align_sparse_measurements(
+    series: Mapping[Hashable, Iterable[dict]],
+    interval: Interval,
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+) -> AlignedMeasurements:
+    """
+    Batched version of `fill_sparse_measurements` for many series (flags, components,
+    repos, ...) sharing the same interval and time range.
+
+    Rather than walking the range bin by bin for each series, every measurement is
+    placed directly in its series' columns by computing its bin index.  A series'
+    first bin carries forward its oldest measurement the same way as in
+    `fill_sparse_measurements`, and series without any measurement are left out.
+    When `start_date` is not given the range starts at the oldest measurement of
+    all the series.
+    """
+    by_key = {}
+    for key, measurements in series.items():
+        by_timestamp = {
+            measurement["timestamp_bin"].replace(tzinfo=timezone.utc): measurement
+            for measurement in measurements
+        }
+        if by_timestamp:
+            by_key[key] = by_timestamp
+
+    aligned = AlignedMeasurements(timestamps=[], avg={}, min={}, max={})
+    if not by_key:
+        return aligned
+
+    delta = interval_deltas[interval]
+
+    if start_date is None:
+        start_date = min(min(by_timestamp) for by_timestamp in by_key.values())
+    start_date = aligned_start_date(interval, start_date)
+
+    if end_date is None:
+        end_date = timezone.now()
+
+    count = (end_date - start_date) // delta + 1 if end_date >= start_date else 0
+    aligned.timestamps = [start_date + index * delta for index in range(count)]
+
+    for key, by_timestamp in by_key.items():
+        avgs, mins, maxs = [None] * count, [None] * count, [None] * count
+        for timestamp, measurement in by_timestamp.items():
+            index, offset = divmod(timestamp - start_date, delta)
+            if offset or not 0 <= index < count:
+                # not the start of a bin within the range
+                continue
+            avgs[index] = measurement["avg"]
+            mins[index] = measurement["min"]
+            maxs[index] = measurement["max"]
+
+        oldest_date = min(by_timestamp)
+        if oldest_date <= start_date and count and avgs[0] is None:
+            # we're missing the first datapoint but we can carry forward
+            # and older measurement that was selected
+            oldest = by_timestamp[oldest_date]
+            avgs[0], mins[0], maxs[0] = oldest["avg"], oldest["min"], oldest["max"]
+
+        aligned.avg[key], aligned.min[key], aligned.max[key] = avgs, mins, maxs
+
+    return aligned
+
+
 def coverage_fallback_query(
     interval: Interval,
     start_date: Optional[datetime] = None,
@@ -324,6 +424,98 @@ def _commits_coverage(
     )
 
 
+def _as_aware_datetime(value: Union[str, datetime]) -> datetime:
+    if isinstance(value, str):
+        value = parser.parse(value)
+    if timezone.is_naive(value):
+        value = timezone.make_aware(value, timezone.utc)
+    return value
+
+
+def backfilled_start_date(interval: Interval, dataset: Dataset) -> Optional[datetime]:
+    """
+    Start date of the oldest `interval` bin for which all the measurements of the
+    dataset have been backfilled, according to its backfill watermark.
+    Returns `None` if the backfill hasn't recorded any progress yet.
+    """
+    if dataset.backfilled_from is None:
+        return None
+
+    backfilled_from = _as_aware_datetime(dataset.backfilled_from)
+    start_date = aligned_start_date(interval, backfilled_from)
+    if start_date < backfilled_from:
+        # the bin containing the watermark is only partially backfilled
+        start_date += interval_deltas[interval]
+    return start_date
+
+
+def partially_backfilled_coverage_measurements(
+    interval: Interval,
+    backfilled_start: datetime,
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    repos: Optional[List[Repository]] = None,
+    measurement_filters: Optional[dict] = None,
+    commit_filters: Optional[dict] = None,
+) -> Iterable[dict]:
+    """
+    Returns coverage measurements from Timescale for the time bins starting at
+    `backfilled_start` (which have already been backfilled) and computes the older
+    ones directly from the primary database, so that only the window that is still
+    being backfilled needs to go through the (much slower) fallback query.
+    """
+    measurement_filters = measurement_filters or {}
+    commit_filters = commit_filters or {}
+
+    if start_date is not None:
+        start_date = _as_aware_datetime(start_date)
+
+    if start_date is not None and start_date >= backfilled_start:
+        # the requested range has already been backfilled but the measurement
+        # carried forward to its first time bin may be older than the backfilled
+        # time bins, in which case it's computed from the commits
+        measurements = [
+            measurement
+            for measurement in coverage_measurements(
+                interval,
+                start_date=start_date,
+                end_date=end_date,
+                repos=repos,
+                **measurement_filters,
+            )
+            if measurement["timestamp_bin"] >= backfilled_start
+        ]
+        if measurements and measurements[0]["timestamp_bin"] <= start_date:
+            return measurements
+        older = coverage_fallback_query(
+            interval,
+            start_date=start_date,
+            end_date=end_date,
+            repos=repos,
+            timestamp__lt=backfilled_start,
+            **commit_filters,
+        )
+        return [*older, *measurements]
+
+    older = coverage_fallback_query(
+        interval,
+        start_date=start_date,
+        end_date=end_date,
+        repos=repos,
+        timestamp__lt=backfilled_start,
+        **commit_filters,
+    )
+    newer = coverage_measurements(
+        interval,
+        end_date=end_date,
+        repos=repos,
+        timestamp_bin__gte=backfilled_start,
+        **measurement_filters,
+    )
+    # the time bins of both results don't overlap
+    return [*older, *newer]
+
+
 def repository_coverage_measurements_with_fallback(
     repository: Repository,
     interval: Interval,
@@ -343,16 +535,55 @@ def repository_coverage_measurements_with_fallback(
             repository_id=repository.pk,
         ).first()
 
+    return _repository_coverage_measurements_with_fallback(
+        repository,
+        dataset,
+        interval,
+        start_date=start_date,
+        end_date=end_date,
+        branch=branch,
+    )
+
+
+def _repository_coverage_measurements_with_fallback(
+    repository: Repository,
+    dataset: Optional[Dataset],
+    interval: Interval,
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    branch: str = None,
+):
+    """
+    Same as `repository_coverage_measurements_with_fallback` given the
+    repository's (already fetched) coverage dataset.
+    """
+    if settings.TIMESERIES_ENABLED:
+        measurement_filters = dict(
+            owner_id=repository.author_id,
+            repo_id=repository.pk,
+            measurable_id=str(repository.pk),
+            branch=branch or repository.branch,
+        )
         if dataset and dataset.is_backfilled():
             # timeseries data is ready
             return coverage_measurements(
                 interval,
                 start_date=start_date,
                 end_date=end_date,
-                owner_id=repository.author_id,
-                repo_id=repository.pk,
-                measurable_id=str(repository.pk),
-                branch=branch or repository.branch,
+                **measurement_filters,
+            )
+        if dataset and (backfilled_start := backfilled_start_date(interval, dataset)):
+            # timeseries data is ready for the most recent time bins
+            return partially_backfilled_coverage_measurements(
+                interval,
+                backfilled_start,
+                start_date=start_date,
+                end_date=end_date,
+                measurement_filters=measurement_filters,
+                commit_filters=dict(
+                    repository_id=repository.pk,
+                    branch=branch or repository.branch,
+                ),
             )
         if not dataset:
             # we need to backfill
@@ -372,6 +603,120 @@ def repository_coverage_measurements_with_fallback(
     )
 
 
+def repositories_coverage_measurements(
+    interval: Interval,
+    repositories: List[Repository],
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    branch: Optional[str] = None,
+) -> Dict[int, List[dict]]:
+    """
+    Returns the coverage measurements of each of the given repositories (keyed by
+    repoid) from Timescale.  The measurements of all the repositories are fetched
+    with a single query grouped by repo (plus a single query for the older
+    datapoints to carry forward) rather than with a query per repository.
+
+    Each list of measurements is the same as what `coverage_measurements` returns
+    for that repository alone.
+    """
+    results = {repository.pk: [] for repository in repositories}
+    if not repositories:
+        return results
+
+    filters = dict(
+        name=MeasurementName.COVERAGE.value,
+        owner_id__in={repository.author_id for repository in repositories},
+        repo_id__in=[repository.pk for repository in repositories],
+        measurable_id__in=[str(repository.pk) for repository in repositories],
+    )
+
+    timestamp_filters = {}
+    if start_date is not None:
+        timestamp_filters["timestamp_bin__gte"] = start_date
+    if end_date is not None:
+        timestamp_filters["timestamp_bin__lte"] = end_date
+
+    queryset = MeasurementSummary.agg_by(interval).filter(
+        **filters, **timestamp_filters
+    )
+    queryset = _filter_repos(queryset, repositories, branch=branch)
+    measurements = aggregate_measurements(queryset, ["timestamp_bin", "repo_id"])
+
+    if start_date:
+        # see `coverage_measurements`: the latest older datapoint of each repo
+        # is included so that it can be carried forward to the first time bin
+        older = MeasurementSummary.agg_by(interval).filter(
+            **filters, timestamp_bin__lt=start_date
+        )
+        older = _filter_repos(older, repositories, branch=branch)
+        older = (
+            aggregate_measurements(older, ["timestamp_bin", "repo_id"])
+            .order_by("repo_id", "-timestamp_bin")
+            .distinct("repo_id")
+        )
+        for measurement in older:
+            results[measurement.pop("repo_id")].append(measurement)
+
+    for measurement in measurements:
+        results[measurement.pop("repo_id")].append(measurement)
+
+    return results
+
+
+def repositories_coverage_measurements_with_fallback(
+    repositories: List[Repository],
+    interval: Interval,
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    branch: Optional[str] = None,
+) -> Dict[int, List[dict]]:
+    """
+    Batched version of `repository_coverage_measurements_with_fallback` returning
+    the measurements of each of the given repositories (keyed by repoid).
+
+    The datasets of all the repositories are fetched with a single query and the
+    measurements of the fully backfilled ones with `repositories_coverage_measurements`.
+    The other repositories fall back to being queried one at a time.
+    """
+    datasets = {}
+    if settings.TIMESERIES_ENABLED:
+        datasets = {
+            dataset.repository_id: dataset
+            for dataset in Dataset.objects.filter(
+                name=MeasurementName.COVERAGE.value,
+                repository_id__in=[repository.pk for repository in repositories],
+            )
+        }
+
+    backfilled = [
+        repository
+        for repository in repositories
+        if repository.pk in datasets and datasets[repository.pk].is_backfilled()
+    ]
+    results = repositories_coverage_measurements(
+        interval,
+        backfilled,
+        start_date=start_date,
+        end_date=end_date,
+        branch=branch,
+    )
+
+    for repository in repositories:
+        if repository.pk not in results:
+            results[repository.pk] = list(
+                _repository_coverage_measurements_with_fallback(
+                    repository,
+                    datasets.get(repository.pk),
+                    interval,
+                    start_date=start_date,
+                    end_date=end_date,
+                    branch=branch,
+                )
+            )
+
+    return results
+
+
 def owner_coverage_measurements_with_fallback(
     owner: Owner,
     repo_ids: Iterable[str],
@@ -408,6 +753,22 @@ def owner_coverage_measurements_with_fallback(
             owner_id=owner.pk,
             repos=repos,
         )
+    if settings.TIMESERIES_ENABLED and len(datasets) == len(repo_ids):
+        backfilled_starts = [
+            backfilled_start_date(interval, dataset)
+            for dataset in datasets
+            if not dataset.is_backfilled()
+        ]
+        if all(backfilled_starts):
+            # timeseries data is ready for the most recent time bins of all the repos
+            return partially_backfilled_coverage_measurements(
+                interval,
+                max(backfilled_starts),
+                start_date=start_date,
+                end_date=end_date,
+                repos=repos,
+                measurement_filters=dict(owner_id=owner.pk),
+            )
     if settings.TIMESERIES_ENABLED:
             # we need to backfill some datasets
         dataset_repo_ids = {dataset.repository_id for dataset in datasets}
@@ -0,0 +1,20 @@
+from django.db import migrations
+
+import core.models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        (
+            "timeseries",
+            "0014_remove_measurement_timeseries_measurement_flag_unique_and_more",
+        ),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="dataset",
+            name="backfilled_from",
+            field=core.models.DateTimeWithoutTZField(null=True),
+        ),
+    ]
@@ -136,6 +136,11 @@ class Dataset(models.Model):
     # The solution would be to somehow have a celery task return when it's done, hence the TODO
     backfilled = models.BooleanField(null=False, default=False)
 
+    # backfill watermark: the backfill writes measurements in time-ordered batches
+    # (newest commits first) and moves this back after each batch, so that the
+    # measurements are complete for all commits from this timestamp onwards
+    backfilled_from = DateTimeWithoutTZField(null=True)
+
     created_at = DateTimeWithoutTZField(default=timezone.now, null=True)
     updated_at = DateTimeWithoutTZField(default=timezone.now, null=True)
 
@@ -24,7 +24,11 @@ class DatasetAdminTest(TransactionTestCase):
 
         self.repo1 = RepositoryFactory()
         self.repo2 = RepositoryFactory()
-        self.dataset1 = DatasetFactory(repository_id=self.repo1.pk, backfilled=True)
+        self.dataset1 = DatasetFactory(
+            repository_id=self.repo1.pk,
+            backfilled=True,
+            backfilled_from=timezone.datetime(2021, 1, 1),
+        )
         self.dataset2 = DatasetFactory(repository_id=self.repo2.pk, backfilled=True)
 
     def test_list_page(self):
@@ -78,5 +82,6 @@ class DatasetAdminTest(TransactionTestCase):
 
         self.dataset1.refresh_from_db()
         assert self.dataset1.backfilled == False
+        assert self.dataset1.backfilled_from is None
         self.dataset2.refresh_from_db()
         assert self.dataset2.backfilled == False
@@ -3,7 +3,7 @@ from unittest.mock import call, patch
 
 import pytest
 from django.conf import settings
-from django.test import TransactionTestCase
+from django.test import SimpleTestCase, TransactionTestCase
 from django.utils import timezone
 from freezegun import freeze_time
 from freezegun.api import FakeDatetime
@@ -14,10 +14,13 @@ from codecov_auth.tests.factories import OwnerFactory
 from core.tests.factories import CommitFactory, RepositoryFactory
 from reports.tests.factories import RepositoryFlagFactory
 from timeseries.helpers import (
+    align_sparse_measurements,
+    backfilled_start_date,
     coverage_measurements,
     fill_sparse_measurements,
     owner_coverage_measurements_with_fallback,
     refresh_measurement_summaries,
+    repositories_coverage_measurements_with_fallback,
     repository_coverage_measurements_with_fallback,
 )
 from timeseries.models import Dataset, Interval, Measurement, MeasurementName
@@ -382,6 +385,96 @@ class FillSparseMeasurementsTest(TransactionTestCase):
         assert fill_sparse_measurements([], Interval.INTERVAL_1_DAY, None, None) == []
 
 
+class AlignSparseMeasurementsTest(SimpleTestCase):
+    def setUp(self):
+        self.series = {
+            1: [
+                {
+                    # older datapoint selected to be carried forward
+                    "timestamp_bin": datetime(2021, 12, 1, tzinfo=timezone.utc),
+                    "avg": 85.0,
+                    "min": 80.0,
+                    "max": 90.0,
+                },
+                {
+                    "timestamp_bin": datetime(2022, 1, 1, tzinfo=timezone.utc),
+                    "avg": 82.5,
+                    "min": 80.0,
+                    "max": 85.0,
+                },
+            ],
+            2: [
+                {
+                    "timestamp_bin": datetime(2022, 1, 2, tzinfo=timezone.utc),
+                    "avg": 80.0,
+                    "min": 80.0,
+                    "max": 80.0,
+                },
+            ],
+            3: [],
+        }
+
+    def test_align_sparse_measurements(self):
+        start_date = datetime(2021, 12, 31, 0, 0, 0, tzinfo=timezone.utc)
+        end_date = datetime(2022, 1, 3, 0, 0, 0, tzinfo=timezone.utc)
+        aligned = align_sparse_measurements(
+            self.series, Interval.INTERVAL_1_DAY, start_date, end_date
+        )
+
+        assert aligned.timestamps == [
+            datetime(2021, 12, 31, tzinfo=timezone.utc),
+            datetime(2022, 1, 1, tzinfo=timezone.utc),
+            datetime(2022, 1, 2, tzinfo=timezone.utc),
+            datetime(2022, 1, 3, tzinfo=timezone.utc),
+        ]
+        assert aligned.avg == {1: [85.0, 82.5, None, None], 2: [None, None, 80.0, None]}
+        assert aligned.min == {1: [80.0, 80.0, None, None], 2: [None, None, 80.0, None]}
+        assert aligned.max == {1: [90.0, 85.0, None, None], 2: [None, None, 80.0, None]}
+
+        for key, measurements in self.series.items():
+            assert aligned.measurements(key) == fill_sparse_measurements(
+                measurements, Interval.INTERVAL_1_DAY, start_date, end_date
+            )
+
+    def test_align_sparse_measurements_no_start_date(self):
+        end_date = datetime(2022, 1, 3, 0, 0, 0, tzinfo=timezone.utc)
+        aligned = align_sparse_measurements(
+            {2: self.series[2]}, Interval.INTERVAL_7_DAY, None, end_date
+        )
+        # weekly bins are aligned on Mondays
+        assert aligned.timestamps == [
+            datetime(2021, 12, 27, tzinfo=timezone.utc),
+            datetime(2022, 1, 3, tzinfo=timezone.utc),
+        ]
+        # the measurement isn't at the start of a bin
+        assert aligned.avg == {2: [None, None]}
+
+    def test_align_sparse_measurements_no_measurements(self):
+        aligned = align_sparse_measurements({1: []}, Interval.INTERVAL_1_DAY)
+        assert aligned.timestamps == []
+        assert aligned.measurements(1) == []
+
+
+class BackfilledStartDateTest(SimpleTestCase):
+    def test_backfilled_start_date(self):
+        dataset = Dataset(backfilled_from=None)
+        assert backfilled_start_date(Interval.INTERVAL_1_DAY, dataset) is None
+
+        # the bin containing the watermark is only partially backfilled
+        dataset.backfilled_from = datetime(2022, 1, 5, 12, 0, 0)
+        assert backfilled_start_date(Interval.INTERVAL_1_DAY, dataset) == datetime(
+            2022, 1, 6, tzinfo=timezone.utc
+        )
+        assert backfilled_start_date(Interval.INTERVAL_7_DAY, dataset) == datetime(
+            2022, 1, 10, tzinfo=timezone.utc
+        )
+
+        dataset.backfilled_from = datetime(2022, 1, 5, 0, 0, 0)
+        assert backfilled_start_date(Interval.INTERVAL_1_DAY, dataset) == datetime(
+            2022, 1, 5, tzinfo=timezone.utc
+        )
+
+
 @pytest.mark.skipif(
     not settings.TIMESERIES_ENABLED, reason="requires timeseries data storage"
 )
@@ -663,6 +756,117 @@ class RepositoryCoverageMeasurementsWithFallbackTest(TransactionTestCase):
             },
         ]
 
+    @patch("timeseries.models.Dataset.is_backfilled")
+    def test_partially_backfilled_dataset(self, is_backfilled):
+        is_backfilled.return_value = False
+
+        CommitFactory(
+            commitid="commit1",
+            repository_id=self.repo.pk,
+            branch="master",
+            timestamp=datetime(2022, 1, 1, 1, 0, 0, 0, tzinfo=timezone.utc),
+            totals={"c": "80.00"},
+        )
+        CommitFactory(
+            commitid="commit2",
+            repository_id=self.repo.pk,
+            branch="master",
+            timestamp=datetime(2022, 1, 1, 13, 0, 0, 0, tzinfo=timezone.utc),
+            totals={"c": "85.00"},
+        )
+        CommitFactory(
+            commitid="commit3",
+            repository_id=self.repo.pk,
+            branch="master",
+            timestamp=datetime(2022, 1, 2, 1, 0, 0, 0, tzinfo=timezone.utc),
+            totals={"c": "80.00"},
+        )
+        # only the measurement of commit2 has been backfilled on the first day
+        MeasurementFactory(
+            name=MeasurementName.COVERAGE.value,
+            owner_id=self.repo.author_id,
+            repo_id=self.repo.pk,
+            measurable_id=str(self.repo.pk),
+            timestamp=datetime(2022, 1, 1, 13, 0, 0),
+            value=85.0,
+            branch="master",
+            commit_sha="commit2",
+        )
+        MeasurementFactory(
+            name=MeasurementName.COVERAGE.value,
+            owner_id=self.repo.author_id,
+            repo_id=self.repo.pk,
+            measurable_id=str(self.repo.pk),
+            timestamp=datetime(2022, 1, 2, 1, 0, 0),
+            value=75.0,
+            branch="master",
+            commit_sha="commit3",
+        )
+
+        DatasetFactory(
+            name=MeasurementName.COVERAGE.value,
+            repository_id=self.repo.pk,
+            backfilled_from=datetime(2022, 1, 1, 12, 0, 0),
+        )
+
+        res = repository_coverage_measurements_with_fallback(
+            self.repo,
+            Interval.INTERVAL_1_DAY,
+            start_date=datetime(2021, 12, 31, 0, 0, 0, tzinfo=timezone.utc),
+            end_date=datetime(2022, 1, 3, 0, 0, 0, tzinfo=timezone.utc),
+        )
+        assert list(res) == [
+            {
+                # partially backfilled time bin computed from the commits
+                "timestamp_bin": datetime(2022, 1, 1, 0, 0, 0, tzinfo=timezone.utc),
+                "avg": 82.5,
+                "min": 80.0,
+                "max": 85.0,
+            },
+            {
+                # backfilled time bin read from the measurements
+                "timestamp_bin": datetime(2022, 1, 2, 0, 0, 0, tzinfo=timezone.utc),
+                "avg": 75.0,
+                "min": 75.0,
+                "max": 75.0,
+            },
+        ]
+
+        res = repository_coverage_measurements_with_fallback(
+            self.repo,
+            Interval.INTERVAL_1_DAY,
+            start_date=datetime(2022, 1, 2, 0, 0, 0, tzinfo=timezone.utc),
+            end_date=datetime(2022, 1, 3, 0, 0, 0, tzinfo=timezone.utc),
+        )
+        assert list(res) == [
+            {
+                "timestamp_bin": datetime(2022, 1, 2, 0, 0, 0, tzinfo=timezone.utc),
+                "avg": 75.0,
+                "min": 75.0,
+                "max": 75.0,
+            },
+        ]
+
+        # the measurement carried forward to the first time bin is older than the
+        # backfilled time bins
+        Dataset.objects.filter(repository_id=self.repo.pk).update(
+            backfilled_from=datetime(2022, 1, 3, 0, 0, 0)
+        )
+        res = repository_coverage_measurements_with_fallback(
+            self.repo,
+            Interval.INTERVAL_1_DAY,
+            start_date=datetime(2022, 1, 3, 0, 0, 0, tzinfo=timezone.utc),
+            end_date=datetime(2022, 1, 4, 0, 0, 0, tzinfo=timezone.utc),
+        )
+        assert list(res) == [
+            {
+                "timestamp_bin": datetime(2022, 1, 2, 0, 0, 0, tzinfo=timezone.utc),
+                "avg": 80.0,
+                "min": 80.0,
+                "max": 80.0,
+            },
+        ]
+
     @patch("timeseries.helpers.trigger_backfill")
     def test_no_dataset(self, trigger_backfill):
         CommitFactory(
@@ -729,6 +933,127 @@ class RepositoryCoverageMeasurementsWithFallbackTest(TransactionTestCase):
         trigger_backfill.assert_called_once_with(dataset)
 
 
+@pytest.mark.skipif(
+    not settings.TIMESERIES_ENABLED, reason="requires timeseries data storage"
+)
+class RepositoriesCoverageMeasurementsWithFallbackTest(TransactionTestCase):
+    databases = {"default", "timeseries"}
+
+    def setUp(self):
+        self.owner = OwnerFactory()
+        self.repo1 = RepositoryFactory(author=self.owner)
+        self.repo2 = RepositoryFactory(author=self.owner)
+        self.repo3 = RepositoryFactory(author=self.owner)
+
+    @patch("timeseries.helpers.trigger_backfill")
+    @patch("timeseries.models.Dataset.is_backfilled")
+    def test_repositories_coverage_measurements(self, is_backfilled, trigger_backfill):
+        is_backfilled.return_value = True
+
+        for repo in [self.repo1, self.repo2]:
+            DatasetFactory(
+                name=MeasurementName.COVERAGE.value,
+                repository_id=repo.pk,
+            )
+        MeasurementFactory(
+            name=MeasurementName.COVERAGE.value,
+            owner_id=self.owner.pk,
+            repo_id=self.repo1.pk,
+            measurable_id=str(self.repo1.pk),
+            timestamp=datetime(2021, 12, 30, 1, 0, 0),
+            value=70.0,
+            branch="master",
+            commit_sha="commit1",
+        )
+        MeasurementFactory(
+            name=MeasurementName.COVERAGE.value,
+            owner_id=self.owner.pk,
+            repo_id=self.repo1.pk,
+            measurable_id=str(self.repo1.pk),
+            timestamp=datetime(2022, 1, 1, 1, 0, 0),
+            value=80.0,
+            branch="master",
+            commit_sha="commit2",
+        )
+        MeasurementFactory(
+            name=MeasurementName.COVERAGE.value,
+            owner_id=self.owner.pk,
+            repo_id=self.repo2.pk,
+            measurable_id=str(self.repo2.pk),
+            timestamp=datetime(2022, 1, 1, 2, 0, 0),
+            value=85.0,
+            branch="master",
+            commit_sha="commit3",
+        )
+        MeasurementFactory(
+            name=MeasurementName.COVERAGE.value,
+            owner_id=self.owner.pk,
+            repo_id=self.repo2.pk,
+            measurable_id=str(self.repo2.pk),
+            timestamp=datetime(2022, 1, 2, 2, 0, 0),
+            value=90.0,
+            branch="other",
+            commit_sha="commit4",
+        )
+        CommitFactory(
+            commitid="commit5",
+            repository_id=self.repo3.pk,
+            branch="master",
+            timestamp=datetime(2022, 1, 2, 1, 0, 0, 0, tzinfo=timezone.utc),
+            totals={"c": "60.00"},
+        )
+
+        res = repositories_coverage_measurements_with_fallback(
+            [self.repo1, self.repo2, self.repo3],
+            Interval.INTERVAL_1_DAY,
+            start_date=datetime(2021, 12, 31, 0, 0, 0, tzinfo=timezone.utc),
+            end_date=datetime(2022, 1, 3, 0, 0, 0, tzinfo=timezone.utc),
+        )
+        assert res == {
+            self.repo1.pk: [
+                {
+                    # older datapoint to carry forward
+                    "timestamp_bin": datetime(
+                        2021, 12, 30, 0, 0, 0, tzinfo=timezone.utc
+                    ),
+                    "avg": 70.0,
+                    "min": 70.0,
+                    "max": 70.0,
+                },
+                {
+                    "timestamp_bin": datetime(2022, 1, 1, 0, 0, 0, tzinfo=timezone.utc),
+                    "avg": 80.0,
+                    "min": 80.0,
+                    "max": 80.0,
+                },
+            ],
+            self.repo2.pk: [
+                {
+                    "timestamp_bin": datetime(2022, 1, 1, 0, 0, 0, tzinfo=timezone.utc),
+                    "avg": 85.0,
+                    "min": 85.0,
+                    "max": 85.0,
+                },
+            ],
+            self.repo3.pk: [
+                {
+                    # no dataset yet (computed from the commits)
+                    "timestamp_bin": datetime(2022, 1, 2, 0, 0, 0, tzinfo=timezone.utc),
+                    "avg": 60.0,
+                    "min": 60.0,
+                    "max": 60.0,
+                },
+            ],
+        }
+
+        dataset = Dataset.objects.filter(
+            name=MeasurementName.COVERAGE.value,
+            repository_id=self.repo3.pk,
+        ).first()
+        assert dataset
+        trigger_backfill.assert_called_once_with(dataset)
+
+
 @pytest.mark.skipif(
     not settings.TIMESERIES_ENABLED, reason="requires timeseries data storage"
 )
@@ -11,6 +11,7 @@ from django.core.exceptions import ObjectDoesNotExist
 from django.db.models import Q
 from django.utils import timezone
 from rest_framework.exceptions import NotFound, Throttled, ValidationError
+from shared.metrics import metrics
 from shared.reports.enums import UploadType
 from shared.torngit.exceptions import TorngitClientError, TorngitObjectNotFoundError
 
@@ -18,6 +19,7 @@ from codecov_auth.models import Owner
 from core.models import Commit, Repository
 from plan.constants import USER_PLAN_REPRESENTATIONS
 from reports.models import ReportSession
+from services.archive import STREAM_READ_SIZE, ArchiveService, gzip_blocks
 from services.repo_providers import RepoProviderService
 from services.segment import SegmentService
 from services.task import TaskService
@@ -256,6 +258,17 @@ def determine_upload_pr_to_use(upload_params):
         return upload_params.get("pr")
 
 
+def determine_upload_build_url(upload_params, repository):
+    if (
+        repository.service == "gitlab_enterprise"
+        and not upload_params.get("build_url")
+        and upload_params.get("build")
+    ):
+        # if gitlab ci - change domain based by referer
+        return f"{get_config((repository.service, 'url'))}/{repository.author.username}/{repository.name}/{upload_params.get('build')}"
+    return upload_params.get("build_url")
+
+
 def try_to_get_best_possible_bot_token(repository):
     service = repository.author.service
     if repository.bot is not None and repository.bot.oauth_token is not None:
@@ -565,13 +578,111 @@ def store_report_in_redis(request, commitid, reportid, redis):
     return redis_key
 
 
+def stream_report_to_storage(request, repository, commitid, reportid):
+    """
+    Streams the body of a v2 upload request to archive storage (rather than
+    buffering it in redis) and returns its path.  The body is gzipped on the fly
+    when `UPLOAD_V2_STREAMING_GZIP` is set, unless it already is.
+    """
+    encoding = request.META.get("HTTP_X_CONTENT_ENCODING") or request.META.get(
+        "HTTP_CONTENT_ENCODING"
+    )
+    gzipped = encoding == "gzip"
+
+    def read_blocks():
+        stream = request.stream
+        if stream is None:
+            # empty body
+            return
+        while block := stream.read(STREAM_READ_SIZE):
+            yield block
+
+    blocks = read_blocks()
+    if settings.UPLOAD_V2_STREAMING_GZIP and not gzipped:
+        blocks = gzip_blocks(blocks)
+        gzipped = True
+
+    with metrics.timer("upload.v2.stream_to_storage"):
+        return ArchiveService(repository).write_raw_upload_stream(
+            commitid, reportid, blocks, gzipped=gzipped
+        )
+
+
+class UploadQueue:
+    """
+    Redis client used while handling upload requests: the writes (report bodies,
+    upload task arguments, ...) are buffered and sent in a single MULTI/EXEC
+    round trip by `execute` while the reads go through right away.
+
+    Reads are timed individually (ex. `upload_queue.sismember`).  The buffered
+    writes are timed together as `upload_queue.execute`, and each one is counted
+    as `upload_queue.<operation>` when buffered, with the size of what it
+    writes counted as `upload_queue.<operation>.size` (bytes of a value, number
+    of values pushed to a list).
+    """
+
+    def __init__(self, redis):
+        self.redis = redis
+        self.commands = []
+
+    def sismember(self, key, value):
+        with metrics.timer("upload_queue.sismember"):
+            return self.redis.sismember(key, value)
+
+    def _buffer(self, name, args, size=None):
+        self.commands.append((name, args))
+        metrics.incr(f"upload_queue.{name}", 1)
+        if size is not None:
+            metrics.incr(f"upload_queue.{name}.size", size)
+
+    def setex(self, key, ttl, value):
+        size = len(value) if isinstance(value, (bytes, str)) else None
+        self._buffer("setex", (key, ttl, value), size)
+
+    def rpush(self, key, *values):
+        self._buffer("rpush", (key, *values), len(values))
+
+    def expire(self, key, ttl):
+        self._buffer("expire", (key, ttl))
+
+    def execute(self):
+        if not self.commands:
+            return []
+
+        pipeline = self.redis.pipeline(transaction=True)
+        for name, args in self.commands:
+            getattr(pipeline, name)(*args)
+        self.commands = []
+
+        with metrics.timer("upload_queue.execute"):
+            return pipeline.execute()
+
+
 def dispatch_upload_task(task_arguments, repository, redis):
+    dispatch_upload_tasks([task_arguments], repository, redis)
+
+
+def dispatch_upload_tasks(task_arguments_list, repository, redis):
+    """
+    Queues the task arguments of uploads of the same commit (and report code) and
+    sends a single upload task to the worker, which processes all the uploads
+    queued for the commit at once.
+
+    `redis` may be an `UploadQueue` holding the other writes of the request (e.g.
+    the report of a v2 upload), they're all sent along with the task arguments.
+    """
+    task_arguments = task_arguments_list[0]
+    if not isinstance(redis, UploadQueue):
+        redis = UploadQueue(redis)
+
     # Store task arguments in redis
     cache_uploads_eta = get_config(("setup", "cache", "uploads"), default=86400)
     repo_queue_key = f"uploads/{repository.repoid}/{task_arguments.get('commit')}"
     countdown = 4 if task_arguments.get("version") == "v4" else 0
 
-    redis.rpush(repo_queue_key, dumps(task_arguments))
+    redis.rpush(
+        repo_queue_key, *[dumps(arguments) for arguments in task_arguments_list]
+    )
     redis.expire(
         repo_queue_key, cache_uploads_eta if cache_uploads_eta is not True else 86400
     )
@@ -580,6 +691,8 @@ def dispatch_upload_task(task_arguments, repository, redis):
         3600,
         timezone.now().timestamp(),
     )
+    # the task arguments need to be stored before the task runs
+    redis.execute()
 
     # Send task to worker
     TaskService().upload(
@@ -74,6 +74,12 @@ class MockRedis:
     def setex(self, redis_key, expire_time, report):
         return
 
+    def pipeline(self, transaction=True):
+        return self
+
+    def execute(self):
+        return
+
 
 class UploadHandlerHelpersTest(TestCase):
     def test_parse_params_validates_valid_input(self):
@@ -1046,6 +1052,57 @@ class UploadHandlerRouteTest(APITestCase):
             == "https://app.codecov.io/github/codecovtest/upload-test-repo/commit/b521e55aef79b101f48e2544837ca99a7fa3bf6b"
         )
 
+    @patch("services.archive.ArchiveService.write_raw_upload_stream")
+    @patch("upload.views.legacy.get_redis_connection")
+    @patch("upload.views.legacy.uuid4")
+    @patch("upload.views.legacy.dispatch_upload_task")
+    @patch("services.repo_providers.RepoProviderService.get_adapter")
+    @override_settings(UPLOAD_V2_STREAMING_ENABLED=True)
+    def test_successful_upload_v2_streamed_to_storage(
+        self,
+        mock_repo_provider_service,
+        mock_dispatch_upload,
+        mock_uuid4,
+        mock_get_redis,
+        mock_write_raw_upload_stream,
+    ):
+        class MockRepoProviderAdapter:
+            async def get_commit(self, commit, token):
+                return {"message": "This is not a merge commit"}
+
+        uploaded = {}
+
+        def write_raw_upload_stream(commit_sha, report_id, blocks, gzipped=False):
+            uploaded["data"] = b"".join(blocks)
+            uploaded["gzipped"] = gzipped
+            return f"v4/raw/2023-01-01/awawaw/{commit_sha}/{report_id}.txt"
+
+        mock_get_redis.return_value = MockRedis()
+        mock_repo_provider_service.return_value = MockRepoProviderAdapter()
+        mock_uuid4.return_value = "dec1f00b-1883-40d0-afd6-6dcb876510be"
+        mock_write_raw_upload_stream.side_effect = write_raw_upload_stream
+
+        query_params = {
+            "commit": "b521e55aef79b101f48e2544837ca99a7fa3bf6b",
+            "token": "a03e5d02-9495-4413-b0d8-05651bb2e842",
+        }
+
+        response = self._post(
+            kwargs={"version": "v2"}, query=query_params, data="coverage report"
+        )
+
+        assert response.status_code == 200
+        assert uploaded == {"data": b"coverage report", "gzipped": False}
+
+        task_arguments = mock_dispatch_upload.call_args[0][0]
+        assert task_arguments["redis_key"] is None
+        assert (
+            task_arguments["url"]
+            == "v4/raw/2023-01-01/awawaw/b521e55aef79b101f48e2544837ca99a7fa3bf6b/dec1f00b-1883-40d0-afd6-6dcb876510be.txt"
+        )
+        # the report isn't buffered in redis
+        assert mock_dispatch_upload.call_args[0][2].commands == []
+
     @patch("shared.metrics.metrics.incr")
     @patch("upload.views.legacy.get_redis_connection")
     @patch("upload.views.legacy.uuid4")
@@ -0,0 +1,274 @@
+from json import dumps
+from unittest.mock import MagicMock, call, patch
+from urllib.parse import urlencode
+
+from ddf import G
+from django.test import Client, override_settings
+from django.urls import reverse
+from rest_framework.test import APITransactionTestCase
+
+from codecov_auth.models import Owner
+from core.models import Commit, Repository
+from core.tests.factories import CommitFactory
+from reports.tests.factories import CommitReportFactory, UploadFactory
+from upload.helpers import UploadQueue, dispatch_upload_task, dispatch_upload_tasks
+
+
+class UploadBatchHandlerTest(APITransactionTestCase):
+    def _post(self, query=None, data=None):
+        query_string = f"?{urlencode(query)}" if query else ""
+        return self.client.post(
+            reverse("upload-batch") + query_string,
+            data=data,
+            content_type="application/json",
+        )
+
+    def setUp(self):
+        self.org = G(Owner, username="codecovtest", service="github")
+        self.repo = G(
+            Repository,
+            author=self.org,
+            name="upload-test-repo",
+            upload_token="a03e5d02-9495-4413-b0d8-05651bb2e842",
+        )
+        self.query_params = {
+            "commit": "b521e55aef79b101f48e2544837ca99a7fa3bf6b",
+            "token": "a03e5d02-9495-4413-b0d8-05651bb2e842",
+            "branch": "main",
+        }
+
+    @patch("services.storage.MINIO_CLIENT.presigned_put_object")
+    @patch("services.archive.ArchiveService.get_archive_hash")
+    @patch("upload.views.batch.get_redis_connection")
+    @patch("upload.views.batch.dispatch_upload_tasks")
+    @patch("services.repo_providers.RepoProviderService.get_adapter")
+    @override_settings(CODECOV_DASHBOARD_URL="https://app.codecov.io")
+    def test_upload_batch(
+        self,
+        mock_repo_provider_service,
+        mock_dispatch_upload_tasks,
+        mock_get_redis,
+        mock_hash,
+        mock_storage_put,
+    ):
+        class MockRepoProviderAdapter:
+            async def get_commit(self, commit, token):
+                return {"message": "This is not a merge commit"}
+
+        mock_repo_provider_service.return_value = MockRepoProviderAdapter()
+        mock_get_redis.return_value = MagicMock(sismember=lambda *args: False)
+        mock_hash.return_value = "awawaw"
+        mock_storage_put.side_effect = lambda bucket, path, expires: f"{path}?AWS=1"
+
+        response = self._post(
+            query=self.query_params,
+            data=dumps(
+                {
+                    "uploads": [
+                        {"flags": "unit", "job": "1"},
+                        {"flags": "e2e", "job": "2", "branch": "ignored"},
+                    ]
+                }
+            ),
+        )
+        assert response.status_code == 200
+
+        result = response.json()
+        assert (
+            result["url"]
+            == "https://app.codecov.io/github/codecovtest/upload-test-repo/commit/b521e55aef79b101f48e2544837ca99a7fa3bf6b"
+        )
+        assert len(result["uploads"]) == 2
+
+        # all the uploads are dispatched at once
+        mock_dispatch_upload_tasks.assert_called_once()
+        task_arguments_list = mock_dispatch_upload_tasks.call_args[0][0]
+        assert [arguments["flags"] for arguments in task_arguments_list] == [
+            "unit",
+            "e2e",
+        ]
+        for upload, arguments in zip(result["uploads"], task_arguments_list):
+            assert arguments["reportid"] == upload["id"]
+            assert arguments["branch"] == "main"
+            assert arguments["commit"] == "b521e55aef79b101f48e2544837ca99a7fa3bf6b"
+            assert upload["url"] == f"{arguments['url']}?AWS=1"
+            assert arguments["url"].endswith(
+                f"/awawaw/b521e55aef79b101f48e2544837ca99a7fa3bf6b/{upload['id']}.txt"
+            )
+
+        assert (
+            Commit.objects.filter(
+                repository=self.repo,
+                commitid="b521e55aef79b101f48e2544837ca99a7fa3bf6b",
+            ).count()
+            == 1
+        )
+
+    def test_upload_batch_invalid_body(self):
+        response = self._post(query=self.query_params, data=dumps({"uploads": []}))
+        assert response.status_code == 400
+
+        response = self._post(query=self.query_params, data="not json")
+        assert response.status_code == 400
+
+    def test_upload_batch_csrf_exempt(self):
+        client = Client(enforce_csrf_checks=True)
+        response = client.post(
+            reverse("upload-batch") + f"?{urlencode(self.query_params)}",
+            data=dumps({"uploads": []}),
+            content_type="application/json",
+        )
+        # rejected by the view, not by the csrf middleware
+        assert response.status_code == 400
+
+    @patch("upload.views.batch.get_config")
+    @patch("upload.views.batch.get_redis_connection")
+    @patch("upload.views.batch.dispatch_upload_tasks")
+    @patch("services.repo_providers.RepoProviderService.get_adapter")
+    def test_upload_batch_too_many_uploads_to_commit(
+        self,
+        mock_repo_provider_service,
+        mock_dispatch_upload_tasks,
+        mock_get_redis,
+        mock_get_config,
+    ):
+        class MockRepoProviderAdapter:
+            async def get_commit(self, commit, token):
+                return {"message": "This is not a merge commit"}
+
+        mock_repo_provider_service.return_value = MockRepoProviderAdapter()
+        mock_get_redis.return_value = MagicMock(sismember=lambda *args: False)
+        mock_get_config.return_value = 3
+        commit = CommitFactory(
+            repository=self.repo, commitid=self.query_params["commit"]
+        )
+        report = CommitReportFactory(commit=commit)
+        UploadFactory(report=report)
+        UploadFactory(report=report)
+
+        response = self._post(
+            query=self.query_params,
+            data=dumps({"uploads": [{"flags": "unit"}, {"flags": "e2e"}]}),
+        )
+        assert response.status_code == 400
+        assert response.json() == {"detail": ["Too many uploads to this commit."]}
+        mock_dispatch_upload_tasks.assert_not_called()
+
+    @patch("upload.views.batch.get_redis_connection")
+    @patch("upload.views.batch.dispatch_upload_tasks")
+    @patch("services.repo_providers.RepoProviderService.get_adapter")
+    def test_upload_batch_throttled(
+        self,
+        mock_repo_provider_service,
+        mock_dispatch_upload_tasks,
+        mock_get_redis,
+    ):
+        class MockRepoProviderAdapter:
+            async def get_commit(self, commit, token):
+                return {"message": "This is not a merge commit"}
+
+        mock_repo_provider_service.return_value = MockRepoProviderAdapter()
+        mock_get_redis.return_value = MagicMock(sismember=lambda *args: False)
+
+        with patch(
+            "upload.throttles.UploadsPerCommitThrottle.allow_request",
+            return_value=False,
+        ):
+            response = self._post(
+                query=self.query_params,
+                data=dumps({"uploads": [{"flags": "unit"}]}),
+            )
+        assert response.status_code == 429
+        mock_dispatch_upload_tasks.assert_not_called()
+
+    def test_upload_batch_invalid_upload_params(self):
+        response = self._post(
+            query=self.query_params,
+            data=dumps({"uploads": [{"flags": "flags!!!"}]}),
+        )
+        assert response.status_code == 400
+
+    def test_upload_batch_unknown_repo(self):
+        response = self._post(
+            query={
+                **self.query_params,
+                "token": "00000000-0000-0000-0000-000000000000",
+            },
+            data=dumps({"uploads": [{"flags": "unit"}]}),
+        )
+        assert response.status_code == 404
+
+    def test_upload_batch_no_token_or_service(self):
+        response = self._post(
+            query={"commit": self.query_params["commit"]},
+            data=dumps({"uploads": [{"flags": "unit"}]}),
+        )
+        assert response.status_code == 400
+        assert response.json() == {"detail": "Could not determine repo and owner"}
+
+
+@patch("services.task.TaskService.upload")
+def test_dispatch_upload_tasks(mock_task_service_upload, db):
+    repo = G(Repository)
+    task_arguments_list = [
+        {"commit": "commit123", "version": "v4", "reportid": "1"},
+        {"commit": "commit123", "version": "v4", "reportid": "2"},
+    ]
+    redis = MagicMock()
+
+    dispatch_upload_tasks(task_arguments_list, repo, redis)
+
+    # sent in a single round trip
+    redis.pipeline.assert_called_once_with(transaction=True)
+    pipeline = redis.pipeline.return_value
+    pipeline.rpush.assert_called_once_with(
+        f"uploads/{repo.repoid}/commit123",
+        *[dumps(arguments) for arguments in task_arguments_list],
+    )
+    pipeline.execute.assert_called_once()
+    mock_task_service_upload.assert_called_once_with(
+        repoid=repo.repoid,
+        commitid="commit123",
+        report_code=None,
+        countdown=4,
+    )
+
+
+@patch("services.task.TaskService.upload")
+def test_upload_queue(mock_task_service_upload, db, mock_redis):
+    repo = G(Repository)
+    queue = UploadQueue(mock_redis)
+
+    assert not queue.sismember("flags.disable_tasks", repo.repoid)
+    queue.setex("upload/commit1/report/plain", 10800, b"coverage report")
+    # writes are buffered until the upload task is dispatched
+    assert mock_redis.get("upload/commit1/report/plain") is None
+
+    dispatch_upload_task(
+        {"commit": "commit1", "version": "v2", "reportid": "report"}, repo, queue
+    )
+    assert mock_redis.get("upload/commit1/report/plain") == b"coverage report"
+    assert mock_redis.lrange(f"uploads/{repo.repoid}/commit1", 0, -1) == [
+        dumps({"commit": "commit1", "version": "v2", "reportid": "report"}).encode()
+    ]
+    assert queue.commands == []
+    mock_task_service_upload.assert_called_once()
+
+
+@patch("upload.helpers.metrics")
+def test_upload_queue_metrics(mock_metrics, mock_redis):
+    queue = UploadQueue(mock_redis)
+    queue.setex("upload/commit1/report/plain", 10800, b"coverage report")
+    queue.rpush("uploads/1/commit1", "a", "b")
+    queue.expire("uploads/1/commit1", 10)
+
+    assert mock_metrics.incr.call_args_list == [
+        call("upload_queue.setex", 1),
+        call("upload_queue.setex.size", len(b"coverage report")),
+        call("upload_queue.rpush", 1),
+        call("upload_queue.rpush.size", 2),
+        call("upload_queue.expire", 1),
+    ]
+
+    queue.execute()
+    mock_metrics.timer.assert_called_once_with("upload_queue.execute")
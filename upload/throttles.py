@@ -1,15 +1,12 @@
 import logging
-from datetime import timedelta
 
 from django.conf import settings
 from django.core.exceptions import ObjectDoesNotExist
-from django.db.models import Q
-from django.utils import timezone
 from rest_framework.throttling import BaseThrottle
-from shared.reports.enums import UploadType
 
 from plan.constants import USER_PLAN_REPRESENTATIONS
 from reports.models import ReportSession
+from services.upload_counters import commit_upload_count, owner_upload_count
 from upload.helpers import _determine_responsible_owner
 
 log = logging.getLogger(__name__)
@@ -20,11 +17,7 @@ class UploadsPerCommitThrottle(BaseThrottle):
         try:
             repository = view.get_repo()
             commit = view.get_commit(repository)
-            new_session_count = ReportSession.objects.filter(
-                ~Q(state="error"),
-                ~Q(upload_type=UploadType.CARRIEDFORWARD.db_name),
-                report__commit=commit,
-            ).count()
+            new_session_count = commit_upload_count(commit)
             max_upload_limit = repository.author.max_upload_limit or 150
             if new_session_count > max_upload_limit:
                 log.warning(
@@ -59,16 +52,7 @@ class UploadsPerWindowThrottle(BaseThrottle):
                         limit = USER_PLAN_REPRESENTATIONS[
                             owner.plan
                         ].monthly_uploads_limit
-                        uploads_used = ReportSession.objects.filter(
-                            report__commit__repository__author_id=owner.ownerid,
-                            report__commit__repository__private=True,
-                            created_at__gte=timezone.now() - timedelta(days=30),
-                            # attempt at making the query more performant by telling the db to not
-                            # check old commits, which are unlikely to have recent uploads
-                            report__commit__timestamp__gte=timezone.now()
-                            - timedelta(days=60),
-                            upload_type="uploaded",
-                        )[:limit].count()
+                        uploads_used = owner_upload_count(owner.ownerid, limit)
                         if uploads_used >= limit:
                             log.warning(
                                 "User exceeded its limits for usage",
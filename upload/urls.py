@@ -1,5 +1,6 @@
 from django.urls import path, re_path
 
+from upload.views.batch import UploadBatchHandler
 from upload.views.commits import CommitViews
 from upload.views.empty_upload import EmptyUploadView
 from upload.views.legacy import UploadDownloadHandler, UploadHandler
@@ -45,6 +46,7 @@ urlpatterns = [
         CommitViews.as_view(),
         name="new_upload.commits",
     ),
+    path("v4/batch", UploadBatchHandler.as_view(), name="upload-batch"),
     # This was getting in the way of the new endpoints, so I moved to the end
     re_path("(?P<version>\w+)/?", UploadHandler.as_view(), name="upload-handler"),
 ]
@@ -0,0 +1,278 @@
+import asyncio
+import logging
+from json import JSONDecodeError, loads
+from uuid import uuid4
+
+from django.conf import settings
+from django.core.exceptions import MultipleObjectsReturned
+from django.http import JsonResponse
+from django.utils import timezone
+from django.utils.decorators import classonlymethod
+from django.views import View
+from rest_framework import status
+from rest_framework.exceptions import APIException, Throttled, ValidationError
+from shared.metrics import metrics
+
+from codecov.db import sync_to_async
+from services.archive import ArchiveService
+from services.redis_configuration import get_redis_connection
+from services.segment import SegmentService
+from services.upload_counters import commit_upload_count, record_dispatched_uploads
+from upload.helpers import (
+    UploadQueue,
+    check_commit_upload_constraints,
+    determine_repo_for_upload,
+    determine_upload_branch_to_use,
+    determine_upload_build_url,
+    determine_upload_commit_to_use,
+    determine_upload_pr_to_use,
+    dispatch_upload_tasks,
+    insert_commit,
+    parse_params,
+    validate_upload,
+)
+from upload.throttles import UploadsPerCommitThrottle, UploadsPerWindowThrottle
+from utils.config import get_config
+
+log = logging.getLogger(__name__)
+
+# the params that can differ between the uploads of a batch, all the others
+# (commit, branch, pr, token, ...) are given once in the query string
+BATCH_UPLOAD_PARAMS = ("build", "build_url", "flags", "job", "name")
+
+
+class UploadBatchHandler(View):
+    """
+    Accepts several v4 uploads of the same commit (e.g. from the jobs of a CI
+    matrix build) in a single request:
+
+        POST /upload/v4/batch?commit=...&token=...
+        {"uploads": [{"flags": "unit", "job": "1"}, {"flags": "e2e", "job": "2"}]}
+
+    The query string takes the same params as the legacy upload endpoint and each
+    upload may override the `BATCH_UPLOAD_PARAMS`.  The commit is upserted once,
+    the presigned PUT urls are generated with a single archive service and all
+    the uploads are processed by a single upload task.  The response holds the
+    commit url and the id and presigned PUT url of every upload (in order):
+
+        {"url": "...", "uploads": [{"id": "...", "url": "..."}, ...]}
+    """
+
+    @classonlymethod
+    def as_view(_, **initkwargs):
+        view = super().as_view(**initkwargs)
+        view._is_coroutine = asyncio.coroutines._is_coroutine
+        # uploaders authenticate with the upload token, not a session
+        view.csrf_exempt = True
+        return view
+
+    async def post(self, request, *args, **kwargs):
+        try:
+            upload_params, uploads_params = self.read_params()
+        except ValidationError as e:
+            log.warning(
+                "Failed to parse batch upload request params",
+                extra=dict(query_params=request.GET.dict(), errors=str(e)),
+            )
+            metrics.incr("uploads.rejected", 1)
+            return JsonResponse(
+                {"detail": "Invalid request parameters"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        try:
+            repository = await self.get_repository(upload_params)
+        except (ValidationError, MultipleObjectsReturned):
+            metrics.incr("uploads.rejected", 1)
+            return JsonResponse(
+                {"detail": "Could not determine repo and owner"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        except APIException as e:
+            metrics.incr("uploads.rejected", 1)
+            return JsonResponse({"detail": e.detail}, status=e.status_code)
+
+        try:
+            result = await self.accept_uploads(
+                repository, upload_params, uploads_params
+            )
+        except APIException as e:
+            metrics.incr("uploads.rejected", 1)
+            return JsonResponse({"detail": e.detail}, status=e.status_code)
+
+        metrics.incr("uploads.accepted", len(uploads_params))
+        return JsonResponse(result)
+
+    def read_params(self):
+        request_params = {
+            **self.request.GET.dict(),
+            "version": "v4",
+        }
+        request_params["token"] = request_params.get("token") or self.request.META.get(
+            "HTTP_X_UPLOAD_TOKEN"
+        )
+
+        try:
+            uploads = loads(self.request.body)["uploads"]
+        except (JSONDecodeError, KeyError, TypeError):
+            raise ValidationError("Expected a JSON body with a list of uploads")
+        if not isinstance(uploads, list) or not uploads:
+            raise ValidationError("Expected a JSON body with a list of uploads")
+        max_sessions = get_config("setup", "max_sessions") or 150
+        if len(uploads) > max_sessions:
+            raise ValidationError("Too many uploads in the batch")
+
+        upload_params = parse_params(request_params)
+        uploads_params = []
+        for upload in uploads:
+            if not isinstance(upload, dict):
+                raise ValidationError("Expected a JSON body with a list of uploads")
+            uploads_params.append(
+                parse_params(
+                    {
+                        **request_params,
+                        **{
+                            key: value
+                            for key, value in upload.items()
+                            if key in BATCH_UPLOAD_PARAMS
+                        },
+                    }
+                )
+            )
+        return upload_params, uploads_params
+
+    @sync_to_async
+    def get_repository(self, upload_params):
+        # Try to determine the repository associated with the upload based on the params provided
+        return determine_repo_for_upload(upload_params)
+
+    def get_repo(self):
+        return self.repository
+
+    def get_commit(self, repository):
+        return self.commit
+
+    def check_throttles(self):
+        # the same throttles as the v4 uploads endpoint, which only need the
+        # view to give them the repository and the commit
+        for throttle in (UploadsPerCommitThrottle(), UploadsPerWindowThrottle()):
+            if not throttle.allow_request(self.request, self):
+                raise Throttled()
+
+    @sync_to_async
+    def accept_uploads(self, repository, upload_params, uploads_params):
+        owner = repository.author
+
+        # Validate the upload to make sure the org has enough repo credits and is allowed to upload for this commit
+        redis = UploadQueue(get_redis_connection())
+        validate_upload(upload_params, repository, redis)
+
+        branch = determine_upload_branch_to_use(upload_params, repository.branch)
+        pr = determine_upload_pr_to_use(upload_params)
+        commitid = determine_upload_commit_to_use(upload_params, repository)
+
+        # a single upsert for all the uploads of the batch
+        commit = insert_commit(
+            commitid, branch, pr, repository, owner, upload_params.get("parent")
+        )
+        check_commit_upload_constraints(commit)
+        self.repository, self.commit = repository, commit
+        self.check_throttles()
+
+        # the uploads of the batch count against the limit along with the ones
+        # the commit already has
+        max_sessions = get_config("setup", "max_sessions") or 150
+        if commit_upload_count(commit) + len(uploads_params) > max_sessions:
+            log.warning(
+                "Too many uploads to this commit",
+                extra=dict(
+                    commit=commitid,
+                    repoid=repository.repoid,
+                    upload_count=len(uploads_params),
+                ),
+            )
+            raise ValidationError("Too many uploads to this commit.")
+
+        log.info(
+            "Started V4 batch upload",
+            extra=dict(
+                commit=commitid,
+                pr=pr,
+                branch=branch,
+                repoid=repository.repoid,
+                upload_count=len(uploads_params),
+            ),
+        )
+
+        archive_service = ArchiveService(repository)
+        date = timezone.now().strftime("%Y-%m-%d")
+
+        uploads = []
+        task_arguments_list = []
+        for params in uploads_params:
+            reportid = str(uuid4())
+            path = "/".join(
+                (
+                    "v4/raw",
+                    date,
+                    archive_service.storage_hash,
+                    commitid,
+                    f"{reportid}.txt",
+                )
+            )
+            try:
+                upload_url = archive_service.create_presigned_put(path)
+            except Exception as e:
+                log.warning(
+                    f"Error generating minio presign put {e}",
+                    extra=dict(commit=commitid, repoid=repository.repoid),
+                )
+                raise APIException(
+                    detail="Unknown error, please try again later"
+                ) from e
+            uploads.append(dict(id=reportid, url=upload_url))
+
+            queue_params = params.copy()
+            if params.get("using_global_token"):
+                queue_params["service"] = self.request.GET.get("service")
+            task_arguments_list.append(
+                {
+                    **queue_params,
+                    "build_url": determine_upload_build_url(params, repository),
+                    "reportid": reportid,
+                    "redis_key": None,
+                    "url": path,
+                    "commit": commitid,
+                    "branch": branch,
+                    "pr": pr,
+                }
+            )
+
+        log.info(
+            "Dispatching batch of uploads to worker",
+            extra=dict(
+                commit=commitid,
+                repoid=repository.repoid,
+                upload_count=len(task_arguments_list),
+            ),
+        )
+        dispatch_upload_tasks(task_arguments_list, repository, redis)
+        record_dispatched_uploads(
+            repository, commit, [upload["id"] for upload in uploads]
+        )
+
+        segment_service = SegmentService()
+        for params in uploads_params:
+            segment_upload_data = params.copy()
+            segment_upload_data["repository_id"] = repository.repoid
+            segment_upload_data["repository_name"] = repository.name
+            segment_upload_data["version"] = "v4"
+            segment_upload_data["userid_type"] = "org"
+            segment_service.account_uploaded_coverage_report(
+                owner.ownerid, segment_upload_data
+            )
+
+        return dict(
+            url=f"{settings.CODECOV_DASHBOARD_URL}/{owner.service}/{owner.username}/{repository.name}/commit/{commitid}",
+            uploads=uploads,
+        )
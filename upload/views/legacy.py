@@ -26,10 +26,13 @@ from core.commands.repository import RepositoryCommands
 from services.archive import ArchiveService
 from services.redis_configuration import get_redis_connection
 from services.segment import SegmentService
+from services.upload_counters import record_dispatched_uploads
 from upload.helpers import (
+    UploadQueue,
     check_commit_upload_constraints,
     determine_repo_for_upload,
     determine_upload_branch_to_use,
+    determine_upload_build_url,
     determine_upload_commit_to_use,
     determine_upload_pr_to_use,
     dispatch_upload_task,
@@ -37,6 +40,7 @@ from upload.helpers import (
     parse_headers,
     parse_params,
     store_report_in_redis,
+    stream_report_to_storage,
     validate_upload,
 )
 from utils.config import get_config
@@ -140,7 +144,7 @@ class UploadHandler(APIView):
         )
 
         # Validate the upload to make sure the org has enough repo credits and is allowed to upload for this commit
-        redis = get_redis_connection()
+        redis = UploadQueue(get_redis_connection())
         validate_upload(upload_params, repository, redis)
         log.info(
             "Upload was determined to be valid", extra=dict(repoid=repository.repoid)
@@ -172,11 +176,12 @@ class UploadHandler(APIView):
         reportid = str(uuid4())
         path = None  # populated later for v4 uploads when generating presigned PUT url
         redis_key = None  # populated later for v2 uploads when storing report in Redis
+        # (v2 uploads streamed to storage populate `path` instead)
 
         # Get the url where the commit details can be found on the Codecov site, we'll return this in the response
         destination_url = f"{settings.CODECOV_DASHBOARD_URL}/{owner.service}/{owner.username}/{repository.name}/commit/{commitid}"
 
-        # v2 - store request body in redis
+        # v2 - store request body in redis (or stream it to storage)
         if version == "v2":
             log.info(
                 "Started V2 upload",
@@ -188,18 +193,32 @@ class UploadHandler(APIView):
                     upload_params=upload_params,
                 ),
             )
-            redis_key = store_report_in_redis(request, commitid, reportid, redis)
+            if settings.UPLOAD_V2_STREAMING_ENABLED:
+                path = stream_report_to_storage(request, repository, commitid, reportid)
 
-            log.info(
-                "Stored coverage report in redis",
-                extra=dict(
-                    commit=commitid,
-                    upload_params=upload_params,
-                    reportid=reportid,
-                    redis_key=redis_key,
-                    repoid=repository.repoid,
-                ),
-            )
+                log.info(
+                    "Stored coverage report in storage",
+                    extra=dict(
+                        commit=commitid,
+                        upload_params=upload_params,
+                        reportid=reportid,
+                        path=path,
+                        repoid=repository.repoid,
+                    ),
+                )
+            else:
+                redis_key = store_report_in_redis(request, commitid, reportid, redis)
+
+                log.info(
+                    "Stored coverage report in redis",
+                    extra=dict(
+                        commit=commitid,
+                        upload_params=upload_params,
+                        reportid=reportid,
+                        redis_key=redis_key,
+                        repoid=repository.repoid,
+                    ),
+                )
 
             response.write(
                 dumps(
@@ -268,15 +287,7 @@ class UploadHandler(APIView):
             response.write(f"{destination_url}\n{upload_url}")
 
         # Get build url
-        if (
-            repository.service == "gitlab_enterprise"
-            and not upload_params.get("build_url")
-            and upload_params.get("build")
-        ):
-            # if gitlab ci - change domain based by referer
-            build_url = f"{get_config((repository.service, 'url'))}/{owner.username}/{repository.name}/{upload_params.get('build')}"
-        else:
-            build_url = upload_params.get("build_url")
+        build_url = determine_upload_build_url(upload_params, repository)
         queue_params = upload_params.copy()
         if upload_params.get("using_global_token"):
             queue_params["service"] = request_params.get("service")
@@ -304,6 +315,7 @@ class UploadHandler(APIView):
 
         # Send task to worker
         dispatch_upload_task(task_arguments, repository, redis)
+        record_dispatched_uploads(repository, commit, [reportid])
 
         # Segment Tracking
         segment_upload_data = upload_params.copy()